@@ -1,8 +1,9 @@
 import machine  # وارد کردن ماژول machine برای کنترل سخت‌افزار
 import time  # وارد کردن ماژول time برای عملکردهای زمانی و تأخیر
 import math  # وارد کردن ماژول math برای توابع ریاضی
-import GY25_data  # وارد کردن ماژول GY25_data که باید تابع main() را برای برگرداندن pitch، roll و yaw ارائه دهد
+import GY25_data  # وارد کردن ماژول GY25_data که تابع sample() را برای برگرداندن pitch، roll و yaw (بدون تاخیر) ارائه می‌دهد
 import uasyncio as asyncio  # وارد کردن uasyncio برای برنامه‌نویسی غیرهمزمان و نامگذاری آن به asyncio
+import log  # وارد کردن ثبت‌کننده پیام‌ها با سطح‌بندی و بافر حلقوی (به جای print در هر دور حلقه)
 
 # ===============================
 # پیکربندی پین‌ها و ثوابت
@@ -258,15 +259,15 @@ async def main():  # تعریف تابع اصلی غیرهمزمان برای ح
     while True:  # شروع حلقه بی‌نهایت برای خواندن مداوم داده‌های حسگر و کنترل موتورها
         distance = get_distance()  # دریافت فاصله از سنسور اولتراسونیک
         if distance is not None and distance < 20:  # اگر فاصله معتبر بوده و کمتر از 20 سانتی‌متر باشد
-            print("Obstacle detected! Distance: {:.1f} cm. Stopping motors.".format(distance))  # چاپ پیام هشدار درباره مانع
+            log.warning("main", "Obstacle detected! Distance: %.1f cm. Stopping motors.", distance)  # ثبت هشدار مانع (تکرار در دورهای متوالی فقط حدود یک بار در ثانیه چاپ می‌شود)
             await stop_motors()  # توقف فوری موتورها در صورت تشخیص مانع
             await asyncio.sleep(0.1)  # انتظار به مدت 0.1 ثانیه قبل از ادامه حلقه
             continue  # رد کردن بقیه دستورات این دور حلقه در صورت تشخیص مانع
 
         try:  # تلاش برای خواندن داده‌های حسگر از GY25
-            pitch, roll, yaw = GY25_data.main()  # دریافت مقادیر pitch، roll و yaw از تابع main در ماژول GY25_data
+            pitch, roll, yaw = GY25_data.sample()  # دریافت مقادیر pitch، roll و yaw بدون تاخیر؛ main() یک دوره کامل با sleep_ms حلقه رویداد را مسدود می‌کرد
         except Exception as e:  # در صورت بروز خطا در خواندن داده‌های حسگر
-            print("Error reading sensor data:", e)  # چاپ پیام خطا
+            log.error("main", "Error reading sensor data: %s", e)  # ثبت و چاپ پیام خطا
             await asyncio.sleep(0.1)  # انتظار به مدت 0.1 ثانیه قبل از تلاش مجدد
             continue  # رد کردن این دور حلقه در صورت خطا
 
@@ -283,36 +284,36 @@ async def main():  # تعریف تابع اصلی غیرهمزمان برای ح
 
         # تصمیم‌گیری بر اساس مقادیر موثر (پس از اعمال منطقه مرده)
         if pitch_effective == 0 and roll_effective == 0:  # اگر هر دو مقدار pitch و roll در منطقه مرده باشند
-            print("Action: Stopping (Dead Zone)")  # چاپ پیام توقف به دلیل منطقه مرده
+            log.debug("main", "Action: Stopping (Dead Zone)")  # ثبت پیام توقف به دلیل منطقه مرده در بافر حلقوی (بدون چاپ)
             await stop_motors()  # توقف تمامی موتورها
         # حرکات مورب (هر دو محور غیر صفر)
         elif pitch_effective > 0 and roll_effective > 0:  # اگر هر دو مقدار pitch و roll مثبت باشند (حرکت مورب به شمال شرقی)
-            print("Action: Moving Northeast")  # چاپ پیام حرکت به سمت شمال شرقی
+            log.debug("main", "Action: Moving Northeast")  # ثبت پیام حرکت به سمت شمال شرقی در بافر حلقوی (بدون چاپ)
             await move_northeast()  # اجرای تابع حرکت مورب به شمال شرقی
         elif pitch_effective > 0 and roll_effective < 0:  # اگر pitch مثبت و roll منفی باشد (حرکت مورب به شمال غربی)
-            print("Action: Moving Northwest")  # چاپ پیام حرکت به سمت شمال غربی
+            log.debug("main", "Action: Moving Northwest")  # ثبت پیام حرکت به سمت شمال غربی در بافر حلقوی (بدون چاپ)
             await move_northwest()  # اجرای تابع حرکت مورب به شمال غربی
         elif pitch_effective < 0 and roll_effective > 0:  # اگر pitch منفی و roll مثبت باشد (حرکت مورب به جنوب شرقی)
-            print("Action: Moving Southeast")  # چاپ پیام حرکت به سمت جنوب شرقی
+            log.debug("main", "Action: Moving Southeast")  # ثبت پیام حرکت به سمت جنوب شرقی در بافر حلقوی (بدون چاپ)
             await move_southeast()  # اجرای تابع حرکت مورب به جنوب شرقی
         elif pitch_effective < 0 and roll_effective < 0:  # اگر هر دو مقدار pitch و roll منفی باشند (حرکت مورب به جنوب غربی)
-            print("Action: Moving Southwest")  # چاپ پیام حرکت به سمت جنوب غربی
+            log.debug("main", "Action: Moving Southwest")  # ثبت پیام حرکت به سمت جنوب غربی در بافر حلقوی (بدون چاپ)
             await move_southwest()  # اجرای تابع حرکت مورب به جنوب غربی
         # حرکات ساده در صورت فعال بودن تنها یک محور
         elif pitch_effective > 0:  # اگر فقط مقدار pitch مثبت باشد (حرکت به جلو)
-            print("Action: Moving forward")  # چاپ پیام حرکت به جلو
+            log.debug("main", "Action: Moving forward")  # ثبت پیام حرکت به جلو در بافر حلقوی (بدون چاپ)
             await move_forward()  # اجرای تابع حرکت به جلو
         elif pitch_effective < 0:  # اگر فقط مقدار pitch منفی باشد (حرکت به عقب)
-            print("Action: Moving backward")  # چاپ پیام حرکت به عقب
+            log.debug("main", "Action: Moving backward")  # ثبت پیام حرکت به عقب در بافر حلقوی (بدون چاپ)
             await move_backward()  # اجرای تابع حرکت به عقب
         elif roll_effective > 0:  # اگر فقط مقدار roll مثبت باشد (چرخش به راست)
-            print("Action: Turning right")  # چاپ پیام چرخش به راست
+            log.debug("main", "Action: Turning right")  # ثبت پیام چرخش به راست در بافر حلقوی (بدون چاپ)
             await turn_right()  # اجرای تابع چرخش به راست
         elif roll_effective < 0:  # اگر فقط مقدار roll منفی باشد (چرخش به چپ)
-            print("Action: Turning left")  # چاپ پیام چرخش به چپ
+            log.debug("main", "Action: Turning left")  # ثبت پیام چرخش به چپ در بافر حلقوی (بدون چاپ)
             await turn_left()  # اجرای تابع چرخش به چپ
         else:  # حالت پیش‌فرض (اغلب رخ نمی‌دهد)
-            print("Action: Stopping")  # چاپ پیام توقف
+            log.debug("main", "Action: Stopping")  # ثبت پیام توقف در بافر حلقوی (بدون چاپ)
             await stop_motors()  # توقف تمامی موتورها
         
         await asyncio.sleep(0.05)  # انتظار به مدت 0.05 ثانیه قبل از شروع دور بعدی حلقه
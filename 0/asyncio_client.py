@@ -1,17 +1,26 @@
 import network
 import socket
-import math
 import ujson
 import ubinascii
 import os
 import uasyncio as asyncio
 from mpu6050 import MPU6050
+from angles import calculate_angles
+import log
 
 # -------------------------------
 # WiFi Connection Setup (using APwifi)
 # -------------------------------
 import APwifi
 
+# Sensor task period; the IMU's DLPF and output data rate are matched to it
+SEND_PERIOD_MS = 50
+
+# Read the IMU through its hardware FIFO and send one averaged sample per batch.
+# The sensor output data rate must be low enough for the loop to drain the
+# 1024-byte FIFO (85 frames) in time; otherwise overflows are detected and reset.
+USE_FIFO_BATCH = True
+
 # -------------------------------
 # Non-blocking WebSocket Client Functions
 # -------------------------------
@@ -23,7 +32,7 @@ async def websocket_connect(host, port):
     try:
         reader, writer = await asyncio.open_connection(host, port)
     except Exception as e:
-        print("Error connecting to {}:{} -> {}".format(host, port, e))
+        log.error("client", "Error connecting to %s:%s -> %s", host, port, e)
         return None
 
     # Generate a random Sec-WebSocket-Key
@@ -42,13 +51,12 @@ async def websocket_connect(host, port):
     # Read handshake response
     response = await reader.read(1024)
     if b"101 Switching Protocols" not in response:
-        print("WebSocket handshake failed. Received response:")
-        print(response)
+        log.error("client", "WebSocket handshake failed. Received response: %s", response)
         writer.close()
         await writer.wait_closed()
         return None
 
-    print("WebSocket handshake successful.")
+    log.info("client", "WebSocket handshake successful.")
     return reader, writer
 
 def send_ws_frame(writer, data):
@@ -79,14 +87,24 @@ def send_ws_frame(writer, data):
 # -------------------------------
 # Sensor Data Processing Functions
 # -------------------------------
-def calculate_angles(accel_data):
-    Ax = accel_data["x"]
-    Ay = accel_data["y"]
-    Az = accel_data["z"]
-    pitch = math.atan2(Ay, math.sqrt(Ax**2 + Az**2)) * 180 / math.pi
-    roll = math.atan2(-Ax, math.sqrt(Ay**2 + Az**2)) * 180 / math.pi
-    yaw = math.atan2(Ax, Ay) * 180 / math.pi
-    return pitch, roll, yaw
+# calculate_angles() is shared with GY25_data (angles.py, which also has NumPy
+# batch versions for analysing recorded logs on a PC)
+
+def average_batch(batch):
+    """
+    Averages a FIFO batch of (accel, gyro) samples.
+    Returns (accel, gyro) dicts in the same format as a single read.
+    """
+    n = len(batch)
+    ax = ay = az = gx = gy = gz = 0.0
+    for accel, gyro in batch:
+        ax += accel["x"]
+        ay += accel["y"]
+        az += accel["z"]
+        gx += gyro["x"]
+        gy += gyro["y"]
+        gz += gyro["z"]
+    return {"x": ax / n, "y": ay / n, "z": az / n}, {"x": gx / n, "y": gy / n, "z": gz / n}
 
 # -------------------------------
 # Sensor Data Task: Reads sensor data and sends it via WebSocket
@@ -94,9 +112,16 @@ def calculate_angles(accel_data):
 async def sensor_task(writer, mpu):
     while True:
         try:
-            # Read accelerometer and gyroscope data
-            accel = mpu.read_accel_data()  # Expected to return a dict {"x": ..., "y": ..., "z": ...}
-            gyro = mpu.read_gyro_data()    # Expected to return a dict {"x": ..., "y": ..., "z": ...}
+            if USE_FIFO_BATCH:
+                # Everything queued since the last tick, drained in one I2C transaction
+                batch = mpu.read_fifo_batch()
+                if not batch:
+                    await asyncio.sleep(0.01)
+                    continue
+                accel, gyro = average_batch(batch)
+            else:
+                # Read accelerometer and gyroscope data from the same sample (one I2C burst)
+                accel, temp, gyro = mpu.read_all()  # accel/gyro are dicts {"x": ..., "y": ..., "z": ...}
             
             pitch, roll, yaw = calculate_angles(accel)
             
@@ -111,12 +136,12 @@ async def sensor_task(writer, mpu):
             json_data = ujson.dumps(data)
             send_ws_frame(writer, json_data)
             await writer.drain()
-            print("Sensor data sent:", json_data)
+            log.debug("client", "Sensor data sent: %s", json_data)
             
-            # Delay for 50 milliseconds
-            await asyncio.sleep(0.05)
+            # Delay for one send period
+            await asyncio.sleep(SEND_PERIOD_MS / 1000)
         except Exception as e:
-            print("Error in sensor task:", e)
+            log.error("client", "Error in sensor task: %s", e)
             await asyncio.sleep(1)
             # Optionally, reconnect if an error occurs.
 
@@ -133,12 +158,23 @@ async def main():
 
     ws = await websocket_connect(host, port)
     if ws is None:
-        print("WebSocket connection failed.")
+        log.error("client", "WebSocket connection failed.")
         return
     reader, writer = ws
 
     # Create MPU6050 instance to read sensor data
     mpu = MPU6050()
+    # DLPF below half the send rate, ~5 samples per period (100 Hz for 50 ms)
+    mpu.configure_for_loop(SEND_PERIOD_MS)
+    # Gyro/accel bias: saved offsets are restored in milliseconds; the first boot
+    # calibrates (keep the sensor still and level) and saves them to flash
+    report = mpu.load_or_calibrate()
+    if report is not None and not report["stationary"]:
+        log.warning("client", "Sensor moved during calibration, offsets not applied")
+    if USE_FIFO_BATCH:
+        mpu.enable_fifo()
+    else:
+        mpu.enable_data_ready()  # read each sample as soon as it is ready (polls INT_STATUS)
 
     # Create sensor task to continuously read and send sensor data
     sensor = asyncio.create_task(sensor_task(writer, mpu))
@@ -150,4 +186,5 @@ async def main():
 try:
     asyncio.run(main())
 except KeyboardInterrupt:
+    log.dump()
     print("Program stopped.")
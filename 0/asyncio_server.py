@@ -7,6 +7,12 @@ import ubinascii
 import hashlib
 import network
 import uasyncio as asyncio
+from mixer import Mixer
+from motors import Motors
+from scheduler import FixedRate
+from buzzer import Buzzer
+from manoeuvre import Manoeuvres
+import log
 
 # ===============================
 # Create Access Point
@@ -16,7 +22,7 @@ ap.active(True)
 ap.config(essid="CarControlAP", password="12345678")
 while not ap.active():
     pass
-print("Access Point active with IP:", ap.ifconfig()[0])
+log.info("server", "Access Point active with IP: %s", ap.ifconfig()[0])
 
 # ===============================
 # Pin Configurations and Constants
@@ -37,8 +43,14 @@ ENB_PIN = 9   # Motor 2 PWM (Speed)
 MAX_SPEED = 65535
 
 THRESHOLD_ANGLE = 10
-SMOOTHING_ALPHA = 0.4  # Low-pass filter factor
+SMOOTHING_ALPHA = 0.8  # Low-pass filter factor (light: the client's IMU DLPF does most of the smoothing)
 DIAGONAL_FACTOR = 0.7  # کاهش سرعت یکی از موتورها در حرکات قطری
+LOOP_PERIOD_MS = 50    # control loop period (absolute deadlines, see scheduler.FixedRate)
+DRIVE_MODE = "discrete"  # "discrete" (nine actions) or "proportional" (mixer.Mixer)
+MIX_FULL_ANGLE = 45      # tilt at which the proportional mixer reaches MAX_SPEED
+MOTOR_SLEW = 262140      # max duty rise per second (0 -> MAX_SPEED in 250 ms), None: no ramp
+BACK_PULSE_MS = 200      # backward pulse: drive time
+BACK_PAUSE_MS = 200      # backward pulse: pause time
 
 # ===============================
 # Ultrasonic Sensor Setup (optional for obstacle detection)
@@ -62,27 +74,18 @@ def get_distance():
 # ===============================
 # Buzzer Setup with Musical Effects
 # ===============================
-buzzer = machine.PWM(machine.Pin(BUZZER_PIN))
-buzzer.freq(1000)  # Default frequency
+buzzer = Buzzer(BUZZER_PIN)  # background melody task (buzzer.run() is started in main())
 
-async def play_melody(melody):
+def play_melody(melody):
     """
-    Plays a melody.
+    Plays a melody in the background and returns at once.
     :param melody: A list of tuples (frequency in Hz, duration in seconds).
                    A frequency of 0 indicates a rest.
+    A newer melody cuts the one that is playing.
     """
-    for note in melody:
-        freq, duration = note
-        if freq > 0:
-            buzzer.freq(freq)
-            buzzer.duty_u16(30000)  # تنظیم duty cycle برای تولید صدا
-        else:
-            buzzer.duty_u16(0)
-        await asyncio.sleep(duration)
-        buzzer.duty_u16(0)
-        await asyncio.sleep(0.05)  # توقف کوتاه بین نت‌ها
-
-async def play_sound(pattern):
+    buzzer.play(melody)
+
+def play_sound(pattern):
     """Plays musical effects based on the movement pattern."""
     if pattern == "forward":
         melody = [(440, 0.1), (494, 0.1), (523, 0.1)]  # صعودی: A4, B4, C5
@@ -104,20 +107,14 @@ async def play_sound(pattern):
         melody = [(0, 0.1)]
     else:
         melody = [(0, 0.1)]
-    await play_melody(melody)
+    play_melody(melody)
 
 # ===============================
 # L298 Motor Control Setup
 # ===============================
-motor_1_forward = machine.Pin(IN1_PIN, machine.Pin.OUT)
-motor_1_backward = machine.Pin(IN2_PIN, machine.Pin.OUT)
-motor_2_forward = machine.Pin(IN3_PIN, machine.Pin.OUT)
-motor_2_backward = machine.Pin(IN4_PIN, machine.Pin.OUT)
-
-motor_1_pwm = machine.PWM(machine.Pin(ENA_PIN))
-motor_2_pwm = machine.PWM(machine.Pin(ENB_PIN))
-motor_1_pwm.freq(1000)
-motor_2_pwm.freq(1000)
+motors = Motors(IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN, ENA_PIN, ENB_PIN, slew=MOTOR_SLEW)
+mixer = Mixer(THRESHOLD_ANGLE, MIX_FULL_ANGLE)
+manoeuvres = Manoeuvres()  # timed manoeuvres such as the backward pulse (manoeuvres.run() is started in main())
 
 def apply_dead_zone(value, threshold):
     """Returns 0 if the absolute value is below the threshold; otherwise, returns the value."""
@@ -125,98 +122,56 @@ def apply_dead_zone(value, threshold):
         return 0
     return value
 
+def apply_action(action, duty1=0, duty2=0):
+    """Applies an action; outputs and the sound are only touched when they change."""
+    if motors.apply(action, duty1, duty2):
+        log.info("motion", "Action: %s", action)
+        play_sound(action)
+
+def drive(action, duty1=0, duty2=0):
+    """Cancels a running manoeuvre (the newer command wins) and applies the action."""
+    manoeuvres.cancel()
+    apply_action(action, duty1, duty2)
+
+def drive_mixed(left, right):
+    """Applies signed left/right duties; the sound only plays when the wheel directions change."""
+    manoeuvres.cancel()
+    if motors.drive(left, right):
+        log.info("motion", "Action: %s", motors.action)
+        play_sound(motors.action)
+
 async def stop_motors():
-    motor_1_forward.value(0)
-    motor_1_backward.value(0)
-    motor_2_forward.value(0)
-    motor_2_backward.value(0)
-    motor_1_pwm.duty_u16(0)
-    motor_2_pwm.duty_u16(0)
-    await play_sound("stop")
+    drive("stop")
 
 async def move_forward():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("forward")
+    drive("forward", MAX_SPEED, MAX_SPEED)
 
 async def move_backward():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("backward")
-    await asyncio.sleep(0.2)
-    await stop_motors()
-    await asyncio.sleep(0.2)
+    if manoeuvres.active("pulse_back"):
+        return  # the running pulse continues; the control loop does not wait for it
+    manoeuvres.start("pulse_back", (
+        (apply_action, ("backward", MAX_SPEED, MAX_SPEED), BACK_PULSE_MS),
+        (motors.pause, (), BACK_PAUSE_MS),  # pulse off; the action stays "backward" so its sound is not replayed
+    ))
 
 async def turn_right():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("right")
+    drive("right", MAX_SPEED, MAX_SPEED)
 
 async def turn_left():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("left")
+    drive("left", MAX_SPEED, MAX_SPEED)
 
 # --- Diagonal Movement Functions ---
 async def move_northeast():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    await play_sound("northeast")
+    drive("northeast", MAX_SPEED, int(MAX_SPEED * DIAGONAL_FACTOR))
 
 async def move_northwest():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("northwest")
+    drive("northwest", int(MAX_SPEED * DIAGONAL_FACTOR), MAX_SPEED)
 
 async def move_southeast():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    await play_sound("southeast")
+    drive("southeast", MAX_SPEED, int(MAX_SPEED * DIAGONAL_FACTOR))
 
 async def move_southwest():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
-    speed = MAX_SPEED
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    motor_2_pwm.duty_u16(speed)
-    await play_sound("southwest")
+    drive("southwest", int(MAX_SPEED * DIAGONAL_FACTOR), MAX_SPEED)
 
 # ===============================
 # WebSocket Handshake and Frame Reception Helpers
@@ -268,35 +223,28 @@ async def websocket_receive(reader):
     return payload.decode('utf-8')
 
 # ===============================
-# Main WebSocket Server Loop (Control Car)
+# Control Task and WebSocket Server Loop (Control Car)
 # ===============================
-async def client_handler(reader, writer):
-    print("New connection from:", writer.get_extra_info('peername'))
-    if not await handle_handshake(reader, writer):
-        writer.close()
-        await writer.wait_closed()
-        return
-    print("WebSocket handshake successful. Receiving data...")
+async def control_loop(latest, rate):
+    """
+    Fixed-rate control task: filters the newest received tilt and drives the car.
+    :param latest: One-element list holding the newest decoded frame; client_handler
+                   replaces it as frames arrive, so the loop never works through a backlog.
+    :param rate: FixedRate pacing the loop; its stats cover the control work only.
+    """
     smoothed_pitch, smoothed_roll, smoothed_yaw = None, None, None
-
     try:
         while True:
-            ws_data = await websocket_receive(reader)
-            if ws_data is None:
-                break
-            try:
-                sensor_data = ujson.loads(ws_data)
-            except Exception as e:
-                print("JSON decode error:", e)
-                continue
+            await rate.tick()
+            sensor_data = latest[0]
+            if sensor_data is None:
+                continue  # nothing received yet
 
             # Mapping received sensor data: posX -> pitch, posY -> roll, posZ -> yaw
             pitch = sensor_data.get("posX", 0)
             roll  = sensor_data.get("posY", 0)
             yaw   = sensor_data.get("posZ", 0)
             
-            print("Sensor data received:", sensor_data)
-            
             # Smoothing
             if smoothed_pitch is None:
                 smoothed_pitch, smoothed_roll, smoothed_yaw = pitch, roll, yaw
@@ -305,56 +253,96 @@ async def client_handler(reader, writer):
                 smoothed_roll  = SMOOTHING_ALPHA * roll  + (1 - SMOOTHING_ALPHA) * smoothed_roll
                 smoothed_yaw   = SMOOTHING_ALPHA * yaw   + (1 - SMOOTHING_ALPHA) * smoothed_yaw
 
+            if DRIVE_MODE == "proportional":
+                left, right = mixer.mix(smoothed_pitch, smoothed_roll, MAX_SPEED)
+                drive_mixed(left, right)
+                continue
+
             # Apply dead zone to each axis
             pitch_effective = apply_dead_zone(smoothed_pitch, THRESHOLD_ANGLE)
             roll_effective  = apply_dead_zone(smoothed_roll, THRESHOLD_ANGLE)
             
             # Decision-making based on effective values
             if pitch_effective == 0 and roll_effective == 0:
-                print("Action: Stopping (Dead zone)")
+                log.debug("server", "Action: Stopping (Dead zone)")
                 await stop_motors()
             elif pitch_effective > 0 and roll_effective > 0:
-                print("Action: Moving Northeast")
+                log.debug("server", "Action: Moving Northeast")
                 await move_northeast()
             elif pitch_effective > 0 and roll_effective < 0:
-                print("Action: Moving Northwest")
+                log.debug("server", "Action: Moving Northwest")
                 await move_northwest()
             elif pitch_effective < 0 and roll_effective > 0:
-                print("Action: Moving Southeast")
+                log.debug("server", "Action: Moving Southeast")
                 await move_southeast()
             elif pitch_effective < 0 and roll_effective < 0:
-                print("Action: Moving Southwest")
+                log.debug("server", "Action: Moving Southwest")
                 await move_southwest()
             elif pitch_effective > 0:
-                print("Action: Moving forward")
+                log.debug("server", "Action: Moving forward")
                 await move_forward()
             elif pitch_effective < 0:
-                print("Action: Moving backward")
+                log.debug("server", "Action: Moving backward")
                 await move_backward()
             elif roll_effective > 0:
-                print("Action: Turning right")
+                log.debug("server", "Action: Turning right")
                 await turn_right()
             elif roll_effective < 0:
-                print("Action: Turning left")
+                log.debug("server", "Action: Turning left")
                 await turn_left()
             else:
-                print("Action: Stopping")
+                log.debug("server", "Action: Stopping")
                 await stop_motors()
-            
-            await asyncio.sleep(0.05)
     except Exception as e:
-        print("Client handler error:", e)
+        log.error("server", "Control loop error: %s", e)
+
+async def client_handler(reader, writer):
+    log.info("server", "New connection from: %s", writer.get_extra_info('peername'))
+    if not await handle_handshake(reader, writer):
+        writer.close()
+        await writer.wait_closed()
+        return
+    log.info("server", "WebSocket handshake successful. Receiving data...")
+    # Frames are received as fast as they arrive and only the newest one is kept; the
+    # control task acts on it at LOOP_PERIOD_MS.
+    latest = [None]
+    rate = FixedRate(LOOP_PERIOD_MS)
+    control = asyncio.create_task(control_loop(latest, rate))
+
+    try:
+        while True:
+            ws_data = await websocket_receive(reader)
+            if ws_data is None:
+                break
+            try:
+                sensor_data = ujson.loads(ws_data)
+            except Exception as e:
+                log.error("server", "JSON decode error: %s", e)
+                continue
+
+            log.debug("server", "Sensor data received: %s", sensor_data)
+            latest[0] = sensor_data
+    except Exception as e:
+        log.error("server", "Client handler error: %s", e)
     finally:
+        control.cancel()
         writer.close()
         await writer.wait_closed()
-        print("Client disconnected, waiting for new connection...")
+        log.info("server", "Control loop: %s", rate.stats())
+        log.info("server", "Client disconnected, waiting for new connection...")
 
 async def main():
+    asyncio.create_task(motors.run())  # PWM ramp task
+    asyncio.create_task(buzzer.run())  # melody task
+    asyncio.create_task(manoeuvres.run())  # timed manoeuvre steps
     server = await asyncio.start_server(client_handler, '0.0.0.0', 8800)
-    print("Car Control WebSocket server started on port 8800.")
+    log.info("server", "Car Control WebSocket server started on port 8800.")
     # استفاده از حلقه بی‌نهایت به جای serve_forever
     while True:
         await asyncio.sleep(1)
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        log.dump()
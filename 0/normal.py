@@ -1,6 +1,10 @@
 import machine  # ایمپورت ماژول machine برای کنترل سخت‌افزار
 import time  # ایمپورت ماژول time برای مدیریت زمان و تأخیرها
 import math  # ایمپورت ماژول math برای انجام محاسبات ریاضی
+from scheduler import FixedRate  # ایمپورت زمان‌بند با نرخ ثابت برای حلقه کنترل
+from speed_input import SpeedInput  # ایمپورت خواندن پتانسیومتر با نمونه‌برداری چندباره و هیسترزیس
+from manoeuvre import Manoeuvres  # ایمپورت اجراکننده مانورهای زمان‌دار بدون sleep
+import log  # ایمپورت ثبت‌کننده پیام‌ها با سطح‌بندی و بافر حلقوی (به جای print در هر دور حلقه)
 import GY25_data  # ایمپورت ماژول GY25_data؛ این ماژول باید تابع main() را فراهم کند که مقدار pitch، roll و yaw را برمی‌گرداند.
 
 # ===============================
@@ -19,11 +23,21 @@ ENA_PIN = 8   # تنظیم پین ENA برای PWM موتور 1 (کنترل سر
 ENB_PIN = 9   # تنظیم پین ENB برای PWM موتور 2 (کنترل سرعت)
 
 POT_PIN = 26  # تنظیم پین پتانسیومتر به پین 26 (ADC)
+POT_SAMPLE_HZ = 100  # نرخ نمونه‌برداری پتانسیومتر (هرتز)؛ در حلقه مسدودکننده نمونه‌های عقب‌افتاده در هر دور با poll() گرفته می‌شوند
+POT_OVERSAMPLE = 8  # تعداد نمونه‌هایی که میانگین گرفته می‌شوند
+POT_HYSTERESIS = 512  # تغییرات کوچک‌تر از این مقدار (از 65535) نادیده گرفته می‌شوند
 
 THRESHOLD_ANGLE = 10  # تعریف آستانه زاویه برای منطقه بی‌اثر (Dead Zone)
 SMOOTHING_ALPHA = 0.4  # تعریف ضریب فیلتر پایین‌گذر برای صاف کردن سیگنال‌های سنسور
 
 DIAGONAL_FACTOR = 0.01  # تعریف ضریب کاهش سرعت برای موتور در سمت چرخش هنگام حرکت مورب
+BACK_PULSE_MS = 200  # مدت حرکت به عقب در هر پالس عقب‌رفت (میلی‌ثانیه)
+BACK_PAUSE_MS = 200  # مدت توقف پس از هر پالس عقب‌رفت (میلی‌ثانیه)
+
+LOOP_PERIOD_MS = 50  # دوره حلقه کنترل (میلی‌ثانیه)
+control_rate = FixedRate(LOOP_PERIOD_MS)  # زمان‌بند با مهلت‌های مطلق؛ تاخیر (jitter)، بدترین زمان اجرا (WCET) و تعداد عبور از مهلت را ثبت می‌کند
+manoeuvres = Manoeuvres()  # مانورهای زمان‌دار (پالس عقب‌رفت)؛ گام‌ها با manoeuvres.poll() در ابتدای هر دور حلقه اجرا می‌شوند
+backing_up = False  # True از شروع اولین پالس عقب‌رفت تا تصمیم بعدی غیر از عقب؛ صدای عقب‌رفت فقط هنگام تغییر به این حالت پخش می‌شود
 
 # ===============================
 # راه‌اندازی سنسور اولتراسونیک
@@ -118,12 +132,11 @@ motor_2_pwm.freq(1000)  # تنظیم فرکانس PWM موتور ۲ به 1000 ه
 # ===============================
 # راه‌اندازی پتانسیومتر (ADC)
 # ===============================
-potentiometer = machine.ADC(machine.Pin(POT_PIN))  # ایجاد شیء ADC برای خواندن مقدار پتانسیومتر از پین POT_PIN
+potentiometer = SpeedInput(POT_PIN, POT_SAMPLE_HZ, POT_OVERSAMPLE, POT_HYSTERESIS)  # میانگین چند نمونه ADC با هیسترزیس؛ potentiometer.poll() در ابتدای هر دور حلقه
 
 def read_potentiometer():
     """مقدار پتانسیومتر را می‌خواند و یک مقدار بین ۰ تا ۶۵۵۳۵ برای PWM برمی‌گرداند."""
-    pot_value = potentiometer.read_u16()  # خواندن مقدار پتانسیومتر به صورت عددی بین 0 تا 65535
-    return pot_value  # برگرداندن مقدار خوانده‌شده از پتانسیومتر
+    return potentiometer.read()  # مقدار ذخیره‌شده (میانگین نمونه‌های اخیر) بدون دسترسی به ADC
 
 # -------------------------------
 # تابع کمکی: اعمال منطقه بی‌اثر (Dead Zone) بر روی یک مقدار
@@ -153,7 +166,7 @@ def move_forward():
     motor_2_pwm.duty_u16(speed)  # تنظیم سرعت موتور ۲ به مقدار خوانده‌شده
     play_sound("forward")  # پخش افکت حرکت به جلو
 
-def move_backward():
+def back_pulse():
     motor_1_forward.value(0)  # غیرفعال کردن جهت جلو موتور ۱
     motor_1_backward.value(1)  # فعال کردن جهت عقب موتور ۱
     motor_2_forward.value(0)  # غیرفعال کردن جهت جلو موتور ۲
@@ -161,10 +174,23 @@ def move_backward():
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
     motor_1_pwm.duty_u16(speed)  # تنظیم سرعت موتور ۱ به مقدار خوانده‌شده
     motor_2_pwm.duty_u16(speed)  # تنظیم سرعت موتور ۲ به مقدار خوانده‌شده
-    play_sound("backward")  # پخش افکت حرکت به عقب
-    time.sleep(0.2)  # توقف به مدت 0.2 ثانیه
-    stop_motors()  # توقف موتورها
-    time.sleep(0.2)  # توقف اضافی به مدت 0.2 ثانیه
+
+def pause_motors():
+    # فقط صفر کردن duty؛ پین‌های جهت و حالت عقب‌رفت تغییر نمی‌کنند و ملودی توقف پخش نمی‌شود
+    motor_1_pwm.duty_u16(0)  # تنظیم سرعت موتور ۱ به 0
+    motor_2_pwm.duty_u16(0)  # تنظیم سرعت موتور ۲ به 0
+
+def move_backward():
+    global backing_up
+    if manoeuvres.active("pulse_back"):  # پالس قبلی هنوز در حال اجراست
+        return  # ادامه همان پالس؛ حلقه بدون انتظار به دور بعد می‌رود
+    if not backing_up:  # تغییر حرکت به عقب (نه پالس بعدی همان عقب‌رفت)
+        play_sound("backward")  # پخش افکت حرکت به عقب فقط یک بار، پیش از شروع پالس تا زمان‌بندی پالس به هم نخورد
+        backing_up = True
+    manoeuvres.start("pulse_back", (  # شروع پالس عقب‌رفت با مهلت‌های زمانی به جای time.sleep
+        (back_pulse, (), BACK_PULSE_MS),  # حرکت به عقب (فورا اعمال می‌شود)؛ فقط پین‌ها و duty
+        (pause_motors, (), BACK_PAUSE_MS),  # صفر کردن duty پس از BACK_PULSE_MS، بدون ملودی
+    ))
 
 def turn_right():
     # چرخش به صورت محوری برای چرخش در جای خود: استفاده از ملودی "right"
@@ -249,21 +275,25 @@ def move_southwest():
 # حلقه اصلی
 # ===============================
 def main():
+    global backing_up
     smoothed_pitch, smoothed_roll, smoothed_yaw = None, None, None  # مقداردهی اولیه مقادیر صاف شده (smoothed) برای pitch، roll و yaw به None
 
     while True:  # شروع یک حلقه بی‌نهایت برای اجرای مداوم برنامه
+        control_rate.tick_sync()  # انتظار تا مهلت بعدی (هر LOOP_PERIOD_MS میلی‌ثانیه، مستقل از مدت اجرای دور قبل)؛ آمار در control_rate.stats()
+        potentiometer.poll()  # گرفتن نمونه‌های ADC عقب‌افتاده (بدون انتظار)؛ توابع حرکت فقط مقدار ذخیره‌شده را می‌خوانند
+        manoeuvres.poll()  # اجرای گام مانوری که مهلتش رسیده است (بدون انتظار)
         distance = get_distance()  # خواندن فاصله از سنسور اولتراسونیک
         if distance is not None and distance < 20:  # بررسی اینکه فاصله معتبر است و کمتر از 20 سانتی‌متر می‌باشد
-            print("Obstacle detected! Distance: {:.1f} cm. Stopping motors.".format(distance))  # چاپ پیغام هشدار برای مانع نزدیک
+            log.warning("main", "Obstacle detected! Distance: %.1f cm. Stopping motors.", distance)  # ثبت هشدار مانع (تکرار در دورهای متوالی فقط حدود یک بار در ثانیه چاپ می‌شود)
+            manoeuvres.cancel()  # لغو مانور جاری؛ توقف بر هر مانوری مقدم است
+            backing_up = False  # عقب‌رفت بعدی دوباره صدای خود را پخش می‌کند
             stop_motors()  # توقف موتورها در صورت نزدیک بودن مانع
-            time.sleep(0.1)  # توقف برنامه به مدت 0.1 ثانیه
             continue  # رفتن به ابتدای حلقه و نادیده گرفتن بقیه کدها در این تکرار
 
         try:  # تلاش برای خواندن داده‌های سنسور
-            pitch, roll, yaw = GY25_data.main()  # دریافت مقادیر pitch، roll و yaw از تابع main ماژول GY25_data
+            pitch, roll, yaw = GY25_data.sample()  # دریافت مقادیر pitch، roll و yaw از GY25_data بدون تاخیر اضافه (زمان‌بندی با control_rate است)
         except Exception as e:  # در صورت بروز خطا هنگام خواندن داده‌های سنسور
-            print("Error reading sensor data:", e)  # چاپ پیغام خطا همراه با جزئیات خطا
-            time.sleep(0.1)  # توقف برنامه به مدت 0.1 ثانیه
+            log.error("main", "Error reading sensor data: %s", e)  # ثبت و چاپ پیغام خطا همراه با جزئیات خطا
             continue  # رفتن به ابتدای حلقه
 
         if smoothed_pitch is None:  # بررسی اینکه آیا مقادیر صاف شده قبلاً مقداردهی نشده‌اند
@@ -276,42 +306,43 @@ def main():
         # اعمال منطقه بی‌اثر برای هر محور به صورت جداگانه
         pitch_effective = apply_dead_zone(smoothed_pitch, THRESHOLD_ANGLE)  # اعمال منطقه بی‌اثر بر روی pitch صاف شده
         roll_effective = apply_dead_zone(smoothed_roll, THRESHOLD_ANGLE)  # اعمال منطقه بی‌اثر بر روی roll صاف شده
+        if not (pitch_effective < 0 and roll_effective == 0):  # هر تصمیمی غیر از حرکت به عقب
+            manoeuvres.cancel()  # پالس عقب‌رفت در حال اجرا لغو می‌شود (دستور جدیدتر برنده است)
+            backing_up = False  # حرکت عوض شده است؛ عقب‌رفت بعدی دوباره صدای خود را پخش می‌کند
 
         # تصمیم‌گیری بر اساس مقادیر موثر جهت تعیین حرکت
         if pitch_effective == 0 and roll_effective == 0:  # اگر هر دو مقدار در منطقه بی‌اثر باشند
-            print("Action: Stopping (Dead Zone)")  # چاپ پیغام توقف به دلیل منطقه بی‌اثر
+            log.debug("main", "Action: Stopping (Dead Zone)")  # ثبت پیغام توقف به دلیل منطقه بی‌اثر در بافر حلقوی (بدون چاپ)
             stop_motors()  # توقف موتورها
         # حرکات مورب (زمانی که هر دو محور مقدار غیر صفر دارند)
         elif pitch_effective > 0 and roll_effective > 0:  # اگر pitch و roll هر دو مثبت باشند
-            print("Action: Moving Northeast")  # چاپ پیغام حرکت به سمت شمال شرق
+            log.debug("main", "Action: Moving Northeast")  # ثبت پیغام حرکت به سمت شمال شرق در بافر حلقوی (بدون چاپ)
             move_northeast()  # اجرای تابع حرکت مورب به جلو و راست
         elif pitch_effective > 0 and roll_effective < 0:  # اگر pitch مثبت و roll منفی باشند
-            print("Action: Moving Northwest")  # چاپ پیغام حرکت به سمت شمال غرب
+            log.debug("main", "Action: Moving Northwest")  # ثبت پیغام حرکت به سمت شمال غرب در بافر حلقوی (بدون چاپ)
             move_northwest()  # اجرای تابع حرکت مورب به جلو و چپ
         elif pitch_effective < 0 and roll_effective > 0:  # اگر pitch منفی و roll مثبت باشند
-            print("Action: Moving Southeast")  # چاپ پیغام حرکت به سمت جنوب شرق
+            log.debug("main", "Action: Moving Southeast")  # ثبت پیغام حرکت به سمت جنوب شرق در بافر حلقوی (بدون چاپ)
             move_southeast()  # اجرای تابع حرکت مورب به عقب و راست
         elif pitch_effective < 0 and roll_effective < 0:  # اگر pitch و roll هر دو منفی باشند
-            print("Action: Moving Southwest")  # چاپ پیغام حرکت به سمت جنوب غرب
+            log.debug("main", "Action: Moving Southwest")  # ثبت پیغام حرکت به سمت جنوب غرب در بافر حلقوی (بدون چاپ)
             move_southwest()  # اجرای تابع حرکت مورب به عقب و چپ
         # حرکات ساده زمانی که تنها یکی از محور‌ها فعال باشد
         elif pitch_effective > 0:  # اگر تنها pitch مثبت باشد
-            print("Action: Moving forward")  # چاپ پیغام حرکت به جلو
+            log.debug("main", "Action: Moving forward")  # ثبت پیغام حرکت به جلو در بافر حلقوی (بدون چاپ)
             move_forward()  # اجرای تابع حرکت به جلو
         elif pitch_effective < 0:  # اگر تنها pitch منفی باشد
-            print("Action: Moving backward")  # چاپ پیغام حرکت به عقب
+            log.debug("main", "Action: Moving backward")  # ثبت پیغام حرکت به عقب در بافر حلقوی (بدون چاپ)
             move_backward()  # اجرای تابع حرکت به عقب
         elif roll_effective > 0:  # اگر تنها roll مثبت باشد
-            print("Action: Turning right")  # چاپ پیغام چرخش به راست
+            log.debug("main", "Action: Turning right")  # ثبت پیغام چرخش به راست در بافر حلقوی (بدون چاپ)
             turn_right()  # اجرای تابع چرخش به راست
         elif roll_effective < 0:  # اگر تنها roll منفی باشد
-            print("Action: Turning left")  # چاپ پیغام چرخش به چپ
+            log.debug("main", "Action: Turning left")  # ثبت پیغام چرخش به چپ در بافر حلقوی (بدون چاپ)
             turn_left()  # اجرای تابع چرخش به چپ
         else:
-            print("Action: Stopping")  # چاپ پیغام توقف در صورت عدم انطباق شرایط
+            log.debug("main", "Action: Stopping")  # ثبت پیغام توقف در صورت عدم انطباق شرایط در بافر حلقوی (بدون چاپ)
             stop_motors()  # توقف موتورها
 
-        time.sleep(0.05)  # توقف کوتاه به مدت 0.05 ثانیه برای جلوگیری از بارگذاری بیش از حد حلقه
-
 if __name__ == '__main__':  # بررسی اینکه آیا این اسکریپت به عنوان برنامه اصلی اجرا شده است
     main()  # فراخوانی تابع main برای شروع اجرای برنامه
@@ -1,12 +1,13 @@
 import network
 import socket
 import time
-import math
 import ujson
 import ubinascii
 import os
 import hashlib
 from mpu6050 import MPU6050
+from angles import calculate_angles
+import log
 
 # -------------------------------
 # WiFi Connection Setup
@@ -36,11 +37,10 @@ def websocket_connect(host, port):
     s.send(handshake.encode())
     response = s.recv(1024)
     if b"101 Switching Protocols" not in response:
-        print("Handshake failed, response:")
-        print(response)
+        log.error("client", "Handshake failed, response: %s", response)
         s.close()
         return None
-    print("WebSocket handshake successful.")
+    log.info("client", "WebSocket handshake successful.")
     return s
 
 def send_ws_frame(s, data):
@@ -71,14 +71,8 @@ def send_ws_frame(s, data):
 # -------------------------------
 # Sensor Data Processing
 # -------------------------------
-def calculate_angles(accel_data):
-    Ax = accel_data["x"]
-    Ay = accel_data["y"]
-    Az = accel_data["z"]
-    pitch = math.atan2(Ay, math.sqrt(Ax**2 + Az**2)) * 180 / math.pi
-    roll = math.atan2(-Ax, math.sqrt(Ay**2 + Az**2)) * 180 / math.pi
-    yaw = math.atan2(Ax, Ay) * 180 / math.pi
-    return pitch, roll, yaw
+# calculate_angles() is shared with GY25_data (angles.py, which also has NumPy
+# batch versions for analysing recorded logs on a PC)
 
 # -------------------------------
 # Main Client Loop
@@ -92,7 +86,7 @@ def main():
     
     ws = websocket_connect(host, port)
     if ws is None:
-        print("WebSocket connection failed.")
+        log.error("client", "WebSocket connection failed.")
         return
     
     # ایجاد شیء MPU6050 برای خواندن داده‌های شتاب‌سنج
@@ -115,10 +109,10 @@ def main():
             }
             json_data = ujson.dumps(data)
             send_ws_frame(ws, json_data)
-            print("Sent sensor data:", json_data)
+            log.debug("client", "Sent sensor data: %s", json_data)
             time.sleep_ms(50)
         except Exception as e:
-            print("Error in main loop:", e)
+            log.error("client", "Error in main loop: %s", e)
             time.sleep(1)
             # در صورت بروز خطا، می‌توان اقدام به برقراری مجدد ارتباط کرد.
             
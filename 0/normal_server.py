@@ -1,11 +1,16 @@
 import machine
 import time
+import errno
 import math
 import ujson
 import socket
 import ubinascii
 import hashlib
 import network  # برای تنظیم نقطه اتصال WiFi
+from motors import Motors
+from speed_input import SpeedInput
+from manoeuvre import Manoeuvres
+import log
 
 # ===============================
 # ایجاد نقطه اتصال (Access Point)
@@ -15,7 +20,7 @@ ap.active(True)
 ap.config(essid="CarControlAP", password="12345678")  # تنظیم SSID و PASSWORD
 while not ap.active():
     pass
-print("Access Point active with IP:", ap.ifconfig()[0])
+log.info("server", "Access Point active with IP: %s", ap.ifconfig()[0])
 
 # ===============================
 # Pin Configurations and Constants
@@ -38,6 +43,9 @@ POT_PIN = 26  # ADC pin for potentiometer
 THRESHOLD_ANGLE = 10
 SMOOTHING_ALPHA = 0.4  # Low-pass filter factor
 DIAGONAL_FACTOR = 0.7  # To reduce speed for one motor during diagonal moves
+BACK_PULSE_MS = 200    # backward pulse: drive time
+BACK_PAUSE_MS = 200    # backward pulse: pause time
+RECV_TIMEOUT_MS = 50   # longest wait for a frame; manoeuvres keep running when none arrives
 
 # ===============================
 # Ultrasonic Sensor Setup (optional for obstacle detection)
@@ -108,23 +116,16 @@ def play_sound(pattern):
 # ===============================
 # L298 Motor Control Setup
 # ===============================
-motor_1_forward = machine.Pin(IN1_PIN, machine.Pin.OUT)
-motor_1_backward = machine.Pin(IN2_PIN, machine.Pin.OUT)
-motor_2_forward = machine.Pin(IN3_PIN, machine.Pin.OUT)
-motor_2_backward = machine.Pin(IN4_PIN, machine.Pin.OUT)
-
-motor_1_pwm = machine.PWM(machine.Pin(ENA_PIN))
-motor_2_pwm = machine.PWM(machine.Pin(ENB_PIN))
-motor_1_pwm.freq(1000)
-motor_2_pwm.freq(1000)
+motors = Motors(IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN, ENA_PIN, ENB_PIN)
 
 # ===============================
 # Potentiometer Setup (ADC for speed control)
 # ===============================
-potentiometer = machine.ADC(machine.Pin(POT_PIN))
+# Oversampled with hysteresis; potentiometer.poll() catches up once per received frame
+potentiometer = SpeedInput(POT_PIN)
 def read_potentiometer():
-    """Returns a value between 0 and 65535 to be used as PWM duty."""
-    return potentiometer.read_u16()
+    """Returns a value between 0 and 65535 to be used as PWM duty (cached, no ADC read)."""
+    return potentiometer.read()
 
 # -------------------------------
 # Helper: Apply Dead Zone to a value
@@ -135,98 +136,66 @@ def apply_dead_zone(value, threshold):
         return 0
     return value
 
+# Timed manoeuvres (the backward pulse); steps run from manoeuvres.poll() once per frame,
+# or every RECV_TIMEOUT_MS while no frame arrives
+manoeuvres = Manoeuvres()
+
+def apply_action(action, duty1=0, duty2=0):
+    """Applies an action; outputs and the sound are only touched when they change."""
+    if motors.apply(action, duty1, duty2):
+        log.info("motion", "Action: %s", action)
+        play_sound(action)
+
+def drive(action, duty1=0, duty2=0):
+    """Control-loop command: preempts a running manoeuvre, then applies the action."""
+    manoeuvres.cancel()
+    apply_action(action, duty1, duty2)
+
 def stop_motors():
-    motor_1_forward.value(0)
-    motor_1_backward.value(0)
-    motor_2_forward.value(0)
-    motor_2_backward.value(0)
-    motor_1_pwm.duty_u16(0)
-    motor_2_pwm.duty_u16(0)
-    play_sound("stop")
+    drive("stop")
 
 def move_forward():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    play_sound("forward")
+    drive("forward", speed, speed)
 
 def move_backward():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
+    if manoeuvres.active("pulse_back"):
+        return
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    play_sound("backward")
-    time.sleep(0.2)
-    stop_motors()
-    time.sleep(0.2)
+    if motors.action != "backward":
+        # play_sound() blocks for the whole melody: play it once, before the pulse starts,
+        # so it neither stretches the first pulse nor replays on every pulse
+        log.info("motion", "Action: %s", "backward")
+        play_sound("backward")
+    # BACK_PULSE_MS backward, then BACK_PAUSE_MS paused; the steps only set the outputs and
+    # the action stays "backward" while paused
+    manoeuvres.start("pulse_back", ((motors.apply, ("backward", speed, speed), BACK_PULSE_MS),
+                                    (motors.pause, (), BACK_PAUSE_MS)))
 
 def turn_right():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    play_sound("right")
+    drive("right", speed, speed)
 
 def turn_left():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(speed)
-    play_sound("left")
+    drive("left", speed, speed)
 
 # --- Diagonal Movement Functions ---
 def move_northeast():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    play_sound("northeast")
+    drive("northeast", speed, int(speed * DIAGONAL_FACTOR))
 
 def move_northwest():
-    motor_1_forward.value(1)
-    motor_1_backward.value(0)
-    motor_2_forward.value(1)
-    motor_2_backward.value(0)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    motor_2_pwm.duty_u16(speed)
-    play_sound("northwest")
+    drive("northwest", int(speed * DIAGONAL_FACTOR), speed)
 
 def move_southeast():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(speed)
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    play_sound("southeast")
+    drive("southeast", speed, int(speed * DIAGONAL_FACTOR))
 
 def move_southwest():
-    motor_1_forward.value(0)
-    motor_1_backward.value(1)
-    motor_2_forward.value(0)
-    motor_2_backward.value(1)
     speed = read_potentiometer()
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))
-    motor_2_pwm.duty_u16(speed)
-    play_sound("southwest")
+    drive("southwest", int(speed * DIAGONAL_FACTOR), speed)
 
 # ===============================
 # WebSocket Handshake and Frame Reception Helpers
@@ -275,6 +244,10 @@ def websocket_receive(conn):
         payload[i] ^= mask[i % 4]
     return payload.decode('utf-8')
 
+def recv_timed_out(e):
+    """True if the OSError comes from the socket timeout rather than a broken connection."""
+    return e.args[0] in (errno.ETIMEDOUT, errno.EAGAIN)
+
 # ===============================
 # Main WebSocket Server Loop (Control Car)
 # ===============================
@@ -286,24 +259,35 @@ def main():
     s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     s.bind(('0.0.0.0', 8800))
     s.listen(1)
-    print("Control Car WebSocket server started on port 8800.")
+    log.info("server", "Control Car WebSocket server started on port 8800.")
     
     while True:
         try:
             conn, addr = s.accept()
-            print("New connection from:", addr)
+            log.info("server", "New connection from: %s", addr)
             if not handle_handshake(conn):
                 conn.close()
                 continue
-            print("WebSocket handshake successful. Receiving data...")
+            log.info("server", "WebSocket handshake successful. Receiving data...")
+            conn.settimeout(RECV_TIMEOUT_MS / 1000)
             while True:
-                ws_data = websocket_receive(conn)
+                try:
+                    ws_data = websocket_receive(conn)
+                except OSError as e:
+                    if not recv_timed_out(e):
+                        raise
+                    # No frame: keep a running pulse on time (it ends paused if the client went quiet)
+                    potentiometer.poll()
+                    manoeuvres.poll()
+                    continue
                 if ws_data is None:
                     break
+                potentiometer.poll()
+                manoeuvres.poll()
                 try:
                     sensor_data = ujson.loads(ws_data)
                 except Exception as e:
-                    print("JSON decode error:", e)
+                    log.error("server", "JSON decode error: %s", e)
                     continue
 
                 # Mapping received sensor data: posX -> pitch, posY -> roll, posZ -> yaw
@@ -311,7 +295,7 @@ def main():
                 roll  = sensor_data.get("posY", 0)
                 yaw   = sensor_data.get("posZ", 0)
                 
-                print("Received sensor data:", sensor_data)
+                log.debug("server", "Received sensor data: %s", sensor_data)
                 
                 # Smoothing
                 if smoothed_pitch is None:
@@ -327,46 +311,51 @@ def main():
                 
                 # Decision-making based on effective values
                 if pitch_effective == 0 and roll_effective == 0:
-                    print("Action: Stopping (Dead Zone)")
+                    log.debug("server", "Action: Stopping (Dead Zone)")
                     stop_motors()
                 elif pitch_effective > 0 and roll_effective > 0:
-                    print("Action: Moving Northeast")
+                    log.debug("server", "Action: Moving Northeast")
                     move_northeast()
                 elif pitch_effective > 0 and roll_effective < 0:
-                    print("Action: Moving Northwest")
+                    log.debug("server", "Action: Moving Northwest")
                     move_northwest()
                 elif pitch_effective < 0 and roll_effective > 0:
-                    print("Action: Moving Southeast")
+                    log.debug("server", "Action: Moving Southeast")
                     move_southeast()
                 elif pitch_effective < 0 and roll_effective < 0:
-                    print("Action: Moving Southwest")
+                    log.debug("server", "Action: Moving Southwest")
                     move_southwest()
                 elif pitch_effective > 0:
-                    print("Action: Moving forward")
+                    log.debug("server", "Action: Moving forward")
                     move_forward()
                 elif pitch_effective < 0:
-                    print("Action: Moving backward")
+                    log.debug("server", "Action: Moving backward")
                     move_backward()
                 elif roll_effective > 0:
-                    print("Action: Turning right")
+                    log.debug("server", "Action: Turning right")
                     turn_right()
                 elif roll_effective < 0:
-                    print("Action: Turning left")
+                    log.debug("server", "Action: Turning left")
                     turn_left()
                 else:
-                    print("Action: Stopping")
+                    log.debug("server", "Action: Stopping")
                     stop_motors()
                 
                 time.sleep(0.05)
         except Exception as e:
-            print("Server error:", e)
+            log.error("server", "Server error: %s", e)
             time.sleep(1)
         finally:
+            if manoeuvres.cancel():
+                motors.pause()  # end a pulse cut short by the disconnect the way it would have ended
             try:
                 conn.close()
             except:
                 pass
-            print("Client disconnected, waiting for a new connection...")
+            log.info("server", "Client disconnected, waiting for a new connection...")
 
 if __name__ == '__main__':
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        log.dump()
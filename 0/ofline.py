@@ -1,7 +1,8 @@
 import machine
 import time
 import math
-import GY25_data  # This module should provide a main() function returning pitch, roll, and yaw.
+import GY25_data  # Provides sample(), returning pitch, roll, and yaw without waiting.
+import log
 
 # ===============================
 # Pin Configurations and Constants
@@ -254,15 +255,15 @@ def main():
     while True:
         distance = get_distance()
         if distance is not None and distance < 20:
-            print("Obstacle detected! Distance: {:.1f} cm. Stopping motors.".format(distance))
+            log.warning("main", "Obstacle detected! Distance: %.1f cm. Stopping motors.", distance)
             stop_motors()
             time.sleep(0.1)
             continue
 
         try:
-            pitch, roll, yaw = GY25_data.main()
+            pitch, roll, yaw = GY25_data.sample()  # main() would add a second LOOP_PERIOD_MS sleep per loop
         except Exception as e:
-            print("Error reading sensor data:", e)
+            log.error("main", "Error reading sensor data: %s", e)
             time.sleep(0.1)
             continue
 
@@ -279,36 +280,36 @@ def main():
 
         # Decision-making based on effective values
         if pitch_effective == 0 and roll_effective == 0:
-            print("Action: Stopping (Dead Zone)")
+            log.debug("main", "Action: Stopping (Dead Zone)")
             stop_motors()
         # Diagonal movements (both axes non-zero)
         elif pitch_effective > 0 and roll_effective > 0:
-            print("Action: Moving Northeast")
+            log.debug("main", "Action: Moving Northeast")
             move_northeast()
         elif pitch_effective > 0 and roll_effective < 0:
-            print("Action: Moving Northwest")
+            log.debug("main", "Action: Moving Northwest")
             move_northwest()
         elif pitch_effective < 0 and roll_effective > 0:
-            print("Action: Moving Southeast")
+            log.debug("main", "Action: Moving Southeast")
             move_southeast()
         elif pitch_effective < 0 and roll_effective < 0:
-            print("Action: Moving Southwest")
+            log.debug("main", "Action: Moving Southwest")
             move_southwest()
         # Pure movements if only one axis is active
         elif pitch_effective > 0:
-            print("Action: Moving forward")
+            log.debug("main", "Action: Moving forward")
             move_forward()
         elif pitch_effective < 0:
-            print("Action: Moving backward")
+            log.debug("main", "Action: Moving backward")
             move_backward()
         elif roll_effective > 0:
-            print("Action: Turning right")
+            log.debug("main", "Action: Turning right")
             turn_right()
         elif roll_effective < 0:
-            print("Action: Turning left")
+            log.debug("main", "Action: Turning left")
             turn_left()
         else:
-            print("Action: Stopping")
+            log.debug("main", "Action: Stopping")
             stop_motors()
         
         time.sleep(0.05)
@@ -1,58 +1,150 @@
 from mpu6050 import MPU6050
+from imu_bus import IMUBus
+from fusion import AttitudeFilter
+from sensor_stream import SensorStream
+from gy25 import GY25
+from angles import calculate_angles, calculate_gforce  # توابع زاویه در angles.py (همراه با نسخه‌های دسته‌ای NumPy)
 from machine import Pin
 from time import sleep_ms, ticks_ms
 import math
+import uasyncio as asyncio
+import log  # ثبت پیام‌ها در بافر حلقوی به جای چاپ مستقیم
 
-mpu = MPU6050()
+LOOP_PERIOD_MS = 50  # دوره حلقه خواندن (میلی‌ثانیه)، برابر با تاخیر انتهای main()
+STREAM_RATE_HZ = 50  # نرخ وظیفه غیرهمزمان خواندن سنسور (start_stream)
+STREAM_CAPACITY = 16  # تعداد نمونه‌های نگه‌داشته‌شده در بافر حلقوی
 
-def calculate_angles(accel_data):
-    # محاسبه زاویه Pitch و Roll
-    Ax, Ay, Az = accel_data["x"], accel_data["y"], accel_data["z"]
-    
-    pitch = math.atan2(Ay, math.sqrt(Ax**2 + Az**2)) * 180 / math.pi  # تبدیل به درجه
-    roll = math.atan2(-Ax, math.sqrt(Ay**2 + Az**2)) * 180 / math.pi  # تبدیل به درجه
-    yaw = math.atan2(Ax, Ay) * 180 / math.pi  # تبدیل به درجه برای Yaw
-    
-    # محدود کردن مقادیر Pitch و Roll به 0 تا 180 درجه
-    #pitch = max(0, min(pitch, 180))
-    #roll = max(0, min(roll, 180))
-    #yaw = max(0, min(yaw, 180))  # محدود کردن Yaw به 0 تا 90 درجه  
+SENSOR_BACKEND = "mpu6050"  # "mpu6050": سنسور MPU6050 روی I2C (زاویه‌ها در همین ماژول محاسبه می‌شوند) | "gy25": ماژول GY-25 روی UART (زاویه‌ها توسط خود ماژول)
+GY25_UART = 0  # شماره UART ماژول GY-25؛ پیش‌فرض: TX=GPIO0 به RX ماژول، RX=GPIO1 به TX ماژول، 115200 بیت بر ثانیه
 
-    return pitch, roll, yaw
+IMU_ADDRESSES = (0x68,)  # آدرس سنسورهای MPU6050 روی باس مشترک؛ برای دو سنسور: (0x68, 0x69) با AD0 متصل به VCC در دومی
+IMU_FUSION = "average"  # "average": میانگین سنسورهای سالم | "failover": سنسور اصلی و در صورت قطع شدن، سنسور پشتیبان
+IMU_MAX_AGE_MS = 3 * LOOP_PERIOD_MS  # حداکثر عمر مجاز آخرین نمونه هر سنسور؛ نمونه‌های قدیمی‌تر کنار گذاشته می‌شوند
+IMU_FILTER = "complementary"  # ترکیب شتاب‌سنج و ژیروسکوپ: "complementary" (فیلتر مکمل) | "madgwick"
+IMU_CAL_FILE = "mpu6050_cal_{:02X}.json"  # فایل کالیبراسیون هر سنسور در حافظه فلش؛ برای کالیبراسیون دوباره فایل را پاک کنید
 
-def calculate_gforce(accel_data):
-    # محاسبه G-Force
-    Ax, Ay, Az = accel_data["x"], accel_data["y"], accel_data["z"]
-    gforce = math.sqrt(Ax**2 + Ay**2 + Az**2)
-    return gforce
+def calibrate(dev):
+    # بارگذاری آفست‌های ذخیره‌شده در چند میلی‌ثانیه؛ اگر فایلی نباشد، کالیبراسیون (ربات باید ساکن و افقی باشد) و ذخیره آن
+    report = dev.load_or_calibrate(IMU_CAL_FILE.format(dev.addr))
+    if report is None:
+        log.error("imu", "IMU 0x%02X calibration failed: sensor not readable", dev.addr)
+    elif not report["stationary"]:
+        log.warning("imu", "IMU 0x%02X moved during calibration (gyro std %.2f deg/s), offsets not applied",
+                    dev.addr, max(report["gyro_std"]))
+    return report
+
+sample_rate_hz = 1000  # نرخ نمونه‌برداری سنسور اصلی (هرتز)؛ فاصله زمانی نمونه‌های FIFO در main_batch()
+
+gy25 = None
+if SENSOR_BACKEND == "gy25":
+    # ماژول GY-25 در حالت خروجی پیوسته دودویی؛ فریم‌ها در sample() از بافر UART خوانده می‌شوند
+    gy25 = GY25(GY25_UART)
+    imu_bus = None
+    mpu = None
+elif len(IMU_ADDRESSES) > 1:
+    # چند سنسور روی یک باس I2C مشترک که توسط IMUBus به نوبت خوانده می‌شوند
+    imu_bus = IMUBus(IMU_ADDRESSES, rate_hz=len(IMU_ADDRESSES) * 1000 // LOOP_PERIOD_MS)
+    mpu = None  # سنسور اصلی برای main_batch(): اولین سنسوری که راه‌اندازی آن موفق بوده است
+    for dev in imu_bus.devices:
+        if dev is None:
+            continue
+        try:
+            bandwidth, rate = dev.configure_for_loop(LOOP_PERIOD_MS)
+            if mpu is None:
+                mpu = dev
+                sample_rate_hz = rate
+            calibrate(dev)
+        except OSError as e:  # سنسور در دسترس نیست؛ خواندن‌های آن STALE برمی‌گردند
+            log.error("imu", "IMU 0x%02X setup failed: %s", dev.addr, e)
+    if mpu is None:  # هیچ سنسوری راه‌اندازی نشد؛ اولین سنسور ساخته‌شده (ممکن است بعدا وصل شود)، یا None اگر هیچ‌کدام ساخته نشده باشد
+        mpu = next((dev for dev in imu_bus.devices if dev is not None), None)
+else:
+    imu_bus = None
+    mpu = MPU6050()
+    try:
+        bandwidth, sample_rate_hz = mpu.configure_for_loop(LOOP_PERIOD_MS)  # تنظیم فیلتر پایین‌گذر دیجیتال (DLPF) و نرخ نمونه‌برداری سنسور متناسب با دوره حلقه
+        mpu.enable_data_ready()  # خواندن داده دقیقا هنگام آماده شدن نمونه جدید (پایش INT_STATUS) به جای تاخیر ثابت
+        calibrate(mpu)  # حذف بایاس شتاب‌سنج و ژیروسکوپ در رجیسترهای آفست سنسور
+    except OSError as e:  # سنسور در دسترس نیست؛ خواندن‌ها تا وصل شدن دوباره STALE برمی‌گردند
+        log.error("imu", "MPU6050 setup failed: %s", e)
+
+def sensor_stats():
+    # شمارنده‌های خطای I2C و وضعیت مدارشکن (circuit breaker) سنسور(ها) برای حلقه کنترل
+    if gy25 is not None:
+        return gy25.stats()  # تعداد فریم‌ها، بایت‌های دورریخته‌شده برای هم‌گام‌سازی و عمر آخرین فریم
+    if imu_bus is None:
+        return mpu.error_stats()
+    return [dev.error_stats() for dev in imu_bus.devices if dev is not None]
+
+# تخمین جهت‌گیری (کواترنیون) از ژیروسکوپ، تصحیح‌شده با جهت گرانش شتاب‌سنج؛ بدون تاخیر فیلتر پایین‌گذر
+attitude = AttitudeFilter(IMU_FILTER)
 
 prev_time = ticks_ms()
 pitch = 0
 roll = 0
 
+def main_batch():
+    # خواندن دسته‌ای: همه نمونه‌های انباشته‌شده در FIFO سخت‌افزاری از فراخوانی قبلی، بدون انتظار
+    # خروجی: لیستی از (pitch, roll, yaw) به ترتیب زمانی (قدیمی‌ترین در ابتدا)
+    if gy25 is not None:  # همه فریم‌های رسیده در بافر UART
+        batch = []
+        gy25.poll(batch)
+        return batch
+    if mpu is None:
+        raise OSError("no IMU available for main_batch() at " + ", ".join("0x{:02X}".format(a) for a in IMU_ADDRESSES))
+    dt = 1 / sample_rate_hz  # نمونه‌های FIFO با فاصله زمانی ثابت تولید شده‌اند
+    return [attitude.update(accel, gyro, dt) for accel, gyro in mpu.read_fifo_batch(True)]
+
+def read_accel():
+    # داده‌های شتاب‌سنج؛ در حالت چند سنسوره، ترکیب (یا جایگزینی) سنسورهای سالم
+    if imu_bus is None:
+        return mpu.read_accel_data()
+    if not imu_bus.running:  # اگر وظیفه imu_bus.run() اجرا نشده باشد، همه سنسورها همین‌جا خوانده می‌شوند
+        imu_bus.read_all_devices()
+    accel = imu_bus.fused_accel(IMU_MAX_AGE_MS, IMU_FUSION, True)
+    if accel is None:
+        raise OSError("no fresh sample from IMUs at " + ", ".join("0x{:02X}".format(a) for a in IMU_ADDRESSES))
+    return accel
+
+def read_imu():
+    # شتاب (g) و سرعت زاویه‌ای (deg/s)؛ در حالت تک سنسور هر دو از یک نمونه (یک تراکنش I2C)
+    if imu_bus is None:
+        accel, temp, gyro = mpu.read_all(g=True)
+        return accel, gyro
+    accel = read_accel()
+    return accel, imu_bus.fused_gyro(IMU_MAX_AGE_MS, IMU_FUSION)
+
+def sample():
+    # یک بار خواندن سنسور و به‌روزرسانی زاویه‌ها، بدون تاخیر؛ خروجی (pitch, roll, yaw)
+    if gy25 is not None:
+        return gy25.read_angles(IMU_MAX_AGE_MS)  # NaN اگر فریم تازه‌ای نرسیده باشد
+    # داده‌های شتاب‌سنج و ژیروسکوپ
+    accel, gyro = read_imu()
+    # ترکیب داده‌ها: زاویه از انتگرال ژیروسکوپ (با فاصله زمانی واقعی ticks_us) و تصحیح با شتاب‌سنج
+    return attitude.update(accel, gyro)
+
+def start_stream(rate_hz=STREAM_RATE_HZ, capacity=STREAM_CAPACITY):
+    # شروع وظیفه غیرهمزمان که هر 1/rate_hz ثانیه sample() را اجرا و در بافر حلقوی ذخیره می‌کند
+    # باید داخل حلقه asyncio فراخوانی شود؛ خروجی: SensorStream با latest() و stream()
+    # (ماژول GY-25 خودش با نرخ ثابت فریم می‌فرستد و آماده‌سازی ندارد)
+    if imu_bus is not None:
+        if not imu_bus.running:
+            asyncio.create_task(imu_bus.run())
+    elif mpu is not None:
+        try:
+            mpu.disable_data_ready()  # زمان‌بندی با وظیفه است؛ انتظار برای نمونه جدید حلقه رویداد را مسدود می‌کرد
+        except OSError:
+            mpu._drdy = False  # سنسور فعلا در دسترس نیست؛ فقط انتظار نرم‌افزاری خاموش می‌شود
+    stream = SensorStream(sample, rate_hz, capacity)
+    asyncio.create_task(stream.run())
+    return stream
+
 def main():
-    # داده‌های شتاب‌سنج
-    accel = mpu.read_accel_data()
-    pitch, roll, yaw = calculate_angles(accel)
+    # نسخه مسدودکننده: خواندن و سپس تاخیر یک دوره (برای اسکریپت‌های ساده؛ main.py از start_stream() استفاده می‌کند)
+    pitch, roll, yaw = sample()
     p, r , y = pitch, roll, yaw
     #temp = mpu.read_temperature()  # [°C]
     
-    # داده‌های ژیروسکوپ
-    #gyro = mpu.read_gyro_data()
-    #gyro_x = gyro["x"]
-    #gyro_y = gyro["y"]
-    #gyro_z = gyro["z"]
-    
-    # زمان برای محاسبه تغییرات زاویه‌ای
-    #curr_time = ticks_ms()
-    #dt = (curr_time - prev_time) / 1000  # ثانیه
-    #prev_time = curr_time
-    
-    # محاسبه تغییرات زاویه‌ای (ژایرو)
-    #angle_x = gyro_x * dt
-    #angle_y = gyro_y * dt
-    #angle_z = gyro_z * dt
-    
     # محاسبه G-Force
     #gforce = calculate_gforce(accel)
     
@@ -61,10 +153,10 @@ def main():
     #print(f"="*110)
     #print(f"Accelerometer -->  X: {pitch:.2f} degrees  |  Y: {roll:.2f} degrees  |  Z: {yaw:.2f} degrees  |  G-Force: {gforce:.2f} g")
     #print(f"."*110)
-    #print(f"Gyroscope -->  X: {angle_x:.2f} degrees  |  Y: {angle_y:.2f} degrees  |  Z: {angle_z:.2f} degrees")
+    #print(f"Gyroscope -->  X: {gyro['x']:.2f} deg/s  |  Y: {gyro['y']:.2f} deg/s  |  Z: {gyro['z']:.2f} deg/s")
     #print(f"."*110)
     #print(f"temp: {temp} °C")
     #print(f"="*110)
 
-    sleep_ms(50)
+    sleep_ms(LOOP_PERIOD_MS)
     return p, r , y
@@ -0,0 +1,116 @@
+# محاسبات زاویه و G-Force از داده‌های شتاب‌سنج
+# توابع تکی (calculate_angles و calculate_gforce) روی MicroPython و CPython اجرا می‌شوند.
+# نسخه‌های دسته‌ای (*_batch) برای تحلیل لاگ‌های ضبط‌شده روی کامپیوتر هستند و به NumPy نیاز دارند؛
+# NumPy فقط هنگام فراخوانی آن‌ها import می‌شود، پس این ماژول روی میکروکنترلر هم قابل استفاده است.
+import math
+
+try:
+    import micropython
+except ImportError:  # CPython: دکوراتور @micropython.native بدون اثر
+    class micropython:
+        @staticmethod
+        def native(f):
+            return f
+
+FAST_MATH = False  # True: calculate_angles = calculate_angles_fast (ارزان‌تر؛ تفاوت با نسخه دقیق فقط در حد گرد کردن float)؛ هنگام import انتخاب می‌شود
+
+def calculate_angles(accel_data):
+    # محاسبه زاویه Pitch و Roll
+    Ax, Ay, Az = accel_data["x"], accel_data["y"], accel_data["z"]
+    
+    pitch = math.atan2(Ay, math.sqrt(Ax**2 + Az**2)) * 180 / math.pi  # تبدیل به درجه
+    roll = math.atan2(-Ax, math.sqrt(Ay**2 + Az**2)) * 180 / math.pi  # تبدیل به درجه
+    yaw = math.atan2(Ax, Ay) * 180 / math.pi  # تبدیل به درجه برای Yaw
+    
+    # محدود کردن مقادیر Pitch و Roll به 0 تا 180 درجه
+    #pitch = max(0, min(pitch, 180))
+    #roll = max(0, min(roll, 180))
+    #yaw = max(0, min(yaw, 180))  # محدود کردن Yaw به 0 تا 90 درجه  
+
+    return pitch, roll, yaw
+
+def calculate_gforce(accel_data):
+    # محاسبه G-Force
+    Ax, Ay, Az = accel_data["x"], accel_data["y"], accel_data["z"]
+    gforce = math.sqrt(Ax**2 + Ay**2 + Az**2)
+    return gforce
+
+# -------------------------------
+# مسیر محاسبه سریع (FAST_MATH)
+# -------------------------------
+_RAD2DEG = 180 / math.pi  # ضریب تبدیل رادیان به درجه، یک بار هنگام import محاسبه می‌شود
+_atan2 = math.atan2
+_sqrt = math.sqrt
+
+@micropython.native
+def calculate_angles_fast(accel_data):
+    # همان calculate_angles با عملیات کمتر: مربع‌ها با ضرب (به جای **2 که pow را صدا می‌زند) و یک بار محاسبه می‌شوند
+    # و تبدیل به درجه یک ضرب در _RAD2DEG است (به جای * 180 / math.pi: دو عمل و جست‌وجوی math.pi)
+    # روی MicroPython هر عمل float یک شیء تازه روی heap است، پس هر عمل حذف‌شده یک تخصیص حافظه کمتر است
+    # atan2 همان math.atan2 (کد C) می‌ماند: atan2 چندجمله‌ای یا جدولی در بایت‌کد پایتون عمل‌های float بیشتری دارد و کندتر است
+    # نتیجه با calculate_angles در حد گرد کردن float تفاوت دارد (بیت‌به‌بیت یکسان نیست؛ نسخه‌های *_batch با نسخه دقیق یکسان‌اند)
+    Ax, Ay, Az = accel_data["x"], accel_data["y"], accel_data["z"]
+    x2 = Ax * Ax
+    y2 = Ay * Ay
+    z2 = Az * Az
+    pitch = _atan2(Ay, _sqrt(x2 + z2)) * _RAD2DEG
+    roll = _atan2(-Ax, _sqrt(y2 + z2)) * _RAD2DEG
+    yaw = _atan2(Ax, Ay) * _RAD2DEG
+    return pitch, roll, yaw
+
+calculate_angles_exact = calculate_angles
+if FAST_MATH:
+    calculate_angles = calculate_angles_fast
+
+def _columns(accel):
+    # ورودی: آرایه N×3 (ستون‌ها x, y, z)؛ خروجی: ماژول numpy و سه ستون با دقت float64 (مانند float پایتون)
+    import numpy as np
+    a = np.asarray(accel, dtype=np.float64)
+    if a.ndim != 2 or a.shape[1] != 3:
+        raise ValueError("accel must have shape (N, 3), got {}".format(a.shape))
+    return np, a[:, 0], a[:, 1], a[:, 2]
+
+def _degrees(np, y, x, t):
+    # atan2(y, x) * 180 / pi با همان ترتیب عملیات نسخه تکی، در آرایه موقت t (بدون آرایه اضافه)
+    np.arctan2(y, x, out=t)
+    t *= 180
+    t /= math.pi
+    return t
+
+def _angles(np, Ax, Ay, Az, x2, y2, z2):
+    t = np.add(x2, z2)
+    np.sqrt(t, out=t)
+    pitch = _degrees(np, Ay, t, t)
+    t = np.add(y2, z2)
+    np.sqrt(t, out=t)
+    roll = _degrees(np, np.negative(Ax), t, t)
+    yaw = _degrees(np, Ax, Ay, np.empty_like(x2))
+    return pitch, roll, yaw
+
+def calculate_batch(accel):
+    # نسخه دسته‌ای calculate_angles و calculate_gforce با یک فراخوانی برای کل لاگ
+    # ورودی: آرایه N×3 شتاب؛ خروجی: آرایه‌های (pitch, roll, yaw, gforce) هر کدام به طول N
+    # مربع‌ها یک بار محاسبه و بین زاویه‌ها و G-Force به اشتراک گذاشته می‌شوند
+    np, Ax, Ay, Az = _columns(accel)
+    x2 = Ax * Ax
+    y2 = Ay * Ay
+    z2 = Az * Az
+    pitch, roll, yaw = _angles(np, Ax, Ay, Az, x2, y2, z2)
+    gforce = np.add(x2, y2, out=x2)
+    gforce += z2
+    np.sqrt(gforce, out=gforce)
+    return pitch, roll, yaw, gforce
+
+def calculate_angles_batch(accel):
+    # نسخه دسته‌ای calculate_angles؛ خروجی: آرایه‌های (pitch, roll, yaw)
+    np, Ax, Ay, Az = _columns(accel)
+    return _angles(np, Ax, Ay, Az, Ax * Ax, Ay * Ay, Az * Az)
+
+def calculate_gforce_batch(accel):
+    # نسخه دسته‌ای calculate_gforce؛ خروجی: آرایه G-Force
+    np, Ax, Ay, Az = _columns(accel)
+    g = Ax * Ax
+    g += Ay * Ay
+    g += Az * Az
+    np.sqrt(g, out=g)
+    return g
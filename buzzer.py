@@ -0,0 +1,86 @@
+# Background melody engine for the buzzer.
+#
+# One task (run()) owns the buzzer PWM and plays the notes; play() only hands a melody
+# over and returns at once, so callers such as the motor functions never wait for the
+# sound. The latest request wins: a new melody preempts the one that is playing, even
+# in the middle of a note, and a request that was replaced before it started is dropped.
+#
+#     buzzer = Buzzer(10)
+#     asyncio.create_task(buzzer.run())
+#     buzzer.play([(440, 0.1), (494, 0.1)])     # (frequency Hz, duration s); 0 Hz = rest
+
+import uasyncio as asyncio
+from machine import Pin, PWM
+
+_DUTY = 30000      # duty_u16 while a note sounds
+_GAP_S = 0.05      # silence after every note
+
+
+class Buzzer(object):
+    def __init__(self, pin, freq=1000, duty=_DUTY, gap_s=_GAP_S):
+        self.pwm = PWM(Pin(pin))
+        self.pwm.freq(freq)
+        self.pwm.duty_u16(0)
+        self.duty = duty
+        self.gap_s = gap_s
+        self._pending = None
+        self._event = asyncio.Event()
+        self.playing = False
+        self.running = False
+        self.played = 0        # melodies played to the end
+        self.preempted = 0     # melodies cut short by a newer one
+        self.dropped = 0       # requests replaced before they started
+
+    # Queues `melody` (list of (freq, duration) tuples) and returns immediately.
+    def play(self, melody):
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = melody
+        self._event.set()
+
+    # Silences the buzzer (preempts whatever is playing).
+    def stop(self):
+        self.play(())
+
+    # Waits `seconds`; returns True early if a new request arrived meanwhile.
+    async def _rest(self, seconds):
+        if self._event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # Player task.
+    async def run(self):
+        self.running = True
+        pwm = self.pwm
+        try:
+            while True:
+                await self._event.wait()
+                self._event.clear()
+                melody = self._pending
+                self._pending = None
+                self.playing = True
+                preempted = False
+                for freq, duration in melody:
+                    if freq > 0:
+                        pwm.freq(freq)
+                        pwm.duty_u16(self.duty)
+                    else:
+                        pwm.duty_u16(0)
+                    preempted = await self._rest(duration)
+                    pwm.duty_u16(0)
+                    if preempted or await self._rest(self.gap_s):
+                        preempted = True
+                        break
+                if preempted:
+                    self.preempted += 1
+                else:
+                    self.played += 1
+                self.playing = False
+        finally:
+            pwm.duty_u16(0)
+            self.playing = False
+            self.running = False
@@ -0,0 +1,166 @@
+# Incremental attitude estimation from MPU6050 accelerometer + gyroscope samples.
+#
+# The orientation is kept as a unit quaternion. Every update() integrates the gyro
+# rates over the time since the previous sample (ticks_us delta, or an explicit dt for
+# FIFO batches) and pulls the estimate towards the gravity direction measured by the
+# accelerometer, so gyro drift is corrected without the accelerometer's vibration noise:
+#   mode="complementary": proportional correction (Mahony filter without the integral
+#                         term), time constant 1 / kp seconds
+#   mode="madgwick":      gradient-descent correction with gain beta
+# Both cost a fixed number of float operations per sample.
+#
+# pitch and roll follow GY25_data.calculate_angles() (pitch from the Y axis, roll from
+# the X axis, in degrees), so thresholds tuned on the accelerometer-only angles still
+# apply. yaw is the integrated heading around Z; without a magnetometer it is relative
+# to the start and drifts slowly.
+
+from math import sqrt, atan2, sin, cos
+from time import ticks_us, ticks_diff
+
+_DEG = 57.29577951308232    # 180 / pi
+_RAD = 0.017453292519943295 # pi / 180
+_MAX_DT = 0.5               # longer gaps are clamped, the filter re-converges from the accelerometer
+_NaN = float("NaN")
+
+
+class AttitudeFilter(object):
+    def __init__(self, mode="complementary", kp=2.0, beta=0.1):
+        if mode != "complementary" and mode != "madgwick":
+            raise ValueError("mode must be 'complementary' or 'madgwick'")
+        self.mode = mode
+        self.kp = kp
+        self.beta = beta
+        self.reset()
+
+    # Forgets the state; the next update() starts from the accelerometer tilt.
+    def reset(self):
+        self.q0 = 1.0
+        self.q1 = 0.0
+        self.q2 = 0.0
+        self.q3 = 0.0
+        self._last = None
+        self.ready = False
+
+    # Sets the quaternion to the tilt measured by the accelerometer (yaw 0).
+    def _align(self, ax, ay, az):
+        roll = atan2(ay, az) * 0.5
+        pitch = atan2(-ax, sqrt(ay * ay + az * az)) * 0.5
+        cr = cos(roll)
+        sr = sin(roll)
+        cp = cos(pitch)
+        sp = sin(pitch)
+        self.q0 = cr * cp
+        self.q1 = sr * cp
+        self.q2 = cr * sp
+        self.q3 = -sr * sp
+        self.ready = True
+
+    # Feeds one sample: accel (any unit, only the direction is used) and gyro in deg/s,
+    # as dictionaries {"x", "y", "z"} like MPU6050.read_all() returns them.
+    # dt: seconds since the previous sample; None measures it with ticks_us.
+    # Returns (pitch, roll, yaw) in degrees, or NaNs for a STALE sample (the state is
+    # kept and the next good sample integrates over the whole gap).
+    def update(self, accel, gyro, dt=None):
+        ax = accel["x"]
+        ay = accel["y"]
+        az = accel["z"]
+        gx = gyro["x"]
+        if ax != ax or gx != gx:
+            return _NaN, _NaN, _NaN
+        now = ticks_us()
+        if dt is None:
+            dt = 0.0 if self._last is None else ticks_diff(now, self._last) / 1000000
+        self._last = now
+        if not self.ready:
+            if ax == 0 and ay == 0 and az == 0:
+                return _NaN, _NaN, _NaN
+            self._align(ax, ay, az)
+            return self.angles()
+        if dt > _MAX_DT:
+            dt = _MAX_DT
+        gx *= _RAD
+        gy = gyro["y"] * _RAD
+        gz = gyro["z"] * _RAD
+        if self.mode == "complementary":
+            self._mahony(ax, ay, az, gx, gy, gz, dt)
+        else:
+            self._madgwick(ax, ay, az, gx, gy, gz, dt)
+        return self.angles()
+
+    def _mahony(self, ax, ay, az, gx, gy, gz, dt):
+        q0 = self.q0
+        q1 = self.q1
+        q2 = self.q2
+        q3 = self.q3
+        n = sqrt(ax * ax + ay * ay + az * az)
+        if n > 0:
+            ax /= n
+            ay /= n
+            az /= n
+            # Gravity direction of the current estimate
+            vx = 2 * (q1 * q3 - q0 * q2)
+            vy = 2 * (q0 * q1 + q2 * q3)
+            vz = q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3
+            # Error = measured x estimated, fed back as a rotation rate
+            kp = self.kp
+            gx += kp * (ay * vz - az * vy)
+            gy += kp * (az * vx - ax * vz)
+            gz += kp * (ax * vy - ay * vx)
+        h = 0.5 * dt
+        self._set(q0 + (-q1 * gx - q2 * gy - q3 * gz) * h,
+                  q1 + (q0 * gx + q2 * gz - q3 * gy) * h,
+                  q2 + (q0 * gy - q1 * gz + q3 * gx) * h,
+                  q3 + (q0 * gz + q1 * gy - q2 * gx) * h)
+
+    def _madgwick(self, ax, ay, az, gx, gy, gz, dt):
+        q0 = self.q0
+        q1 = self.q1
+        q2 = self.q2
+        q3 = self.q3
+        # Rate of change of the quaternion from the gyroscope
+        d0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        d1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        d2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        d3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+        n = sqrt(ax * ax + ay * ay + az * az)
+        if n > 0:
+            ax /= n
+            ay /= n
+            az /= n
+            # Gradient of the gravity error f(q) = estimated - measured
+            f1 = 2 * (q1 * q3 - q0 * q2) - ax
+            f2 = 2 * (q0 * q1 + q2 * q3) - ay
+            f3 = 1 - 2 * (q1 * q1 + q2 * q2) - az
+            s0 = -2 * q2 * f1 + 2 * q1 * f2
+            s1 = 2 * q3 * f1 + 2 * q0 * f2 - 4 * q1 * f3
+            s2 = -2 * q0 * f1 + 2 * q3 * f2 - 4 * q2 * f3
+            s3 = 2 * q1 * f1 + 2 * q2 * f2
+            n = sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+            if n > 0:
+                b = self.beta / n
+                d0 -= b * s0
+                d1 -= b * s1
+                d2 -= b * s2
+                d3 -= b * s3
+        self._set(q0 + d0 * dt, q1 + d1 * dt, q2 + d2 * dt, q3 + d3 * dt)
+
+    def _set(self, q0, q1, q2, q3):
+        n = sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        self.q0 = q0 / n
+        self.q1 = q1 / n
+        self.q2 = q2 / n
+        self.q3 = q3 / n
+
+    # Current (pitch, roll, yaw) in degrees.
+    def angles(self):
+        q0 = self.q0
+        q1 = self.q1
+        q2 = self.q2
+        q3 = self.q3
+        vx = 2 * (q1 * q3 - q0 * q2)
+        vy = 2 * (q0 * q1 + q2 * q3)
+        vz = q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3
+        pitch = atan2(vy, sqrt(vx * vx + vz * vz)) * _DEG
+        roll = atan2(-vx, sqrt(vy * vy + vz * vz)) * _DEG
+        yaw = atan2(2 * (q1 * q2 + q0 * q3), q0 * q0 + q1 * q1 - q2 * q2 - q3 * q3) * _DEG
+        return pitch, roll, yaw
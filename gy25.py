@@ -0,0 +1,170 @@
+# Driver for the GY-25 tilt module (MPU6050 + on-board attitude MCU) over UART.
+#
+# In binary continuous-output mode the module sends an 8-byte frame for every
+# attitude update:
+#     0xAA  yaw_H yaw_L  pitch_H pitch_L  roll_H roll_L  0x55
+# each angle a big-endian signed 16-bit value in 1/100 degree.
+#
+# poll() drains the UART into a preallocated buffer with readinto() and decodes the
+# frames in place: no bytes objects or slices are created per frame. Bytes that are
+# not the start of a valid frame (power-up noise, a byte lost by the UART) are skipped
+# until the next 0xAA ... 0x55 pair lines up again. The frame has no checksum, so a
+# candidate whose angles fall outside +-180 degrees is rejected as misaligned too.
+
+from array import array
+from machine import UART, Pin
+from time import ticks_ms, ticks_diff, sleep_ms
+
+# Commands (0xA5 followed by the command byte)
+_CMD = 0xA5
+_CMD_QUERY = 0x51            # query mode: one frame per query
+_CMD_CONTINUOUS = 0x52       # binary continuous output
+_CMD_CONTINUOUS_ASCII = 0x53
+_CMD_ZERO_TILT = 0x54        # pitch/roll zero (module must lie level)
+_CMD_ZERO_YAW = 0x55         # heading zero
+
+_FRAME_HEAD = 0xAA
+_FRAME_TAIL = 0x55
+_FRAME_LEN = 8
+_ANGLE_MAX = 18000           # 180.00 degrees
+
+# Pico W default wiring: UART0, TX -> GPIO0 (to GY-25 RX), RX -> GPIO1 (to GY-25 TX)
+_DEFAULT_UART = 0
+_DEFAULT_TX = 0
+_DEFAULT_RX = 1
+_DEFAULT_BAUD = 115200
+_RX_BUF = 256                # UART driver ring buffer (32 frames)
+_PARSE_BUF = 64
+
+_NaN = float("NaN")
+
+
+def _s16(buf, i):
+    v = (buf[i] << 8) | buf[i + 1]
+    return v - 0x10000 if v & 0x8000 else v
+
+
+class GY25(object):
+    def __init__(self, uart=None, tx=None, rx=None, baudrate=_DEFAULT_BAUD, continuous=True):
+        # uart: UART id, or an already-built UART object
+        if uart is None or isinstance(uart, int):
+            uart_id = _DEFAULT_UART if uart is None else uart
+            tx = _DEFAULT_TX if tx is None else tx
+            rx = _DEFAULT_RX if rx is None else rx
+            uart = UART(uart_id, baudrate=baudrate, tx=Pin(tx), rx=Pin(rx), timeout=0, rxbuf=_RX_BUF)
+        self.uart = uart
+
+        self._buf = bytearray(_PARSE_BUF)
+        self._mv = memoryview(self._buf)
+        self._fill = 0
+
+        # Latest frame: raw (yaw, pitch, roll) in 1/100 degree and the tick it arrived
+        self.raw = array("h", [0, 0, 0])
+        self.stamp = None
+        self.frames = 0          # frames decoded
+        self.resyncs = 0         # bytes discarded while looking for a frame header
+
+        self.continuous = False
+        if continuous:
+            self.start_continuous()
+
+    def _command(self, cmd):
+        self.uart.write(bytes([_CMD, cmd]))
+
+    # Switches the module to binary continuous output (its own update rate).
+    def start_continuous(self):
+        self._command(_CMD_CONTINUOUS)
+        self.continuous = True
+
+    # Switches to query mode: the module only answers query() requests.
+    def start_query(self):
+        self._command(_CMD_QUERY)
+        self.continuous = False
+
+    # Asks for one frame in query mode and waits up to timeout_ms for it.
+    # Returns True if a frame arrived.
+    def query(self, timeout_ms=20):
+        self._command(_CMD_QUERY)
+        start = ticks_ms()
+        while self.poll() == 0:
+            if ticks_diff(ticks_ms(), start) >= timeout_ms:
+                return False
+            sleep_ms(1)
+        return True
+
+    # Sets the current pitch/roll as zero (module must be level and still).
+    def zero_tilt(self):
+        self._command(_CMD_ZERO_TILT)
+
+    # Sets the current heading as yaw zero.
+    def zero_yaw(self):
+        self._command(_CMD_ZERO_YAW)
+
+    # Reads everything the UART has buffered and decodes the complete frames.
+    # out: optional list; every decoded frame is appended as (pitch, roll, yaw) in degrees.
+    # Returns the number of frames decoded.
+    def poll(self, out=None):
+        buf = self._buf
+        mv = self._mv
+        uart = self.uart
+        count = 0
+        while True:
+            n = uart.readinto(mv[self._fill:])
+            if not n:
+                break
+            end = self._fill + n
+            i = 0
+            while end - i >= _FRAME_LEN:
+                if buf[i] == _FRAME_HEAD and buf[i + 7] == _FRAME_TAIL:
+                    yaw = _s16(buf, i + 1)
+                    pitch = _s16(buf, i + 3)
+                    roll = _s16(buf, i + 5)
+                    valid = (-_ANGLE_MAX <= yaw <= _ANGLE_MAX and -_ANGLE_MAX <= pitch <= _ANGLE_MAX
+                             and -_ANGLE_MAX <= roll <= _ANGLE_MAX)
+                else:
+                    valid = False
+                if not valid:
+                    i += 1
+                    self.resyncs += 1
+                    continue
+                raw = self.raw
+                raw[0] = yaw
+                raw[1] = pitch
+                raw[2] = roll
+                if out is not None:
+                    out.append((raw[1] / 100, raw[2] / 100, raw[0] / 100))
+                i += _FRAME_LEN
+                count += 1
+            # Keep the incomplete tail (< 8 bytes) at the start of the buffer
+            j = 0
+            while i < end:
+                buf[j] = buf[i]
+                i += 1
+                j += 1
+            self._fill = j
+            if end < len(buf):
+                break        # the UART had less than a full buffer: drained
+        if count:
+            self.frames += count
+            self.stamp = ticks_ms()
+        return count
+
+    # Age of the latest frame [ms], None if none arrived yet.
+    def age_ms(self):
+        if self.stamp is None:
+            return None
+        return ticks_diff(ticks_ms(), self.stamp)
+
+    # Polls and returns the latest (pitch, roll, yaw) in degrees, or NaNs if no frame
+    # newer than max_age_ms exists (cable unplugged, module not in continuous mode).
+    def read_angles(self, max_age_ms=100):
+        self.poll()
+        age = self.age_ms()
+        if age is None or age > max_age_ms:
+            return _NaN, _NaN, _NaN
+        raw = self.raw
+        return raw[1] / 100, raw[2] / 100, raw[0] / 100
+
+    # Frame and resync counters.
+    def stats(self):
+        return {"frames": self.frames, "resyncs": self.resyncs, "age_ms": self.age_ms()}
@@ -0,0 +1,134 @@
+# Shared I2C bus manager for several MPU6050s on one bus
+# (e.g. 0x68 and 0x69 with AD0 strapped high).
+#
+# One I2C object is built once and handed to every MPU6050, and run() reads the devices
+# round-robin at a fixed aggregate rate so each one is sampled at rate_hz / len(devices).
+# Every device keeps its latest raw sample and the tick it was taken, so consumers can
+# see how stale each one is.
+#
+# The IMUBus owns the bus: nothing else should build or use an I2C object on the same
+# pins. No lock is needed. Every transaction (read_next(), read_all_devices() and the
+# MPU6050 calibration/configuration calls) is synchronous and never awaits, and
+# uasyncio only switches tasks at an await, so two transactions can never interleave.
+
+import uasyncio as asyncio
+from array import array
+from time import ticks_ms, ticks_diff, ticks_add
+from mpu6050 import MPU6050, make_i2c
+import log
+
+
+class IMUBus(object):
+    def __init__(self, addrs=(0x68, 0x69), bus=None, freq=None, sda=None, scl=None, rate_hz=40):
+        self.i2c, self.bus_kind = make_i2c(bus, freq, sda, scl)
+        self.rate_hz = rate_hz
+        self.running = False
+        self.addrs = tuple(addrs)
+        self.devices = []
+        for addr in self.addrs:
+            try:
+                dev = MPU6050(bus=self.i2c, addr=addr)
+            except OSError as e:
+                log.error("imu", "IMU 0x%02X not available: %s", addr, e)
+                dev = None
+            self.devices.append(dev)
+        n = len(self.addrs)
+        # Latest raw sample (ax, ay, az, temp, gx, gy, gz) per device
+        self.samples = [array("h", [0] * 7) for _ in range(n)]
+        self.stamps = [None] * n     # ticks_ms of the latest good sample
+        self.failures = [0] * n      # failed reads per device
+        self._next = 0
+
+    # Reads the next device in round-robin order (one burst transaction).
+    # Returns the index that was read.
+    def read_next(self):
+        i = self._next
+        self._next = (i + 1) % len(self.devices)
+        dev = self.devices[i]
+        try:
+            ok = dev is not None and dev.read_raw_into(self.samples[i])
+        except OSError:
+            ok = False
+        if ok:
+            self.stamps[i] = ticks_ms()
+        else:
+            self.failures[i] += 1
+        return i
+
+    # Reads every device once, for callers without the run() task.
+    def read_all_devices(self):
+        for _ in range(len(self.devices)):
+            self.read_next()
+
+    # Scheduler task: one device read every 1/rate_hz seconds on absolute deadlines.
+    async def run(self):
+        self.running = True
+        period = max(1, 1000 // self.rate_hz)
+        deadline = ticks_ms()
+        try:
+            while True:
+                self.read_next()
+                deadline = ticks_add(deadline, period)
+                wait = ticks_diff(deadline, ticks_ms())
+                if wait < 0:
+                    # Overran: restart the schedule instead of bursting to catch up
+                    deadline = ticks_ms()
+                    wait = 0
+                await asyncio.sleep(wait / 1000)
+        finally:
+            self.running = False
+
+    # Age of the latest good sample of device i [ms], None if it never answered.
+    def staleness_ms(self, i):
+        stamp = self.stamps[i]
+        if stamp is None:
+            return None
+        return ticks_diff(ticks_ms(), stamp)
+
+    # Indices of the devices whose latest sample is at most max_age_ms old.
+    def fresh(self, max_age_ms):
+        result = []
+        for i in range(len(self.devices)):
+            age = self.staleness_ms(i)
+            if age is not None and age <= max_age_ms:
+                result.append(i)
+        return result
+
+    # Latest accelerometer sample of device i as a dictionary in g or m/s^2 (g=False).
+    def accel(self, i, g = False):
+        dev = self.devices[i]
+        k = dev._acc_g if g is True else dev._acc_ms2
+        s = self.samples[i]
+        return {"x": s[0] * k, "y": s[1] * k, "z": s[2] * k}
+
+    # Latest gyroscope sample of device i as a dictionary in deg/s.
+    def gyro(self, i):
+        k = self.devices[i]._gyr_dps
+        s = self.samples[i]
+        return {"x": s[4] * k, "y": s[5] * k, "z": s[6] * k}
+
+    # Combined accelerometer reading from the devices that are fresh.
+    # mode="average": mean of all fresh devices (redundant sensors, same orientation)
+    # mode="failover": the first fresh device in address order (primary, then backup)
+    # Returns None if no device has a sample newer than max_age_ms.
+    def fused_accel(self, max_age_ms, mode="average", g = False):
+        return self._fuse(self.accel, max_age_ms, mode, g)
+
+    # Combined gyroscope reading in deg/s, same rules as fused_accel().
+    def fused_gyro(self, max_age_ms, mode="average"):
+        return self._fuse(lambda i, g: self.gyro(i), max_age_ms, mode, False)
+
+    def _fuse(self, reading, max_age_ms, mode, g):
+        fresh = self.fresh(max_age_ms)
+        if not fresh:
+            return None
+        if mode == "failover":
+            return reading(fresh[0], g)
+        x = y = z = 0.0
+        for i in fresh:
+            a = reading(i, g)
+            x += a["x"]
+            y += a["y"]
+            z += a["z"]
+        n = len(fresh)
+        return {"x": x / n, "y": y / n, "z": z / n}
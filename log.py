@@ -0,0 +1,170 @@
+# Levelled logger with a fixed-size in-RAM ring buffer.
+#
+# print() to the USB/UART console costs milliseconds and builds a new string every
+# call; the control loops used to do that 20 times a second. A log call here stores
+# the level, tag, format string and arguments in a preallocated ring slot and only
+# formats and prints the message when its level is at or above `echo`. Everything at
+# or above `level` stays in the ring and dump() prints it on demand (from the REPL,
+# on Ctrl-C, after a disconnect).
+#
+#     import log
+#     log.info("motion", "Action: %s", action)
+#     log.warning("main", "Sonar stale: %s", sonar.stats())
+#     log.debug("main", "Action: Moving forward")
+#
+# Repeats: a message with the same level, tag and format string (the same literal at
+# the same call site) as the previous entry does not take a new slot. The entry's
+# count, time and arguments are updated instead, and it is echoed again at most every
+# repeat_ms with its count, so a condition that holds for many ticks (an obstacle, a
+# stale sensor) prints about once a second instead of on every tick. Warnings and
+# errors fold even when their arguments changed (a distance, counters: the newest are
+# kept); debug and info messages only when the arguments are equal, so two different
+# transitions logged from one call site stay two entries.
+#
+# Debug logging has one switch for the whole project: set_debug(). While it is off,
+# the module-level debug() is a no-op function, so a call site costs one empty call and
+# nothing is stored or compared. It starts on, and off when the code is built with
+# optimisation (mpy-cross -O1 or micropython.opt_level(1), where __debug__ is False).
+# Call sites use log.debug(...) so they see the current binding.
+#
+# Arguments are kept by reference until the entry is formatted, so pass values or
+# fresh objects (stats() dicts, exceptions), not buffers that are reused.
+
+from time import ticks_ms, ticks_diff
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+
+# Ring slot fields
+_TIME = 0       # ticks_ms of the last occurrence
+_LEVEL = 1
+_TAG = 2
+_FMT = 3
+_ARGS = 4
+_COUNT = 5      # occurrences folded into this entry
+_ECHOED = 6     # ticks_ms of the last echo, None if never echoed
+
+
+class Log(object):
+    def __init__(self, size=64, level=DEBUG, echo=INFO, repeat_ms=1000):
+        self.level = level           # lowest level stored in the ring
+        self.echo = echo             # lowest level printed as it happens
+        self.repeat_ms = repeat_ms   # minimum time between echoes of a repeated message
+        self._ring = [[0, 0, None, None, None, 0, None] for _ in range(size)]
+        self._head = 0               # next slot to write
+        self._used = 0
+        self._last = None            # slot of the newest entry, for folding repeats
+        self.logged = 0              # entries written
+        self.folded = 0              # repeats folded into an existing entry
+        self.echoed = 0              # lines printed
+        self.dropped = 0             # entries overwritten by newer ones
+
+    def log(self, level, tag, fmt, *args):
+        if level < self.level:
+            return
+        now = ticks_ms()
+        entry = self._last
+        if (entry is not None and entry[_FMT] is fmt and entry[_TAG] is tag and entry[_LEVEL] == level
+                and (level >= WARNING or entry[_ARGS] == args)):
+            entry[_TIME] = now
+            entry[_ARGS] = args
+            entry[_COUNT] += 1
+            self.folded += 1
+            if level >= self.echo and (entry[_ECHOED] is None or ticks_diff(now, entry[_ECHOED]) >= self.repeat_ms):
+                self._print(entry)
+                entry[_ECHOED] = now
+            return
+        entry = self._ring[self._head]
+        self._head = (self._head + 1) % len(self._ring)
+        if self._used < len(self._ring):
+            self._used += 1
+        else:
+            self.dropped += 1
+        entry[_TIME] = now
+        entry[_LEVEL] = level
+        entry[_TAG] = tag
+        entry[_FMT] = fmt
+        entry[_ARGS] = args
+        entry[_COUNT] = 1
+        entry[_ECHOED] = None
+        self._last = entry
+        self.logged += 1
+        if level >= self.echo:
+            self._print(entry)
+            entry[_ECHOED] = now
+
+    def debug(self, tag, fmt, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, tag, fmt, *args)
+
+    def info(self, tag, fmt, *args):
+        self.log(INFO, tag, fmt, *args)
+
+    def warning(self, tag, fmt, *args):
+        self.log(WARNING, tag, fmt, *args)
+
+    def error(self, tag, fmt, *args):
+        self.log(ERROR, tag, fmt, *args)
+
+    def _print(self, entry):
+        self.echoed += 1
+        print(_format(entry))
+
+    # Entries oldest first, as formatted lines.
+    def lines(self):
+        ring = self._ring
+        size = len(ring)
+        start = (self._head - self._used) % size
+        for i in range(self._used):
+            yield _format(ring[(start + i) % size])
+
+    # Prints the ring buffer, oldest first; clear=True empties it afterwards.
+    def dump(self, clear=False):
+        for line in self.lines():
+            print(line)
+        if clear:
+            self.clear()
+
+    def clear(self):
+        self._used = 0
+        self._last = None
+
+    def stats(self):
+        return {"logged": self.logged, "folded": self.folded, "echoed": self.echoed,
+                "dropped": self.dropped, "buffered": self._used}
+
+
+def _format(entry):
+    args = entry[_ARGS]
+    try:
+        text = entry[_FMT] % args if args else entry[_FMT]
+    except (TypeError, ValueError):
+        text = "{} {}".format(entry[_FMT], args)
+    line = "{:>9} {:<5} {}: {}".format(entry[_TIME], _NAMES.get(entry[_LEVEL], entry[_LEVEL]), entry[_TAG], text)
+    if entry[_COUNT] > 1:
+        line += " (x{})".format(entry[_COUNT])
+    return line
+
+
+def _no_debug(tag, fmt, *args):
+    pass
+
+
+# Turns the shared logger's debug() on or off for every module.
+def set_debug(enabled):
+    global debug
+    debug = default.debug if enabled else _no_debug
+
+
+# Shared logger used by all modules
+default = Log()
+set_debug(__debug__)
+info = default.info
+warning = default.warning
+error = default.error
+dump = default.dump
+stats = default.stats
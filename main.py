@@ -2,8 +2,16 @@
 import machine  # وارد کردن ماژول machine برای کنترل سخت‌افزار
 import time  # وارد کردن ماژول time برای عملکردهای زمانی و تأخیر
 import math  # وارد کردن ماژول math برای توابع ریاضی
-import GY25_data  # وارد کردن ماژول GY25_data که باید تابع main() را برای برگرداندن pitch، roll و yaw ارائه دهد
+import GY25_data  # وارد کردن ماژول GY25_data که با start_stream() مقادیر pitch، roll و yaw را در پس‌زمینه تولید می‌کند
 import uasyncio as asyncio  # وارد کردن uasyncio برای برنامه‌نویسی غیرهمزمان و نامگذاری آن به asyncio
+from buzzer import Buzzer  # وارد کردن موتور پخش ملودی در پس‌زمینه
+from ultrasonic import Ultrasonic  # وارد کردن فاصله‌سنج اولتراسونیک مبتنی بر وقفه
+from scheduler import FixedRate  # وارد کردن زمان‌بند با نرخ ثابت
+from mixer import Mixer  # وارد کردن میکسر تناسبی دیفرانسیلی
+from motors import Motors  # وارد کردن کنترل موتور با حالت (فقط تغییرات روی سخت‌افزار نوشته می‌شوند)
+from speed_input import SpeedInput  # وارد کردن خواندن پتانسیومتر با نمونه‌برداری چندباره در پس‌زمینه
+from manoeuvre import Manoeuvres  # وارد کردن اجراکننده مانورهای زمان‌دار غیرمسدودکننده
+import log  # وارد کردن ثبت‌کننده پیام‌ها با سطح‌بندی و بافر حلقوی (به جای print در هر دور حلقه)
 
 # ===============================
 # پیکربندی پین‌ها و ثوابت
@@ -21,55 +29,51 @@ ENA_PIN = 8    # تعیین پین PWM برای موتور ۱ (کنترل سرع
 ENB_PIN = 9    # تعیین پین PWM برای موتور ۲ (کنترل سرعت) (9)
 
 POT_PIN = 26   # تعیین پین GPIO برای پتانسیومتر (ADC) (26)
+POT_SAMPLE_HZ = 100  # نرخ نمونه‌برداری پتانسیومتر در پس‌زمینه (هرتز)
+POT_OVERSAMPLE = 8  # تعداد نمونه‌هایی که میانگین گرفته می‌شوند (مقدار جدید هر ۸۰ میلی‌ثانیه)
+POT_HYSTERESIS = 512  # تغییرات کوچک‌تر از این مقدار (از 65535) نادیده گرفته می‌شوند تا نویز ADC سرعت موتورها را نلرزاند
 
 THRESHOLD_ANGLE = 10  # تعیین آستانه زاویه برای اعمال منطقه مرده (10 درجه)
-SMOOTHING_ALPHA = 0.4  # تعیین ضریب فیلتر پایین‌گذر برای صاف‌سازی داده‌های حسگر (0.4)
+SMOOTHING_ALPHA = 1.0  # تعیین ضریب فیلتر پایین‌گذر نرم‌افزاری (1.0 = بدون صاف‌سازی اضافه)؛ زاویه‌ها از فیلتر مکمل GY25_data (ژیروسکوپ + شتاب‌سنج) بدون تاخیر و کم‌نویز هستند
+
+OBSTACLE_DISTANCE = 20  # فاصله (سانتی‌متر) که کمتر از آن مانع تشخیص داده می‌شود و موتورها متوقف می‌شوند
+SONAR_MAX_AGE_MS = 400  # حداکثر عمر فاصله اندازه‌گیری‌شده (میلی‌ثانیه)؛ باید از دوره فاصله‌سنجی در حالت توقف (۲۵۰ میلی‌ثانیه) بیشتر باشد
+
+LOOP_PERIOD = 0.05  # دوره حلقه کنترل (ثانیه)؛ تغییر جهت باید حداکثر در همین مدت به موتورها برسد
+control_rate = FixedRate(LOOP_PERIOD * 1000)  # زمان‌بند با مهلت‌های مطلق برای حلقه کنترل؛ تاخیر (jitter)، بدترین زمان اجرا (WCET) و تعداد عبور از مهلت را ثبت می‌کند
 
 DIAGONAL_FACTOR = 0.01  # تعیین ضریب کاهش سرعت موتور در سمت چرخش هنگام حرکت مورب (0.01)
+BACK_PULSE_MS = 200  # مدت حرکت به عقب در هر پالس عقب‌رفت (میلی‌ثانیه)
+BACK_PAUSE_MS = 200  # مدت توقف پس از هر پالس عقب‌رفت (میلی‌ثانیه)
+
+DRIVE_MODE = "discrete"  # حالت رانندگی: "discrete" (نُه حرکت گسسته) یا "proportional" (میکسر تناسبی: سرعت هر چرخ متناسب با زاویه)
+MIX_FULL_ANGLE = 45  # زاویه‌ای (درجه) که میکسر تناسبی در آن به سرعت کامل می‌رسد
+MOTOR_SLEW = 262140  # حداکثر نرخ افزایش duty موتورها (واحد duty بر ثانیه): از صفر تا سرعت کامل در ۲۵۰ میلی‌ثانیه، برای جلوگیری از جریان هجومی، لغزش چرخ و ریست شدن برد؛ None = بدون شیب
 
 # ===============================
 # راه‌اندازی سنسور اولتراسونیک
 # ===============================
-trig = machine.Pin(TRIG_PIN, machine.Pin.OUT)  # مقداردهی اولیه پین تریگر به عنوان خروجی با استفاده از TRIG_PIN
-echo = machine.Pin(ECHO_PIN, machine.Pin.IN)  # مقداردهی اولیه پین اکو به عنوان ورودی با استفاده از ECHO_PIN
-
-def get_distance():  # تعریف تابعی برای اندازه‌گیری فاصله با استفاده از سنسور اولتراسونیک
-    """اندازه‌گیری فاصله با استفاده از سنسور اولتراسونیک."""  # توضیح عملکرد تابع
-    trig.value(0)  # پایین آوردن پین تریگر برای شروع
-    time.sleep_us(2)  # انتظار به مدت ۲ میکروثانیه
-    trig.value(1)  # بالا بردن پین تریگر برای ارسال پالس
-    time.sleep_us(10)  # نگه داشتن پالس به مدت ۱۰ میکروثانیه
-    trig.value(0)  # پایین آوردن پین تریگر پس از ارسال پالس
-    
-    duration = machine.time_pulse_us(echo, 1, 30000)  # اندازه‌گیری مدت زمان پالس برگشتی (تایم‌اوت ۳۰ میلی‌ثانیه)
-    if duration < 0:  # بررسی منفی بودن مدت زمان (اشاره به خطا یا تایم‌اوت)
-        return None  # بازگرداندن None در صورت بروز خطا
-    return duration / 58.0  # تبدیل مدت زمان به فاصله (سانتی‌متر) و بازگرداندن آن
+sonar = Ultrasonic(TRIG_PIN, ECHO_PIN)  # فاصله‌سنجی غیرمسدودکننده: پالس تریگر هر ۶۰ میلی‌ثانیه و زمان‌گیری لبه‌های اکو با وقفه (IRQ)؛ وظیفه sonar.run() در main() اجرا می‌شود
+
+def get_distance():  # تعریف تابعی برای خواندن فاصله فیلترشده سنسور اولتراسونیک
+    """فاصله فیلترشده (سانتی‌متر) و اطمینان آن (0 تا 1) را بدون انتظار برمی‌گرداند."""  # توضیح عملکرد تابع
+    return sonar.filtered(SONAR_MAX_AGE_MS)  # میانه چند اندازه‌گیری آخر؛ (None، اطمینان) یعنی مانعی در محدوده نیست و (None، 0.0) یعنی اندازه‌گیری تازه‌ای وجود ندارد
 
 # ===============================
 # راه‌اندازی بیزر با افکت‌های موسیقایی
 # ===============================
-buzzer = machine.PWM(machine.Pin(BUZZER_PIN))  # مقداردهی PWM برای بیزر با استفاده از BUZZER_PIN
-buzzer.freq(1000)  # تنظیم فرکانس پیش‌فرض بیزر به ۱۰۰۰ هرتز
+buzzer = Buzzer(BUZZER_PIN)  # موتور پخش ملودی در پس‌زمینه روی BUZZER_PIN (فرکانس پیش‌فرض ۱۰۰۰ هرتز)؛ وظیفه buzzer.run() در main() اجرا می‌شود
 
-async def play_melody(melody):  # تعریف تابع غیرهمزمان برای پخش ملودی
+def play_melody(melody):  # تعریف تابع پخش ملودی (بدون انتظار)
     """
-    پخش یک ملودی.
+    پخش یک ملودی در پس‌زمینه؛ تابع بلافاصله برمی‌گردد و حلقه کنترل منتظر نت‌ها نمی‌ماند.
     :param melody: لیستی از تاپل‌ها به صورت (فرکانس به هرتز، مدت زمان به ثانیه).
                    فرکانس 0 نشان‌دهنده توقف است.
+    آخرین درخواست برنده است: ملودی جدید، ملودی در حال پخش را (حتی وسط یک نت) قطع می‌کند.
     """  # توضیح پارامترها و عملکرد تابع
-    for note in melody:  # پیمایش هر نوت در ملودی
-        freq, duration = note  # استخراج فرکانس و مدت زمان از تاپل
-        if freq > 0:  # در صورت عدم توقف (فرکانس > 0)
-            buzzer.freq(freq)  # تنظیم فرکانس بیزر به مقدار فرکانس نوت
-            buzzer.duty_u16(30000)  # تنظیم نسبت کار (duty cycle) به 30000 برای تولید صدا
-        else:  # در صورت توقف (فرکانس برابر 0)
-            buzzer.duty_u16(0)  # خاموش کردن بیزر
-        await asyncio.sleep(duration)  # انتظار به مدت زمان نوت
-        buzzer.duty_u16(0)  # خاموش کردن بیزر پس از پایان نوت
-        await asyncio.sleep(0.05)  # توقف کوتاه بین نوت‌ها (۵۰ میلی‌ثانیه)
-
-async def play_sound(pattern):  # تعریف تابع غیرهمزمان برای پخش افکت صوتی بر اساس الگوی حرکت
+    buzzer.play(melody)  # تحویل ملودی به وظیفه پخش (فاصله ۵۰ میلی‌ثانیه‌ای بین نوت‌ها توسط موتور پخش اعمال می‌شود)
+
+def play_sound(pattern):  # تعریف تابع پخش افکت صوتی بر اساس الگوی حرکت (بدون انتظار)
     """افکت‌های بیزر موسیقایی مختلف را بر اساس الگوی حرکت پخش می‌کند."""  # توضیح عملکرد تابع
     if pattern == "forward":  # در صورت الگوی حرکت "forward"
         # ملودی صعودی: A4, B4, C5
@@ -100,32 +104,26 @@ async def play_sound(pattern):  # تعریف تابع غیرهمزمان برا
         melody = [(0, 0.1)]  # تعریف ملودی توقف (بی‌صدا)
     else:  # در صورت عدم تطابق الگو
         melody = [(0, 0.1)]  # پیش‌فرض: ملودی توقف (بی‌صدا)
-    await play_melody(melody)  # پخش ملودی انتخاب‌شده با فراخوانی تابع play_melody
+    play_melody(melody)  # پخش ملودی انتخاب‌شده در پس‌زمینه با فراخوانی تابع play_melody
 
 # ===============================
 # کنترل موتور L298
 # ===============================
 # فرض بر این است که موتور ۱ در سمت چپ و موتور ۲ در سمت راست قرار دارند.
-motor_1_forward = machine.Pin(IN1_PIN, machine.Pin.OUT)  # مقداردهی اولیه پین حرکت رو به جلو موتور ۱ به عنوان خروجی
-motor_1_backward = machine.Pin(IN2_PIN, machine.Pin.OUT)  # مقداردهی اولیه پین حرکت به عقب موتور ۱ به عنوان خروجی
-motor_2_forward = machine.Pin(IN3_PIN, machine.Pin.OUT)  # مقداردهی اولیه پین حرکت رو به جلو موتور ۲ به عنوان خروجی
-motor_2_backward = machine.Pin(IN4_PIN, machine.Pin.OUT)  # مقداردهی اولیه پین حرکت به عقب موتور ۲ به عنوان خروجی
+motors = Motors(IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN, ENA_PIN, ENB_PIN, slew=MOTOR_SLEW)  # چهار پین جهت و دو PWM (۱۰۰۰ هرتز)؛ فقط خروجی‌هایی که مقدارشان تغییر کند نوشته می‌شوند؛ افزایش سرعت با شیب MOTOR_SLEW توسط وظیفه motors.run()
 
-motor_1_pwm = machine.PWM(machine.Pin(ENA_PIN))  # مقداردهی اولیه PWM برای موتور ۱ (سمت چپ) با استفاده از پین ENA
-motor_2_pwm = machine.PWM(machine.Pin(ENB_PIN))  # مقداردهی اولیه PWM برای موتور ۲ (سمت راست) با استفاده از پین ENB
+manoeuvres = Manoeuvres()  # مانورهای زمان‌دار (مثل پالس عقب‌رفت) با مهلت‌های مطلق؛ وظیفه manoeuvres.run() در main() اجرا می‌شود و هر دستور جدید مانور جاری را لغو می‌کند
 
-motor_1_pwm.freq(1000)  # تنظیم فرکانس PWM موتور ۱ به ۱۰۰۰ هرتز
-motor_2_pwm.freq(1000)  # تنظیم فرکانس PWM موتور ۲ به ۱۰۰۰ هرتز
+mixer = Mixer(THRESHOLD_ANGLE, MIX_FULL_ANGLE)  # میکسر تناسبی با جدول‌های از پیش محاسبه‌شده (منطقه مرده THRESHOLD_ANGLE، سرعت کامل در MIX_FULL_ANGLE)
 
 # ===============================
 # راه‌اندازی پتانسیومتر (ADC)
 # ===============================
-potentiometer = machine.ADC(machine.Pin(POT_PIN))  # مقداردهی اولیه ADC برای پتانسیومتر متصل به POT_PIN
+potentiometer = SpeedInput(POT_PIN, POT_SAMPLE_HZ, POT_OVERSAMPLE, POT_HYSTERESIS)  # نمونه‌برداری ADC در پس‌زمینه، میانگین‌گیری و هیسترزیس؛ وظیفه potentiometer.run() در main() اجرا می‌شود
 
 def read_potentiometer():  # تعریف تابعی برای خواندن مقدار پتانسیومتر
     """مقدار پتانسیومتر را خوانده و مقداری بین 0 تا 65535 برای PWM برمی‌گرداند."""  # توضیح عملکرد تابع
-    pot_value = potentiometer.read_u16()  # خواندن مقدار خام ADC از پتانسیومتر (بین 0 تا 65535)
-    return pot_value  # بازگرداندن مقدار خوانده‌شده
+    return potentiometer.read()  # مقدار ذخیره‌شده (میانگین نمونه‌های اخیر) بدون دسترسی به ADC
 
 # -------------------------------
 # تابع کمکی: اعمال منطقه مرده به یک مقدار
@@ -139,59 +137,58 @@ def apply_dead_zone(value, threshold):  # تعریف تابعی برای اعم
 # -------------------------------
 # توابع حرکت غیرهمزمان
 # -------------------------------
+def apply_action(action, duty1=0, duty2=0):  # تعریف تابع کمکی برای اعمال یک حرکت روی موتورها (گام‌های مانور هم از همین تابع استفاده می‌کنند)
+    """حرکت را اعمال می‌کند و فقط هنگام تغییر حرکت صدای آن را پخش می‌کند."""  # توضیح عملکرد تابع
+    changed = motors.apply(action, duty1, duty2)  # نوشتن فقط پین‌ها و duty هایی که تغییر کرده‌اند؛ True یعنی حرکت عوض شده است
+    sonar.set_speed(motors.target_speed())  # نرخ فاصله‌سنجی متناسب با سرعت فرمان‌داده‌شده (نه duty فعلی که با MOTOR_SLEW هنوز صفر است): سریع‌تر از همان لحظه شروع حرکت، کند هنگام توقف
+    if changed:  # فقط در صورت تغییر حرکت
+        log.info("motion", "Action: %s", action)  # ثبت و چاپ حرکت جدید (فقط در لحظه تغییر)
+        play_sound(action)  # پخش صدای حرکت فقط در لحظه تغییر حرکت (نه در هر دور حلقه)
+
+def pause_motors():  # تعریف تابع کمکی برای صفر کردن موقت خروجی‌ها در میان یک مانور
+    """duty موتورها را صفر می‌کند ولی حرکت جاری را نگه می‌دارد تا صدای آن دوباره پخش نشود."""  # توضیح عملکرد تابع
+    motors.pause()  # صفر کردن duty هر دو موتور؛ حرکت جاری (مثلا "backward") تغییر نمی‌کند
+    # نرخ فاصله‌سنجی پالس حفظ می‌شود: خودرو میان پالس‌ها هنوز در حال عقب‌رفت است
+
+def drive(action, duty1=0, duty2=0):  # تعریف تابع کمکی برای دستورهای حلقه کنترل
+    """مانور در حال اجرا را لغو می‌کند (دستور جدیدتر برنده است) و حرکت را اعمال می‌کند."""  # توضیح عملکرد تابع
+    manoeuvres.cancel()  # لغو مانور جاری، مثلا پالس عقب‌رفت هنگام تشخیص مانع یا تغییر جهت
+    apply_action(action, duty1, duty2)  # اعمال حرکت در همین دور حلقه
+
+def drive_mixed(left, right):  # تعریف تابع کمکی برای اعمال سرعت علامت‌دار هر چرخ (حالت تناسبی)
+    """سرعت‌های علامت‌دار چپ و راست را اعمال می‌کند و فقط هنگام تغییر جهت چرخ‌ها صدا پخش می‌کند."""  # توضیح عملکرد تابع
+    manoeuvres.cancel()  # لغو مانور جاری (دستور جدیدتر برنده است)
+    changed = motors.drive(left, right)  # مقدار مثبت: جلو، منفی: عقب؛ فقط خروجی‌های تغییرکرده نوشته می‌شوند
+    sonar.set_speed(motors.target_speed())  # نرخ فاصله‌سنجی متناسب با سرعت فرمان‌داده‌شده
+    if changed:  # جهت چرخش چرخ‌ها (نام حرکت) عوض شده است
+        log.info("motion", "Action: %s", motors.action)  # ثبت و چاپ نام حرکت جدید
+        play_sound(motors.action)  # پخش صدای حرکت جدید
+
 async def stop_motors():  # تعریف تابع غیرهمزمان برای توقف تمامی موتورها
-    motor_1_forward.value(0)  # پایین آوردن پین حرکت رو به جلو موتور ۱
-    motor_1_backward.value(0)  # پایین آوردن پین حرکت به عقب موتور ۱
-    motor_2_forward.value(0)  # پایین آوردن پین حرکت رو به جلو موتور ۲
-    motor_2_backward.value(0)  # پایین آوردن پین حرکت به عقب موتور ۲
-    motor_1_pwm.duty_u16(0)  # تنظیم duty cycle موتور ۱ به 0 برای توقف
-    motor_2_pwm.duty_u16(0)  # تنظیم duty cycle موتور ۲ به 0 برای توقف
-    await play_sound("stop")  # پخش صدای توقف
+    drive("stop")  # پایین آوردن پین‌های جهت و صفر کردن duty هر دو موتور (در صورت نیاز) و پخش صدای توقف
 
 async def move_forward():  # تعریف تابع غیرهمزمان برای حرکت به جلو
-    motor_1_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور ۱
-    motor_1_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور ۱
-    motor_2_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور ۲
-    motor_2_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور ۲
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۱ بر اساس مقدار پتانسیومتر
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۲ بر اساس مقدار پتانسیومتر
-    await play_sound("forward")  # پخش صدای حرکت به جلو
+    drive("forward", speed, speed)  # هر دو موتور رو به جلو با سرعت پتانسیومتر
 
 async def move_backward():  # تعریف تابع غیرهمزمان برای حرکت به عقب
-    motor_1_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور ۱
-    motor_1_backward.value(1)  # بالا بردن پین حرکت به عقب موتور ۱
-    motor_2_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور ۲
-    motor_2_backward.value(1)  # بالا بردن پین حرکت به عقب موتور ۲
+    if manoeuvres.active("pulse_back"):  # پالس قبلی هنوز در حال اجراست
+        return  # ادامه همان پالس؛ حلقه کنترل بدون انتظار به دور بعد می‌رود
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۱ بر اساس مقدار پتانسیومتر
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۲ بر اساس مقدار پتانسیومتر
-    await play_sound("backward")  # پخش صدای حرکت به عقب
-    await asyncio.sleep(0.2)  # انتظار به مدت 0.2 ثانیه
-    await stop_motors()  # توقف موتورها پس از حرکت به عقب
-    await asyncio.sleep(0.2)  # انتظار به مدت 0.2 ثانیه پس از توقف
+    manoeuvres.start("pulse_back", (  # شروع پالس عقب‌رفت با مهلت‌های زمانی به جای sleep
+        (apply_action, ("backward", speed, speed), BACK_PULSE_MS),  # هر دو موتور به عقب با سرعت پتانسیومتر (فورا اعمال می‌شود)
+        (pause_motors, (), BACK_PAUSE_MS),  # توقف موتورها پس از حرکت به عقب؛ حرکت جاری "backward" می‌ماند تا صدای آن در پالس بعد تکرار نشود
+    ))
 
 async def turn_right():  # تعریف تابع غیرهمزمان برای چرخش در محل به سمت راست
-    # چرخش پیکانی برای چرخش در محل: استفاده از ملودی "right"
-    motor_1_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور ۱ برای چرخش
-    motor_1_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور ۱
-    motor_2_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور ۲
-    motor_2_backward.value(1)  # بالا بردن پین حرکت به عقب موتور ۲ برای چرخش
+    # چرخش پیکانی برای چرخش در محل: موتور چپ به جلو و موتور راست به عقب
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۱ بر اساس مقدار پتانسیومتر
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۲ بر اساس مقدار پتانسیومتر
-    await play_sound("right")  # پخش صدای چرخش به راست
+    drive("right", speed, speed)  # اعمال چرخش به راست و پخش صدای "right" در صورت تغییر حرکت
 
 async def turn_left():  # تعریف تابع غیرهمزمان برای چرخش در محل به سمت چپ
-    # چرخش پیکانی برای چرخش در محل: استفاده از ملودی "left"
-    motor_1_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور ۱
-    motor_1_backward.value(1)  # بالا بردن پین حرکت به عقب موتور ۱ برای چرخش
-    motor_2_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور ۲ برای چرخش
-    motor_2_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور ۲
+    # چرخش پیکانی برای چرخش در محل: موتور چپ به عقب و موتور راست به جلو
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۱ بر اساس مقدار پتانسیومتر
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور ۲ بر اساس مقدار پتانسیومتر
-    await play_sound("left")  # پخش صدای چرخش به چپ
+    drive("left", speed, speed)  # اعمال چرخش به چپ و پخش صدای "left" در صورت تغییر حرکت
 
 # --- توابع حرکت مورب ---
 async def move_northeast():  # تعریف تابع غیرهمزمان برای حرکت مورب به سمت شمال شرقی
@@ -199,77 +196,66 @@ async def move_northeast():  # تعریف تابع غیرهمزمان برای 
     حرکت به جلو همراه با کمی چرخش به راست.
     موتور چپ با سرعت کامل و موتور راست با سرعت کاهش‌یافته کار می‌کند.
     """  # توضیح عملکرد حرکت مورب شمال شرقی
-    motor_1_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور چپ
-    motor_1_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور چپ
-    motor_2_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور راست
-    motor_2_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور راست
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور چپ به سرعت کامل
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))  # تنظیم duty cycle موتور راست به سرعت کاهش‌یافته
-    await play_sound("northeast")  # پخش صدای حرکت شمال شرقی
+    drive("northeast", speed, int(speed * DIAGONAL_FACTOR))  # موتور چپ با سرعت کامل، موتور راست با سرعت کاهش‌یافته
 
 async def move_northwest():  # تعریف تابع غیرهمزمان برای حرکت مورب به سمت شمال غربی
     """
     حرکت به جلو همراه با کمی چرخش به چپ.
     موتور راست با سرعت کامل و موتور چپ با سرعت کاهش‌یافته کار می‌کند.
     """  # توضیح عملکرد حرکت مورب شمال غربی
-    motor_1_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور چپ
-    motor_1_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور چپ
-    motor_2_forward.value(1)  # بالا بردن پین حرکت رو به جلو موتور راست
-    motor_2_backward.value(0)  # پایین نگه داشتن پین حرکت به عقب موتور راست
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))  # تنظیم duty cycle موتور چپ به سرعت کاهش‌یافته
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور راست به سرعت کامل
-    await play_sound("northwest")  # پخش صدای حرکت شمال غربی
+    drive("northwest", int(speed * DIAGONAL_FACTOR), speed)  # موتور چپ با سرعت کاهش‌یافته، موتور راست با سرعت کامل
 
 async def move_southeast():  # تعریف تابع غیرهمزمان برای حرکت مورب به سمت جنوب شرقی
     """
     حرکت به عقب همراه با کمی چرخش به راست.
     موتور چپ با سرعت کامل و موتور راست با سرعت کاهش‌یافته کار می‌کند.
     """  # توضیح عملکرد حرکت مورب جنوب شرقی
-    motor_1_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور چپ
-    motor_1_backward.value(1)  # بالا بردن پین حرکت به عقب موتور چپ برای حرکت به عقب
-    motor_2_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور راست
-    motor_2_backward.value(1)  # بالا بردن پین حرکت به عقب موتور راست برای حرکت به عقب
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(speed)  # تنظیم duty cycle موتور چپ به سرعت کامل (حرکت به عقب)
-    motor_2_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))  # تنظیم duty cycle موتور راست به سرعت کاهش‌یافته
-    await play_sound("southeast")  # پخش صدای حرکت جنوب شرقی
+    drive("southeast", speed, int(speed * DIAGONAL_FACTOR))  # موتور چپ با سرعت کامل (به عقب)، موتور راست با سرعت کاهش‌یافته
 
 async def move_southwest():  # تعریف تابع غیرهمزمان برای حرکت مورب به سمت جنوب غربی
     """
     حرکت به عقب همراه با کمی چرخش به چپ.
     موتور راست با سرعت کامل و موتور چپ با سرعت کاهش‌یافته کار می‌کند.
     """  # توضیح عملکرد حرکت مورب جنوب غربی
-    motor_1_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور چپ
-    motor_1_backward.value(1)  # بالا بردن پین حرکت به عقب موتور چپ برای حرکت به عقب
-    motor_2_forward.value(0)  # پایین نگه داشتن پین حرکت رو به جلو موتور راست
-    motor_2_backward.value(1)  # بالا بردن پین حرکت به عقب موتور راست برای حرکت به عقب
     speed = read_potentiometer()  # خواندن مقدار سرعت از پتانسیومتر
-    motor_1_pwm.duty_u16(int(speed * DIAGONAL_FACTOR))  # تنظیم duty cycle موتور چپ به سرعت کاهش‌یافته
-    motor_2_pwm.duty_u16(speed)  # تنظیم duty cycle موتور راست به سرعت کامل
-    await play_sound("southwest")  # پخش صدای حرکت جنوب غربی
+    drive("southwest", int(speed * DIAGONAL_FACTOR), speed)  # موتور چپ با سرعت کاهش‌یافته، موتور راست با سرعت کامل (به عقب)
 
 # ===============================
 # حلقه اصلی (غیرهمزمان)
 # ===============================
 async def main():  # تعریف تابع اصلی غیرهمزمان برای حلقه کنترل
     smoothed_pitch, smoothed_roll, smoothed_yaw = None, None, None  # مقداردهی اولیه مقادیر صاف‌شده سنسور به None
+    asyncio.create_task(sonar.run())  # شروع وظیفه فاصله‌سنجی؛ حلقه کنترل فقط مقدار ذخیره‌شده را می‌خواند
+    asyncio.create_task(motors.run())  # شروع وظیفه شیب‌دهی PWM؛ حلقه کنترل فقط duty هدف را تعیین می‌کند و منتظر نمی‌ماند
+    asyncio.create_task(buzzer.run())  # شروع وظیفه پخش ملودی؛ توابع حرکت فقط درخواست پخش را ثبت می‌کنند
+    asyncio.create_task(potentiometer.run())  # شروع وظیفه نمونه‌برداری پتانسیومتر؛ توابع حرکت فقط مقدار ذخیره‌شده را می‌خوانند
+    asyncio.create_task(manoeuvres.run())  # شروع وظیفه اجرای گام‌های مانورها در مهلت‌هایشان
+    imu_stream = GY25_data.start_stream()  # شروع وظیفه غیرهمزمان خواندن سنسور با نرخ ثابت (GY25_data.STREAM_RATE_HZ)
+    async for sample in imu_stream.stream():  # انتظار (غیرمسدودکننده) برای اولین نمونه
+        break
 
     while True:  # شروع حلقه بی‌نهایت برای خواندن مداوم داده‌های حسگر و کنترل موتورها
-        distance = get_distance()  # دریافت فاصله از سنسور اولتراسونیک
-        if distance is not None and distance < 20:  # اگر فاصله معتبر بوده و کمتر از 20 سانتی‌متر باشد
-            print("Obstacle detected! Distance: {:.1f} cm. Stopping motors.".format(distance))  # چاپ پیام هشدار درباره مانع
+        await control_rate.tick()  # انتظار تا مهلت بعدی (هر LOOP_PERIOD ثانیه، مستقل از مدت اجرای دور قبل)؛ آمار در control_rate.stats()
+        distance, confidence = get_distance()  # دریافت فاصله فیلترشده و اطمینان آن از وظیفه فاصله‌سنجی
+        if confidence == 0:  # اندازه‌گیری تازه‌ای وجود ندارد: وضعیت جلوی خودرو نامعلوم است
+            log.warning("main", "Sonar stale: %s", sonar.stats())  # ثبت شمارنده‌های فاصله‌سنج (تکرار در دورهای متوالی فقط حدود یک بار در ثانیه چاپ می‌شود)
+            await stop_motors()  # توقف ایمن به جای فرض خالی بودن مسیر
+            continue  # رد کردن این دور حلقه (دور بعد در مهلت بعدی زمان‌بند اجرا می‌شود)
+        if distance is not None and distance < OBSTACLE_DISTANCE:  # اگر میانه فاصله‌ها کمتر از OBSTACLE_DISTANCE باشد (یک پژواک کاذب یا گم‌شده نتیجه را تغییر نمی‌دهد)
+            log.warning("main", "Obstacle detected! Distance: %.1f cm (confidence %.2f). Stopping motors.", distance, confidence)  # ثبت هشدار مانع (رشته فقط هنگام چاپ ساخته می‌شود)
             await stop_motors()  # توقف فوری موتورها در صورت تشخیص مانع
-            await asyncio.sleep(0.1)  # انتظار به مدت 0.1 ثانیه قبل از ادامه حلقه
-            continue  # رد کردن بقیه دستورات این دور حلقه در صورت تشخیص مانع
+            continue  # رد کردن بقیه دستورات این دور حلقه در صورت تشخیص مانع (دور بعد در مهلت بعدی زمان‌بند اجرا می‌شود)
 
-        try:  # تلاش برای خواندن داده‌های حسگر از GY25
-            pitch, roll, yaw = GY25_data.main()  # دریافت مقادیر pitch، roll و yaw از تابع main در ماژول GY25_data
-        except Exception as e:  # در صورت بروز خطا در خواندن داده‌های حسگر
-            print("Error reading sensor data:", e)  # چاپ پیام خطا
-            await asyncio.sleep(0.1)  # انتظار به مدت 0.1 ثانیه قبل از تلاش مجدد
-            continue  # رد کردن این دور حلقه در صورت خطا
+        sample = imu_stream.latest()  # تازه‌ترین نمونه (زمان، pitch، roll، yaw) بدون انتظار برای سنسور
+        age = imu_stream.age_ms()  # عمر تازه‌ترین نمونه (میلی‌ثانیه)
+        if sample is None or age > GY25_data.IMU_MAX_AGE_MS:  # نمونه‌ای نیست یا کهنه است: سنسور قطع است یا مدارشکن (circuit breaker) باز است
+            log.warning("main", "Sensor stale: %s ms %s", age, GY25_data.sensor_stats())  # ثبت عمر نمونه، شمارنده‌های خطا و وضعیت مدارشکن
+            await stop_motors()  # توقف ایمن به جای ادامه حرکت قبلی
+            continue  # رد کردن این دور حلقه (دور بعد در مهلت بعدی زمان‌بند اجرا می‌شود)
+        stamp, pitch, roll, yaw = sample  # استخراج مقادیر pitch، roll و yaw از نمونه
 
         if smoothed_pitch is None:  # اگر اولین بار است و داده‌های صاف‌شده مقداردهی نشده‌اند
             smoothed_pitch, smoothed_roll, smoothed_yaw = pitch, roll, yaw  # مقداردهی اولیه داده‌های صاف‌شده با مقادیر خوانده‌شده
@@ -278,45 +264,52 @@ async def main():  # تعریف تابع اصلی غیرهمزمان برای ح
             smoothed_roll = SMOOTHING_ALPHA * roll + (1 - SMOOTHING_ALPHA) * smoothed_roll  # صاف‌سازی مقدار roll
             smoothed_yaw = SMOOTHING_ALPHA * yaw + (1 - SMOOTHING_ALPHA) * smoothed_yaw  # صاف‌سازی مقدار yaw
 
+        if DRIVE_MODE == "proportional":  # حالت تناسبی: نگاشت پیوسته زاویه به سرعت هر چرخ به جای نُه حرکت گسسته
+            left, right = mixer.mix(smoothed_pitch, smoothed_roll, read_potentiometer())  # چند جستجوی جدول و عمل صحیح
+            drive_mixed(left, right)  # اعمال سرعت‌ها روی موتورها
+            continue  # ادامه در مهلت بعدی زمان‌بند
+
         # اعمال منطقه مرده به هر محور به‌طور جداگانه
         pitch_effective = apply_dead_zone(smoothed_pitch, THRESHOLD_ANGLE)  # اعمال منطقه مرده به مقدار صاف‌شده pitch
         roll_effective = apply_dead_zone(smoothed_roll, THRESHOLD_ANGLE)  # اعمال منطقه مرده به مقدار صاف‌شده roll
 
         # تصمیم‌گیری بر اساس مقادیر موثر (پس از اعمال منطقه مرده)
         if pitch_effective == 0 and roll_effective == 0:  # اگر هر دو مقدار pitch و roll در منطقه مرده باشند
-            print("Action: Stopping (Dead Zone)")  # چاپ پیام توقف به دلیل منطقه مرده
+            log.debug("main", "Action: Stopping (Dead Zone)")  # ثبت پیام توقف به دلیل منطقه مرده در بافر حلقوی (بدون چاپ)
             await stop_motors()  # توقف تمامی موتورها
         # حرکات مورب (هر دو محور غیر صفر)
         elif pitch_effective > 0 and roll_effective > 0:  # اگر هر دو مقدار pitch و roll مثبت باشند (حرکت مورب به شمال شرقی)
-            print("Action: Moving Northeast")  # چاپ پیام حرکت به سمت شمال شرقی
+            log.debug("main", "Action: Moving Northeast")  # ثبت پیام حرکت به سمت شمال شرقی در بافر حلقوی (بدون چاپ)
             await move_northeast()  # اجرای تابع حرکت مورب به شمال شرقی
         elif pitch_effective > 0 and roll_effective < 0:  # اگر pitch مثبت و roll منفی باشد (حرکت مورب به شمال غربی)
-            print("Action: Moving Northwest")  # چاپ پیام حرکت به سمت شمال غربی
+            log.debug("main", "Action: Moving Northwest")  # ثبت پیام حرکت به سمت شمال غربی در بافر حلقوی (بدون چاپ)
             await move_northwest()  # اجرای تابع حرکت مورب به شمال غربی
         elif pitch_effective < 0 and roll_effective > 0:  # اگر pitch منفی و roll مثبت باشد (حرکت مورب به جنوب شرقی)
-            print("Action: Moving Southeast")  # چاپ پیام حرکت به سمت جنوب شرقی
+            log.debug("main", "Action: Moving Southeast")  # ثبت پیام حرکت به سمت جنوب شرقی در بافر حلقوی (بدون چاپ)
             await move_southeast()  # اجرای تابع حرکت مورب به جنوب شرقی
         elif pitch_effective < 0 and roll_effective < 0:  # اگر هر دو مقدار pitch و roll منفی باشند (حرکت مورب به جنوب غربی)
-            print("Action: Moving Southwest")  # چاپ پیام حرکت به سمت جنوب غربی
+            log.debug("main", "Action: Moving Southwest")  # ثبت پیام حرکت به سمت جنوب غربی در بافر حلقوی (بدون چاپ)
             await move_southwest()  # اجرای تابع حرکت مورب به جنوب غربی
         # حرکات ساده در صورت فعال بودن تنها یک محور
         elif pitch_effective > 0:  # اگر فقط مقدار pitch مثبت باشد (حرکت به جلو)
-            print("Action: Moving forward")  # چاپ پیام حرکت به جلو
+            log.debug("main", "Action: Moving forward")  # ثبت پیام حرکت به جلو در بافر حلقوی (بدون چاپ)
             await move_forward()  # اجرای تابع حرکت به جلو
         elif pitch_effective < 0:  # اگر فقط مقدار pitch منفی باشد (حرکت به عقب)
-            print("Action: Moving backward")  # چاپ پیام حرکت به عقب
+            log.debug("main", "Action: Moving backward")  # ثبت پیام حرکت به عقب در بافر حلقوی (بدون چاپ)
             await move_backward()  # اجرای تابع حرکت به عقب
         elif roll_effective > 0:  # اگر فقط مقدار roll مثبت باشد (چرخش به راست)
-            print("Action: Turning right")  # چاپ پیام چرخش به راست
+            log.debug("main", "Action: Turning right")  # ثبت پیام چرخش به راست در بافر حلقوی (بدون چاپ)
             await turn_right()  # اجرای تابع چرخش به راست
         elif roll_effective < 0:  # اگر فقط مقدار roll منفی باشد (چرخش به چپ)
-            print("Action: Turning left")  # چاپ پیام چرخش به چپ
+            log.debug("main", "Action: Turning left")  # ثبت پیام چرخش به چپ در بافر حلقوی (بدون چاپ)
             await turn_left()  # اجرای تابع چرخش به چپ
         else:  # حالت پیش‌فرض (اغلب رخ نمی‌دهد)
-            print("Action: Stopping")  # چاپ پیام توقف
+            log.debug("main", "Action: Stopping")  # ثبت پیام توقف در بافر حلقوی (بدون چاپ)
             await stop_motors()  # توقف تمامی موتورها
-        
-        await asyncio.sleep(0.05)  # انتظار به مدت 0.05 ثانیه قبل از شروع دور بعدی حلقه
 
 if __name__ == '__main__':  # بررسی اینکه آیا اسکریپت به عنوان ماژول اصلی اجرا شده است
-    asyncio.run(main())  # اجرای حلقه اصلی غیرهمزمان با استفاده از asyncio.run
+    try:
+        asyncio.run(main())  # اجرای حلقه اصلی غیرهمزمان با استفاده از asyncio.run
+    except KeyboardInterrupt:  # توقف با Ctrl-C
+        log.dump()  # چاپ آخرین پیام‌های بافر حلقوی (شامل پیام‌های اشکال‌زدایی) برای بررسی رخدادهای قبل از توقف
+        print("Log:", log.stats())  # چاپ شمارنده‌های ثبت‌کننده
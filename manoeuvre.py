@@ -0,0 +1,124 @@
+# Non-blocking timed manoeuvres.
+#
+# A manoeuvre is a short sequence of timed steps: pulse backward for 200 ms and pause
+# for 200 ms, spin for N ms, ... Each step is (fn, args, ms): fn(*args) sets the
+# outputs and the step lasts ms. start() runs the first step at once and returns; the
+# next steps run when their deadlines pass, from run() (an asyncio task) or poll()
+# (called once per tick by a blocking loop). The control loop keeps deciding every
+# tick instead of sleeping through the manoeuvre, and a newer command preempts it:
+# start() replaces a running manoeuvre and cancel() drops it, so an obstacle stop or a
+# new direction takes effect in the same tick.
+#
+#     manoeuvres = Manoeuvres()
+#     asyncio.create_task(manoeuvres.run())
+#     if not manoeuvres.active("pulse_back"):
+#         manoeuvres.start("pulse_back", ((drive, ("backward", speed, speed), 200),
+#                                         (pause, (), 200)))
+#     ...
+#     manoeuvres.cancel()        # before any other command
+#
+# Deadlines are absolute (a step ends at the previous end plus its duration), so late
+# polling does not stretch the sequence. Steps whose time passed entirely while nobody
+# polled are skipped, except the last one, so the outputs always end in the state the
+# manoeuvre leaves them in. The outputs are not touched when a manoeuvre ends or is
+# cancelled; whoever preempts it sets them.
+
+import uasyncio as asyncio
+from time import ticks_ms, ticks_diff, ticks_add
+
+_POLL_MS = 10            # longest sleep of run() while a manoeuvre is active
+
+
+class Manoeuvres(object):
+    def __init__(self):
+        self.name = None         # running manoeuvre, None when idle
+        self._steps = None
+        self._index = 0          # step currently applied
+        self._due = 0            # ticks_ms at which that step ends
+        self._wake = asyncio.Event()
+        self.started = 0
+        self.completed = 0
+        self.preempted = 0       # replaced by start() or dropped by cancel() before the end
+        self.max_late_ms = 0     # worst delay of a step change behind its deadline
+        self.running = False
+
+    # Starts `steps` under `name`, replacing any running manoeuvre; the first step is
+    # applied before returning.
+    def start(self, name, steps):
+        if self.name is not None:
+            self.preempted += 1
+        self.name = name
+        self._steps = steps
+        self._index = 0
+        self.started += 1
+        fn, args, ms = steps[0]
+        self._due = ticks_add(ticks_ms(), ms)
+        fn(*args)
+        self._wake.set()
+
+    # True while a manoeuvre (or the one called `name`) is running.
+    def active(self, name=None):
+        if name is None:
+            return self.name is not None
+        return self.name == name
+
+    def cancel(self):
+        if self.name is None:
+            return False
+        self.preempted += 1
+        self.name = None
+        self._steps = None
+        return True
+
+    # Applies the step that is due now; for blocking loops (once per tick) and run().
+    def poll(self):
+        steps = self._steps
+        if steps is None:
+            return
+        now = ticks_ms()
+        late = ticks_diff(now, self._due)
+        if late < 0:
+            return
+        if late > self.max_late_ms:
+            self.max_late_ms = late
+        index = self._index
+        last = len(steps) - 1
+        due = self._due
+        # Skip the steps whose window already passed; the last one always runs
+        while index < last:
+            index += 1
+            due = ticks_add(due, steps[index][2])
+            if ticks_diff(now, due) < 0:
+                break
+        if index != self._index:
+            self._index = index
+            fn, args, ms = steps[index]
+            fn(*args)
+            if ticks_diff(now, due) < 0:
+                self._due = due
+                return
+        self.name = None
+        self._steps = None
+        self.completed += 1
+
+    # Runs the step changes on time: sleeps until the next deadline (at most _POLL_MS,
+    # so a preempting start() with an earlier deadline is not missed) and waits on an
+    # event while idle.
+    async def run(self):
+        self.running = True
+        try:
+            while True:
+                if self._steps is None:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+                wait = ticks_diff(self._due, ticks_ms())
+                if wait > 0:
+                    await asyncio.sleep(min(wait, _POLL_MS) / 1000)
+                self.poll()
+        finally:
+            self.running = False
+
+    def stats(self):
+        return {"active": self.name, "started": self.started, "completed": self.completed,
+                "preempted": self.preempted, "max_late_ms": self.max_late_ms}
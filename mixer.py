@@ -0,0 +1,67 @@
+# Proportional differential-drive mixer.
+#
+# Maps the (filtered) tilt continuously to a signed duty per motor instead of the nine
+# discrete actions: pitch gives the throttle, roll the steering, each through an expo
+# curve (fine control near level, full output at full_angle), and the two are mixed
+#     left = throttle + steering,  right = throttle - steering
+# with saturation at full duty. Reversing steers like the discrete southeast/southwest
+# moves (the outer wheel is the faster one). The curves are precomputed per whole
+# degree into integer tables, so mix() is a few table lookups, adds and shifts:
+#
+#     mixer = Mixer(dead_zone=10, full_angle=45)
+#     left, right = mixer.mix(pitch, roll, 65535)    # -65535 .. 65535 each
+
+from array import array
+
+_ONE = 1024      # table full scale (fixed point, 10 bits)
+_SHIFT = 10
+
+
+def _curve(dead_zone, full_angle, expo, gain):
+    # Table index: whole degrees 0..full_angle; value 0.._ONE
+    table = array("h", [0] * (full_angle + 1))
+    span = full_angle - dead_zone
+    for deg in range(dead_zone, full_angle + 1):
+        x = (deg - dead_zone + 1) / (span + 1)
+        y = (1 - expo) * x + expo * x * x * x
+        table[deg] = int(y * gain * _ONE + 0.5)
+    return table
+
+
+class Mixer(object):
+    def __init__(self, dead_zone=10, full_angle=45, throttle_expo=0.3, steer_expo=0.5, steer_gain=1.0):
+        if not 0 <= dead_zone < full_angle:
+            raise ValueError("need 0 <= dead_zone < full_angle")
+        self.full_angle = full_angle
+        self.throttle = _curve(dead_zone, full_angle, throttle_expo, 1.0)
+        self.steer = _curve(dead_zone, full_angle, steer_expo, steer_gain)
+
+    # Signed duties (left, right) for pitch/roll in degrees, scaled to max_duty.
+    def mix(self, pitch, roll, max_duty=65535):
+        full = self.full_angle
+        p = int(pitch)
+        if p >= 0:
+            t = self.throttle[p if p < full else full]
+        else:
+            t = -self.throttle[-p if -p < full else full]
+        r = int(roll)
+        if r >= 0:
+            s = self.steer[r if r < full else full]
+        else:
+            s = -self.steer[-r if -r < full else full]
+        if t < 0:
+            s = -s
+        left = t + s
+        right = t - s
+        if left > _ONE:
+            left = _ONE
+        elif left < -_ONE:
+            left = -_ONE
+        if right > _ONE:
+            right = _ONE
+        elif right < -_ONE:
+            right = -_ONE
+        # Scale the magnitudes so both directions round the same way
+        left = (left * max_duty) >> _SHIFT if left >= 0 else -((-left * max_duty) >> _SHIFT)
+        right = (right * max_duty) >> _SHIFT if right >= 0 else -((-right * max_duty) >> _SHIFT)
+        return left, right
@@ -0,0 +1,207 @@
+# State-change-only driver for the two L298 motor channels.
+#
+# The control loops decide an action every tick, but the decision is usually the same
+# as in the previous tick. Motors keeps a shadow copy of the four direction pins and
+# both PWM duties and only writes an output whose value actually changes; apply()
+# reports whether the action itself changed, so callers play the movement sound (or
+# log) once per transition instead of once per tick.
+#
+#     motors = Motors(4, 5, 6, 7, 8, 9)
+#     if motors.apply("forward", speed, speed):
+#         play_sound("forward")
+#
+# drive() takes signed duties per motor instead (see mixer.Mixer) and names the action
+# from the direction of the two wheels.
+#
+# With slew set, the commanded duties become targets and run(), an asyncio task, moves
+# the actual duties towards them by at most `slew` duty units per second. Speeding up is
+# always ramped; slowing down is immediate unless slew_down is given, so an obstacle
+# stop is never delayed. A reversal passes through zero duty (both direction pins low)
+# for at least one step before the opposite direction is ramped up. The control loop
+# only sets targets and never waits for the ramp.
+#
+#     motors = Motors(4, 5, 6, 7, 8, 9, slew=262140)    # 0 -> full duty in 250 ms
+#     asyncio.create_task(motors.run())
+
+import uasyncio as asyncio
+from machine import Pin, PWM
+from time import ticks_ms, ticks_diff
+
+# Direction pins (IN1, IN2, IN3, IN4) per action; motor 1 is the left one
+DIRECTIONS = {
+    "stop": (0, 0, 0, 0),
+    "forward": (1, 0, 1, 0),
+    "backward": (0, 1, 0, 1),
+    "right": (1, 0, 0, 1),
+    "left": (0, 1, 1, 0),
+    "northeast": (1, 0, 1, 0),
+    "northwest": (1, 0, 1, 0),
+    "southeast": (0, 1, 0, 1),
+    "southwest": (0, 1, 0, 1),
+}
+
+# Action named by the wheel directions for drive(), indexed (sign(left) + 1) * 3 + sign(right) + 1
+_SIGN_ACTIONS = (
+    "backward", "southeast", "left",       # left wheel backward
+    "southwest", "stop", "northwest",      # left wheel stopped
+    "right", "northeast", "forward",       # left wheel forward
+)
+
+
+class Motors(object):
+    def __init__(self, in1, in2, in3, in4, ena, enb, freq=1000, slew=None, slew_down=None, step_ms=10):
+        self.pins = [Pin(p, Pin.OUT) for p in (in1, in2, in3, in4)]
+        self.pwms = [PWM(Pin(ena)), PWM(Pin(enb))]
+        for pwm in self.pwms:
+            pwm.freq(freq)
+        self.slew = slew             # duty units per second while speeding up, None: no ramp
+        self.slew_down = slew_down   # duty units per second while slowing down, None: immediate
+        self.step_ms = step_ms
+        # Signed duties (positive = forward): what the caller asked for and what is applied
+        self.target = [0, 0]
+        self.current = [0, 0]
+        # Shadow state; None forces the first write of every output
+        self._levels = [None, None, None, None]
+        self._duties = [None, None]
+        self.action = None
+        self.transitions = 0     # action changes
+        self.written = 0         # pin/PWM writes issued
+        self.suppressed = 0      # writes skipped because the output already had the value
+        self.running = False
+        self._write(0, 0)
+
+    # Writes signed duties to the direction pins and PWM channels, skipping unchanged outputs.
+    def _write(self, left, right):
+        shadow = self._levels
+        pins = self.pins
+        i = 0
+        for duty in (left, right):
+            for level in (1 if duty > 0 else 0, 1 if duty < 0 else 0):
+                if shadow[i] != level:
+                    pins[i].value(level)
+                    shadow[i] = level
+                    self.written += 1
+                else:
+                    self.suppressed += 1
+                i += 1
+        shadow = self._duties
+        for i, duty in ((0, left), (1, right)):
+            if duty < 0:
+                duty = -duty
+            if shadow[i] != duty:
+                self.pwms[i].duty_u16(duty)
+                shadow[i] = duty
+                self.written += 1
+            else:
+                self.suppressed += 1
+
+    # Sets new targets; without a ramp they are written at once, with one only the
+    # immediate part (slowing down, stopping before a reversal) is.
+    def _command(self, left, right):
+        target = self.target
+        target[0] = left
+        target[1] = right
+        if self.slew is None:
+            self.current[0] = left
+            self.current[1] = right
+        else:
+            down = None if self.slew_down is None else 0
+            self.current[0] = _advance(self.current[0], left, 0, down)
+            self.current[1] = _advance(self.current[1], right, 0, down)
+        self._write(self.current[0], self.current[1])
+
+    def _transition(self, action):
+        if action == self.action:
+            return False
+        self.action = action
+        self.transitions += 1
+        return True
+
+    # Drives `action` (a DIRECTIONS key) with the given duty_u16 per motor.
+    # Returns True if the action differs from the previous one.
+    def apply(self, action, duty1=0, duty2=0):
+        levels = DIRECTIONS[action]
+        self._command(duty1 * (levels[0] - levels[1]), duty2 * (levels[2] - levels[3]))
+        return self._transition(action)
+
+    # Drives signed duties (-65535..65535, positive = forward) for the left and right
+    # motor. Returns True if the direction pattern (the action name) changed.
+    def drive(self, left, right):
+        self._command(left, right)
+        sl = (left > 0) - (left < 0)
+        sr = (right > 0) - (right < 0)
+        return self._transition(_SIGN_ACTIONS[(sl + 1) * 3 + sr + 1])
+
+    def stop(self):
+        return self.apply("stop")
+
+    # Zeroes the outputs but keeps the current action, for pulsed manoeuvres: the next
+    # apply() of the same action restores the outputs without counting a transition.
+    def pause(self):
+        self._command(0, 0)
+
+    # Moves the applied duties towards the targets for dt_ms of ramp time. Returns True
+    # while a target has not been reached yet.
+    def step(self, dt_ms):
+        current = self.current
+        target = self.target
+        if current[0] == target[0] and current[1] == target[1]:
+            return False
+        up = self.slew * dt_ms // 1000
+        down = None if self.slew_down is None else self.slew_down * dt_ms // 1000
+        current[0] = _advance(current[0], target[0], up, down)
+        current[1] = _advance(current[1], target[1], up, down)
+        self._write(current[0], current[1])
+        return current[0] != target[0] or current[1] != target[1]
+
+    # Ramp task: steps every step_ms by the time actually elapsed.
+    async def run(self):
+        self.running = True
+        last = ticks_ms()
+        try:
+            while True:
+                await asyncio.sleep(self.step_ms / 1000)
+                now = ticks_ms()
+                self.step(ticks_diff(now, last))
+                last = now
+        finally:
+            self.running = False
+
+    # Current drive level 0..1: the larger applied duty (0 while paused).
+    def speed(self):
+        return max(abs(self.current[0]), abs(self.current[1])) / 65535
+
+    # Commanded drive level 0..1: the larger target duty. It leads speed() by the ramp,
+    # so it is what the car is about to do rather than what it is doing.
+    def target_speed(self):
+        return max(abs(self.target[0]), abs(self.target[1])) / 65535
+
+    # (applied left, applied right, target left, target right) signed duties, for telemetry.
+    def duties(self):
+        return self.current[0], self.current[1], self.target[0], self.target[1]
+
+    def stats(self):
+        return {"action": self.action, "transitions": self.transitions,
+                "written": self.written, "suppressed": self.suppressed,
+                "current": tuple(self.current), "target": tuple(self.target)}
+
+
+# One ramp step of a signed duty from cur towards tgt: magnitude rises by at most `up`
+# and falls by at most `down` (None: no limit). Never crosses zero in a single step.
+def _advance(cur, tgt, up, down):
+    if cur == tgt:
+        return cur
+    if cur != 0 and (tgt == 0 or (tgt > 0) != (cur > 0)):
+        # Slowing down to zero, possibly for a reversal
+        if down is None or (cur if cur > 0 else -cur) <= down:
+            return 0
+        return cur - down if cur > 0 else cur + down
+    mag = cur if cur >= 0 else -cur
+    tmag = tgt if tgt >= 0 else -tgt
+    if tmag < mag:
+        if down is None or mag - tmag <= down:
+            return tgt
+        return cur - down if cur > 0 else cur + down
+    if tmag - mag <= up:
+        return tgt
+    return cur + up if tgt > 0 else cur - up
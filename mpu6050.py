@@ -3,12 +3,14 @@
 # Original repo https://github.com/nickcoutsos/MPU-6050-Python
 # and https://github.com/CoreElectronics/CE-PiicoDev-MPU6050-MicroPython-Module
 
+from array import array
 from math import sqrt, atan2
-from machine import Pin, SoftI2C
-from time import sleep_ms
+from machine import Pin, SoftI2C, I2C, idle
+from time import sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_diff
+import ujson
+import log
 
-error_msg = "\nError \n"
-i2c_err_str = "ESP32 could not communicate with module at address 0x{:02X}, check wiring"
+i2c_err_str = "ESP32 could not communicate with module at address 0x%02X, check wiring"
 
 # Global Variables
 _GRAVITIY_MS2 = 9.80665
@@ -35,122 +37,834 @@ _GYR_RNG_500DEG = 0x08
 _GYR_RNG_1000DEG = 0x10
 _GYR_RNG_2000DEG = 0x18
 
+# Digital low-pass filter (CONFIG.DLPF_CFG), named by accelerometer bandwidth [Hz]
+_DLPF_BW_260 = 0x00
+_DLPF_BW_184 = 0x01
+_DLPF_BW_94 = 0x02
+_DLPF_BW_44 = 0x03
+_DLPF_BW_21 = 0x04
+_DLPF_BW_10 = 0x05
+_DLPF_BW_5 = 0x06
+
+# Accelerometer bandwidth [Hz] indexed by DLPF_CFG
+_DLPF_BANDWIDTH = (260, 184, 94, 44, 21, 10, 5)
+
 # MPU-6050 Registers
 _PWR_MGMT_1 = 0x6B
 
+_SMPLRT_DIV = 0x19
+_CONFIG = 0x1A
+
 _ACCEL_XOUT0 = 0x3B
 
 _TEMP_OUT0 = 0x41
 
 _GYRO_XOUT0 = 0x43
 
+# ACCEL_XOUT_H .. GYRO_ZOUT_L: accel (6) + temp (2) + gyro (6) in one burst
+_BURST_LEN = 14
+
 _ACCEL_CONFIG = 0x1C
 _GYRO_CONFIG = 0x1B
 
-# به جای 3، تعداد تلاش‌های خواندن داده به 20 تغییر یافته است.
-_maxFails = 100
+_INT_PIN_CFG = 0x37
+_INT_ENABLE = 0x38
+_INT_STATUS = 0x3A
+
+_FIFO_EN = 0x23
+_USER_CTRL = 0x6A
+_FIFO_COUNTH = 0x72
+_FIFO_R_W = 0x74
+
+# INT_ENABLE / INT_STATUS bits
+_DATA_RDY_INT = 0x01
+
+# FIFO_EN bits: accelerometer + gyro X/Y/Z (temperature not queued)
+_FIFO_ACCEL_GYRO = 0x78
+# USER_CTRL bits
+_USER_FIFO_EN = 0x40
+_USER_FIFO_RESET = 0x04
+
+# FIFO geometry: 1024-byte hardware FIFO, 12-byte frames (accel xyz, gyro xyz)
+_FIFO_SIZE = 1024
+_FIFO_FRAME = 12
+_FIFO_MAX_FRAMES = _FIFO_SIZE // _FIFO_FRAME
+
+# Delay between INT_STATUS polls while waiting for a new sample [us]
+_DRDY_POLL_US = 200
+
+# Error policy (see CircuitBreaker and MPU6050._read_into()).
+# A failed read retries with exponential backoff for at most _RETRY_BUDGET_MS, so a
+# loose wire costs the caller a bounded delay instead of seconds of retries.
+_RETRY_BUDGET_MS = 20
+_BACKOFF_START_MS = 1
+_BREAKER_THRESHOLD = 3       # consecutive failed reads that open the breaker
+_BREAKER_COOLDOWN_MS = 500   # open time before a single probe read is let through
+_WAKE_BUDGET_MS = 300        # time __init__ may spend waking the chip
+
+# Offset registers (see calibrate()). They are volatile: the values are kept in a flash
+# file and written back at boot by load_calibration().
+_XA_OFFS_H = 0x06            # accel X/Y/Z offsets, 2048 LSB/g, bit 0 reserved
+_XG_OFFS_USRH = 0x13         # gyro X/Y/Z offsets, 32.8 LSB/(deg/s)
+_ACC_OFFS_LSB_PER_G = 2048
+_GYR_OFFS_LSB_PER_DPS = 32.8
+_CAL_SAMPLES = 100
+_CAL_STILL_DPS = 1.0         # max gyro standard deviation of a stationary calibration
+_CAL_FILE = "mpu6050_cal.json"
 
 # Address
 _MPU6050_ADDRESS = 0x68
 
+# Default wiring (Pico W): SDA -> GPIO3, SCL -> GPIO2
+# Default clock: 400 kHz fast mode on hardware I2C; SoftI2C keeps the original 100 kHz,
+# since a bit-banged bus on long or weakly pulled-up wires may not run faster.
+_DEFAULT_SDA = 3
+_DEFAULT_SCL = 2
+_DEFAULT_FREQ = 400000
+_DEFAULT_SOFT_FREQ = 100000
+
+# Returns the RP2040 hardware I2C block (0 or 1) that can drive SDA/SCL on these
+# GPIOs, or None if the pair is not a valid hardware I2C pin pair.
+# I2C0: SDA on GPIO 0,4,8,...,20 / SCL on 1,5,9,...,21
+# I2C1: SDA on GPIO 2,6,10,...,18,26 / SCL on 3,7,11,...,19,27
+def hw_i2c_id(sda, scl):
+    if not (sda <= 21 or sda == 26) or not (scl <= 21 or scl == 27):
+        return None
+    if sda % 4 == 0 and scl % 4 == 1:
+        return 0
+    if sda % 4 == 2 and scl % 4 == 3:
+        return 1
+    return None
+
+# Builds the I2C bus for the given parameters.
+# bus: None -> hardware I2C if the pins allow it, otherwise SoftI2C
+#      int  -> that hardware I2C block
+#      "soft" -> SoftI2C (bit-banged) on the given pins
+#      any object with readfrom_mem/writeto_mem -> used as is (shared bus)
+# freq: None -> _DEFAULT_FREQ on hardware I2C, _DEFAULT_SOFT_FREQ on SoftI2C
+# Returns (i2c, kind) where kind is "hw", "soft" or "external".
+def make_i2c(bus=None, freq=None, sda=None, scl=None):
+    if bus is not None and not isinstance(bus, (int, str)):
+        return bus, "external"
+    if sda is None:
+        sda = _DEFAULT_SDA
+    if scl is None:
+        scl = _DEFAULT_SCL
+    if bus is None:
+        bus = hw_i2c_id(sda, scl)
+    if isinstance(bus, int):
+        return I2C(bus, sda=Pin(sda), scl=Pin(scl), freq=freq or _DEFAULT_FREQ), "hw"
+    return SoftI2C(scl=Pin(scl), sda=Pin(sda), freq=freq or _DEFAULT_SOFT_FREQ), "soft"
+
 def signedIntFromBytes(x, endian="big"):
     y = int.from_bytes(x, endian)
     if (y >= 0x8000):
         return -((65535 - y) + 1)
     else:
         return y
-    
+
+# Big-endian signed 16-bit value at buf[i]. Works on small ints only, so unlike
+# signedIntFromBytes() it needs no slice and allocates nothing on MicroPython.
+def _s16(buf, i):
+    v = (buf[i] << 8) | buf[i + 1]
+    if v & 0x8000:
+        return v - 0x10000
+    return v
+
+# Returned instead of a sample when the sensor could not be read (retry budget spent or
+# circuit breaker open). The NaN values keep arithmetic callers working; test for it
+# with `data is STALE`.
+_NaN = float("NaN")
+STALE = {"x": _NaN, "y": _NaN, "z": _NaN}
+
+
+# Circuit breaker for the sensor's I2C reads.
+# CLOSED: reads go to the bus. After `threshold` consecutive failed reads it OPENs and
+# every read is rejected immediately (the caller gets STALE) until cooldown_ms has
+# passed; then one probe read is let through (HALF_OPEN). A good probe closes the
+# breaker again (a recovery), a failed one re-opens it.
+class CircuitBreaker(object):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+    def __init__(self, threshold=_BREAKER_THRESHOLD, cooldown_ms=_BREAKER_COOLDOWN_MS):
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive = 0
+        self.opened_at = 0
+        self.trips = 0
+        self.recoveries = 0
+        self.rejected = 0
+
+    def is_open(self):
+        return self.state == CircuitBreaker.OPEN
+
+    # True if a read may go to the bus.
+    def allow(self):
+        if self.state == CircuitBreaker.OPEN:
+            if ticks_diff(ticks_ms(), self.opened_at) < self.cooldown_ms:
+                self.rejected += 1
+                return False
+            self.state = CircuitBreaker.HALF_OPEN
+        return True
+
+    def success(self):
+        if self.state != CircuitBreaker.CLOSED:
+            self.recoveries += 1
+            self.state = CircuitBreaker.CLOSED
+        self.consecutive = 0
+
+    # Records a failed read. Returns True if it opened a closed breaker.
+    def failure(self):
+        self.consecutive += 1
+        if self.state == CircuitBreaker.HALF_OPEN:
+            self.trip()
+        elif self.state == CircuitBreaker.CLOSED and self.consecutive >= self.threshold:
+            self.trip()
+            return True
+        return False
+
+    def trip(self):
+        self.state = CircuitBreaker.OPEN
+        self.opened_at = ticks_ms()
+        self.trips += 1
+
+
+# Fixed-size ring of raw FIFO frames (ax, ay, az, gx, gy, gz as signed counts).
+# When full the oldest frame is overwritten and counted in `dropped`.
+class SampleRing(object):
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array("h", [0] * (6 * capacity))
+        self.head = 0
+        self.count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    # Appends one big-endian 12-byte frame starting at buf[offset].
+    def push_frame(self, buf, offset):
+        tail = (self.head + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+            self.dropped += 1
+        else:
+            self.count += 1
+        data = self.data
+        base = tail * 6
+        i = 0
+        while i < 6:
+            data[base + i] = _s16(buf, offset + (i << 1))
+            i += 1
+
+    # Moves the oldest frame into `out` (6 values). Returns False when empty.
+    def pop_into(self, out):
+        if self.count == 0:
+            return False
+        data = self.data
+        base = self.head * 6
+        i = 0
+        while i < 6:
+            out[i] = data[base + i]
+            i += 1
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        return True
+
 
 class MPU6050(object):     
-    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=_MPU6050_ADDRESS):
+    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=_MPU6050_ADDRESS,
+                 retry_budget_ms=_RETRY_BUDGET_MS, breaker_threshold=_BREAKER_THRESHOLD,
+                 breaker_cooldown_ms=_BREAKER_COOLDOWN_MS):
         # Checks any error that would happen with I2C communication protocol.
+        # _failCount: failed transactions, _terminatingFailCount: reads that gave up.
         self._failCount = 0
         self._terminatingFailCount = 0
+        self.retry_budget_ms = retry_budget_ms
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown_ms)
         
-        # Initializing the I2C method for ESP32
-        # Pin assignment:
-        # SCL -> GPIO 22 (در این مثال از GPIO2 استفاده شده است)
-        # SDA -> GPIO 21 (در این مثال از GPIO3 استفاده شده است)
-        self.i2c = SoftI2C(scl=Pin(2), sda=Pin(3), freq=100000)
-        
-        # Initializing the I2C method for ESP8266
-        # Pin assignment:
-        # SCL -> GPIO 5
-        # SDA -> GPIO 4
-        # self.i2c = I2C(scl=Pin(5), sda=Pin(4))
+        # Initializing the I2C bus (see make_i2c()).
+        # Default pin assignment on the Pico W:
+        # SCL -> GPIO2
+        # SDA -> GPIO3
+        # This pair has no hardware I2C block, so it runs on SoftI2C. Swapping the wires
+        # (MPU6050(sda=2, scl=3)) puts the sensor on the hardware I2C1 peripheral.
+        # An already-built bus object can be passed as `bus` to share it between devices.
+        self.i2c, self.bus_kind = make_i2c(bus, freq, sda, scl)
         
         self.addr = addr
 
-        # تلاش برای بیدارکردن MPU6050 (در صورت مواجهه با OSError: [Errno 19] ENODEV حداکثر تا 100 بار تلاش می‌کند)
-        attempts = 0
-        max_attempts = 100
-        while attempts < max_attempts:
+        # Preallocated buffers for register reads and the read_all()/read_raw_into() bursts
+        self._buf1 = bytearray(1)
+        self._buf2 = bytearray(2)
+        self._buf6 = bytearray(6)
+        self._burst = bytearray(_BURST_LEN)
+
+        # تلاش برای بیدارکردن MPU6050 حداکثر به مدت _WAKE_BUDGET_MS (با تاخیر نمایی بین تلاش‌ها)
+        self._awake = self._wake(_WAKE_BUDGET_MS)
+        if self._awake:
+            self._accel_range = self.get_accel_range(True)
+            self._gyro_range = self.get_gyro_range(True)
+        else:
+            log.error("mpu6050", i2c_err_str, self.addr)
+            # ادامه برنامه بدون raise کردن است: مدارشکن باز می‌شود، خواندن‌ها STALE برمی‌گردانند
+            # و پس از هر دوره خنک‌شدن یک بار دیگر برای بیدار کردن سنسور تلاش می‌شود.
+            self._accel_range = _ACC_RNG_2G
+            self._gyro_range = _GYR_RNG_250DEG
+            self.breaker.trip()
+        self._update_scales()
+
+        # Data-ready mode (see enable_data_ready()). Off by default: reads sleep 10 ms.
+        self._drdy = False
+        self._drdy_pin = None
+        self._drdy_flag = False
+        self._drdy_ticks = 0
+        self.reset_data_ready_stats()
+
+        # FIFO batching (see enable_fifo())
+        self.fifo = None
+        self._fifo_buf = None
+        self._fifo_mv = None
+        self._fifo_frame = None
+        self.fifo_overflows = 0
+
+    # Enables the DATA_RDY interrupt so reads happen exactly when a new sample exists
+    # instead of after a fixed 10 ms sleep.
+    # pin: machine.Pin wired to the INT output. With a pin, reads wait for the IRQ;
+    # without one, they poll INT_STATUS over I2C.
+    def enable_data_ready(self, pin=None):
+        # Active high, push-pull, 50 us pulse, cleared by reading INT_STATUS
+        self.i2c.writeto_mem(self.addr, _INT_PIN_CFG, bytes([0x00]))
+        self.i2c.writeto_mem(self.addr, _INT_ENABLE, bytes([_DATA_RDY_INT]))
+        self._drdy_flag = False
+        if pin is not None:
+            pin.irq(handler=self._on_data_ready, trigger=Pin.IRQ_RISING)
+        self._drdy_pin = pin
+        self._drdy = True
+
+    def disable_data_ready(self):
+        self.i2c.writeto_mem(self.addr, _INT_ENABLE, bytes([0x00]))
+        if self._drdy_pin is not None:
+            self._drdy_pin.irq(handler=None)
+            self._drdy_pin = None
+        self._drdy = False
+
+    # IRQ handler: only timestamps the sample, the read happens in wait_data_ready().
+    def _on_data_ready(self, pin):
+        self._drdy_ticks = ticks_us()
+        self._drdy_flag = True
+
+    # Blocks until the chip reports a new sample or timeout_ms expires.
+    # Returns True if a sample is ready, False on timeout.
+    # With the INT pin the core sleeps in machine.idle() between checks: it wakes on the
+    # data-ready IRQ itself (or the 1 ms systick), so the wait costs no CPU and adds no
+    # latency.
+    def wait_data_ready(self, timeout_ms=100):
+        start = ticks_ms()
+        if self._drdy_pin is not None:
+            while not self._drdy_flag:
+                if ticks_diff(ticks_ms(), start) > timeout_ms:
+                    self._drdy_timeouts += 1
+                    return False
+                idle()
+            self._drdy_flag = False
+            return True
+        buf = self._buf1
+        while True:
+            if not self._read_into(_INT_STATUS, buf):
+                return False
+            if buf[0] & _DATA_RDY_INT:
+                self._drdy_ticks = ticks_us()
+                return True
+            if ticks_diff(ticks_ms(), start) > timeout_ms:
+                self._drdy_timeouts += 1
+                return False
+            sleep_us(_DRDY_POLL_US)
+
+    # Waits for the next sample before a register read.
+    def _wait_sample(self):
+        if self._drdy:
+            return self.wait_data_ready()
+        sleep_ms(10)
+        return False
+
+    # Records how long after data-ready a sample was actually read.
+    def _mark_read(self, ready):
+        if not ready:
+            return
+        latency = ticks_diff(ticks_us(), self._drdy_ticks)
+        self._drdy_last_us = latency
+        self._drdy_sum_us += latency
+        self._drdy_count += 1
+        if latency > self._drdy_max_us:
+            self._drdy_max_us = latency
+
+    def reset_data_ready_stats(self):
+        self._drdy_last_us = 0
+        self._drdy_max_us = 0
+        self._drdy_sum_us = 0
+        self._drdy_count = 0
+        self._drdy_timeouts = 0
+
+    # Latency from sample-ready (IRQ edge or INT_STATUS poll) to read completion [us].
+    # Returns dictionary: last_us, max_us, avg_us, samples, timeouts.
+    def data_ready_stats(self):
+        count = self._drdy_count
+        return {"last_us": self._drdy_last_us,
+                "max_us": self._drdy_max_us,
+                "avg_us": self._drdy_sum_us / count if count else 0,
+                "samples": count,
+                "timeouts": self._drdy_timeouts}
+
+    # Writes PWR_MGMT_1 to take the chip out of sleep, retrying with exponential
+    # backoff for at most budget_ms. Returns True once the chip acknowledged.
+    def _wake(self, budget_ms):
+        start = ticks_ms()
+        delay = _BACKOFF_START_MS
+        while True:
             try:
                 self.i2c.writeto_mem(self.addr, _PWR_MGMT_1, bytes([0x00]))
                 sleep_ms(5)
-                break  # موفقیت، خروج از حلقه
-            except OSError as e:
-                if hasattr(e, "errno") and e.errno == 19:
-                    attempts += 1
-                    sleep_ms(100)  # کمی تاخیر قبل از تلاش مجدد
-                else:
-                    raise e
-        if attempts >= max_attempts:
-            print(i2c_err_str.format(self.addr))
-            print(error_msg)
-            # ادامه برنامه بدون raise کردن است.
-
-        self._accel_range = self.get_accel_range(True)
-        self._gyro_range = self.get_gyro_range(True)
-
-    def _readData(self, register):
-        failCount = 0
-        while failCount < _maxFails:
+                return True
+            except OSError:
+                self._failCount += 1
+            if ticks_diff(ticks_ms(), start) + delay > budget_ms:
+                return False
+            sleep_ms(delay)
+            delay <<= 1
+
+    # Reads len(buf) bytes from `register` under the error policy: while the breaker
+    # is open it fails immediately; otherwise any OSError is retried with exponential
+    # backoff as long as the retry budget lasts. Returns True if buf was filled.
+    def _read_into(self, register, buf):
+        breaker = self.breaker
+        if not breaker.allow():
+            return False
+        if not self._awake:
+            # Sensor was missing at boot: the probe read tries to wake it first
+            self._awake = self._wake(0)
+            if not self._awake:
+                breaker.failure()
+                return False
+        start = ticks_ms()
+        delay = _BACKOFF_START_MS
+        while True:
             try:
-                sleep_ms(10)
-                data = self.i2c.readfrom_mem(self.addr, register, 6)
-                break
-            except OSError as e:
-                if hasattr(e, "errno") and e.errno == 19:
-                    failCount += 1
-                    self._failCount += 1
-                else:
-                    raise e
-            except:
-                failCount += 1
+                self.i2c.readfrom_mem_into(self.addr, register, buf)
+                breaker.success()
+                return True
+            except OSError:
                 self._failCount += 1
-            if failCount >= _maxFails:
-                self._terminatingFailCount += 1
-                print(i2c_err_str.format(self.addr))
-                return {"x": float("NaN"), "y": float("NaN"), "z": float("NaN")} 
-        x = signedIntFromBytes(data[0:2])
-        y = signedIntFromBytes(data[2:4])
-        z = signedIntFromBytes(data[4:6])
-        return {"x": x, "y": y, "z": z}
+            if ticks_diff(ticks_ms(), start) + delay > self.retry_budget_ms:
+                break
+            sleep_ms(delay)
+            delay <<= 1
+        self._terminatingFailCount += 1
+        if breaker.failure():
+            log.error("mpu6050", i2c_err_str, self.addr)
+        return False
+
+    # Error counters for the control loop.
+    # Returns dictionary: failures (failed transactions), exhausted (reads that ran out
+    # of retry budget), breaker ("closed", "open" or "half-open"), trips, recoveries and
+    # rejected (reads answered STALE while the breaker was open).
+    def error_stats(self):
+        breaker = self.breaker
+        return {"failures": self._failCount,
+                "exhausted": self._terminatingFailCount,
+                "breaker": ("closed", "open", "half-open")[breaker.state],
+                "trips": breaker.trips,
+                "recoveries": breaker.recoveries,
+                "rejected": breaker.rejected}
+
+    # Returns the raw x, y, z values at `register`, or STALE if the read failed.
+    def _readData(self, register):
+        exhausted = self._terminatingFailCount
+        ready = False if self.breaker.is_open() else self._wait_sample()
+        data = self._buf6
+        # If the data-ready poll already spent the retry budget, don't spend it twice
+        if self._terminatingFailCount != exhausted or not self._read_into(register, data):
+            return STALE
+        self._mark_read(ready)
+        return {"x": _s16(data, 0), "y": _s16(data, 2), "z": _s16(data, 4)}
+
+    # LSB per g for the current accelerometer range.
+    def _accel_scaler(self):
+        accel_range = self._accel_range
+        if accel_range == _ACC_RNG_2G:
+            return _ACC_SCLR_2G
+        elif accel_range == _ACC_RNG_4G:
+            return _ACC_SCLR_4G
+        elif accel_range == _ACC_RNG_8G:
+            return _ACC_SCLR_8G
+        elif accel_range == _ACC_RNG_16G:
+            return _ACC_SCLR_16G
+        else:
+            log.warning("mpu6050", "Unkown range - scaler set to _ACC_SCLR_2G")
+            return _ACC_SCLR_2G
+
+    # LSB per deg/s for the current gyroscope range.
+    def _gyro_scaler(self):
+        gyro_range = self._gyro_range
+        if gyro_range == _GYR_RNG_250DEG:
+            return _GYR_SCLR_250DEG
+        elif gyro_range == _GYR_RNG_500DEG:
+            return _GYR_SCLR_500DEG
+        elif gyro_range == _GYR_RNG_1000DEG:
+            return _GYR_SCLR_1000DEG
+        elif gyro_range == _GYR_RNG_2000DEG:
+            return _GYR_SCLR_2000DEG
+        else:
+            log.warning("mpu6050", "Unkown range - scaler set to _GYR_SCLR_250DEG")
+            return _GYR_SCLR_250DEG
+
+    # Caches the conversion factors for the current ranges, so converting a sample is
+    # one multiplication per axis (float) or one shift/division (fixed point) instead
+    # of walking the range table every time. Called whenever a range changes.
+    def _update_scales(self):
+        scaler = self._accel_scaler()
+        self._acc_g = 1 / scaler
+        self._acc_ms2 = _GRAVITIY_MS2 / scaler
+        shift = 11
+        while (1 << shift) < scaler:
+            shift += 1
+        self._acc_shift = shift  # LSB per g is 2**shift
+
+        scaler = self._gyro_scaler()
+        self._gyr_dps = 1 / scaler
+        self._gyr_lsb10 = int(scaler * 10 + 0.5)  # LSB per 10 deg/s
+
+    # Reads accelerometer, temperature and gyroscope in a single 14-byte burst
+    # (ACCEL_XOUT_H .. GYRO_ZOUT_L), so all seven channels belong to the same sample.
+    # Costs one I2C transaction instead of the two read_accel_data() + read_gyro_data() need.
+    # Returns (accel, temp, gyro): accel dict in g or m/s^2 (g=False), temp in degC,
+    # gyro dict in deg/s. If the sensor cannot be read it returns (STALE, NaN, STALE).
+    # In data-ready mode (enable_data_ready()) it first waits for a new sample.
+    def read_all(self, g = False):
+        buf = self._burst
+        exhausted = self._terminatingFailCount
+        ready = self._drdy and not self.breaker.is_open() and self.wait_data_ready()
+        if self._terminatingFailCount != exhausted or not self._read_into(_ACCEL_XOUT0, buf):
+            return STALE, _NaN, STALE
+        self._mark_read(ready)
+
+        k = self._acc_g if g is True else self._acc_ms2
+        kg = self._gyr_dps
+        accel = {"x": _s16(buf, 0) * k,
+                 "y": _s16(buf, 2) * k,
+                 "z": _s16(buf, 4) * k}
+        temp = (_s16(buf, 6) / 340) + 36.53
+        gyro = {"x": _s16(buf, 8) * kg,
+                "y": _s16(buf, 10) * kg,
+                "z": _s16(buf, 12) * kg}
+        return accel, temp, gyro
+
+    # Allocation-free variant of read_all() for the control loop.
+    # Bursts the 14 output registers into the preallocated buffer and writes the seven
+    # raw signed counts (ax, ay, az, temp, gx, gy, gz) into the caller-supplied `out`,
+    # e.g. array("h", [0] * 7). Returns True on success; if the sensor cannot be read
+    # (see error_stats()) `out` is left untouched and False is returned.
+    def read_raw_into(self, out):
+        buf = self._burst
+        exhausted = self._terminatingFailCount
+        ready = self._drdy and not self.breaker.is_open() and self.wait_data_ready()
+        if self._terminatingFailCount != exhausted or not self._read_into(_ACCEL_XOUT0, buf):
+            return False
+        self._mark_read(ready)
+        i = 0
+        while i < 7:
+            out[i] = _s16(buf, i << 1)
+            i += 1
+        return True
+
+    # Fixed-point variant of read_raw_into() that never creates a float (floats are
+    # heap objects on MicroPython). Writes (ax, ay, az) in milli-g, the temperature in
+    # centi-degC and (gx, gy, gz) in milli-deg/s into `out`, which needs 32-bit room,
+    # e.g. array("i", [0] * 7). Values are rounded down. Returns False on I2C failure.
+    def read_fixed_into(self, out):
+        if not self.read_raw_into(out):
+            return False
+        shift = self._acc_shift
+        out[0] = (out[0] * 1000) >> shift
+        out[1] = (out[1] * 1000) >> shift
+        out[2] = (out[2] * 1000) >> shift
+        out[3] = out[3] * 100 // 340 + 3653
+        lsb10 = self._gyr_lsb10
+        out[4] = out[4] * 10000 // lsb10
+        out[5] = out[5] * 10000 // lsb10
+        out[6] = out[6] * 10000 // lsb10
+        return True
+
+    # Starts hardware FIFO batching: every sample (at the configured output data rate)
+    # queues a 12-byte accel + gyro frame in the chip, so the Python loop only has to
+    # wake up to drain whole batches with drain_fifo().
+    # capacity: size of the software ring (frames) that drained samples are stored in.
+    def enable_fifo(self, capacity=128):
+        if self.fifo is None or self.fifo.capacity != capacity:
+            self.fifo = SampleRing(capacity)
+        if self._fifo_buf is None:
+            self._fifo_buf = bytearray(_FIFO_MAX_FRAMES * _FIFO_FRAME)
+            self._fifo_mv = memoryview(self._fifo_buf)
+            self._fifo_frame = array("h", [0] * 6)
+        self.i2c.writeto_mem(self.addr, _FIFO_EN, bytes([_FIFO_ACCEL_GYRO]))
+        self.reset_fifo()
+
+    def disable_fifo(self):
+        self.i2c.writeto_mem(self.addr, _USER_CTRL, bytes([0x00]))
+        self.i2c.writeto_mem(self.addr, _FIFO_EN, bytes([0x00]))
+        self.fifo = None
+
+    # Empties the hardware FIFO and the software ring and restarts queueing.
+    def reset_fifo(self):
+        self.i2c.writeto_mem(self.addr, _USER_CTRL, bytes([0x00]))
+        self.i2c.writeto_mem(self.addr, _USER_CTRL, bytes([_USER_FIFO_RESET]))
+        self.i2c.writeto_mem(self.addr, _USER_CTRL, bytes([_USER_FIFO_EN]))
+        if self.fifo is not None:
+            self.fifo.clear()
+
+    # Number of bytes waiting in the hardware FIFO (0 if it cannot be read).
+    def fifo_count(self):
+        buf = self._buf2
+        if not self._read_into(_FIFO_COUNTH, buf):
+            return 0
+        return (buf[0] << 8) | buf[1]
+
+    # Moves every complete frame from the hardware FIFO into the ring buffer using a
+    # single I2C transaction. On overflow (the chip has dropped data and the byte
+    # stream is no longer frame-aligned) the FIFO is reset and counted in
+    # fifo_overflows. Returns the number of frames drained.
+    # If enable_fifo() was never called it is called here with the default capacity; the
+    # chip only starts queueing then, so that first call returns 0.
+    def drain_fifo(self, max_frames=_FIFO_MAX_FRAMES):
+        if self.fifo is None:
+            self.enable_fifo()
+            return 0
+        count = self.fifo_count()
+        if count >= _FIFO_SIZE or count % _FIFO_FRAME:
+            self.fifo_overflows += 1
+            self.reset_fifo()
+            return 0
+        frames = count // _FIFO_FRAME
+        if frames > max_frames:
+            frames = max_frames
+        if frames > _FIFO_MAX_FRAMES:
+            frames = _FIFO_MAX_FRAMES
+        if frames == 0:
+            return 0
+        buf = self._fifo_buf
+        if not self._read_into(_FIFO_R_W, self._fifo_mv[0:frames * _FIFO_FRAME]):
+            # A failed transfer may have consumed part of a frame: start clean
+            try:
+                self.reset_fifo()
+            except OSError:
+                pass
+            return 0
+        ring = self.fifo
+        offset = 0
+        for _ in range(frames):
+            ring.push_frame(buf, offset)
+            offset += _FIFO_FRAME
+        return frames
+
+    # Drains the FIFO and returns every buffered sample as a list of (accel, gyro)
+    # dictionaries, accel in g or m/s^2 (g=False) and gyro in deg/s, oldest first.
+    # Enables the FIFO on first use (see drain_fifo()), returning an empty batch.
+    def read_fifo_batch(self, g = False):
+        self.drain_fifo()
+        k = self._acc_g if g is True else self._acc_ms2
+        kg = self._gyr_dps
+        frame = self._fifo_frame
+        batch = []
+        while self.fifo.pop_into(frame):
+            batch.append(({"x": frame[0] * k, "y": frame[1] * k, "z": frame[2] * k},
+                          {"x": frame[3] * kg, "y": frame[4] * kg, "z": frame[5] * kg}))
+        return batch
+
+    # Reads the six offset registers: [ax, ay, az, gx, gy, gz] as signed ints.
+    def read_offsets(self):
+        data = self.i2c.readfrom_mem(self.addr, _XA_OFFS_H, 6)
+        offsets = [_s16(data, 0), _s16(data, 2), _s16(data, 4)]
+        data = self.i2c.readfrom_mem(self.addr, _XG_OFFS_USRH, 6)
+        offsets += [_s16(data, 0), _s16(data, 2), _s16(data, 4)]
+        return offsets
+
+    # Writes [ax, ay, az, gx, gy, gz] to the offset registers (two I2C transactions).
+    def write_offsets(self, offsets):
+        data = bytearray(12)
+        for i in range(6):
+            v = offsets[i]
+            if v > 32767:
+                v = 32767
+            elif v < -32768:
+                v = -32768
+            data[2 * i] = (v >> 8) & 0xFF
+            data[2 * i + 1] = v & 0xFF
+        self.i2c.writeto_mem(self.addr, _XA_OFFS_H, data[0:6])
+        self.i2c.writeto_mem(self.addr, _XG_OFFS_USRH, data[6:12])
+
+    # Measures the sensor biases while it lies still and cancels them in the chip's
+    # offset registers, so every read path (registers, burst and FIFO) is corrected.
+    # samples: number of samples averaged, each one a fresh sample of the output rate.
+    # gravity_axis: accelerometer axis (0=x, 1=y, 2=z) expected to read +1 g.
+    # Returns a report dictionary: samples, accel_bias (g), gyro_bias (deg/s),
+    # accel_std (g) and gyro_std (deg/s) per axis, stationary (gyro_std below
+    # _CAL_STILL_DPS on all axes) and offsets (the register values).
+    # Offsets are only written if the sensor was stationary. Returns None if it could
+    # not be read.
+    def calibrate(self, samples=_CAL_SAMPLES, gravity_axis=2):
+        raw = array("h", [0] * 7)
+        mean = [0.0] * 6
+        m2 = [0.0] * 6
+        period = 0 if self._drdy else max(1, int(1000 / self.get_sample_rate() + 0.5))
+        n = 0
+        while n < samples:
+            if period:
+                sleep_ms(period)
+            if not self.read_raw_into(raw):
+                return None
+            n += 1
+            # Welford's running mean and variance
+            for c in range(6):
+                v = raw[c if c < 3 else c + 1]
+                d = v - mean[c]
+                mean[c] += d / n
+                m2[c] += d * (v - mean[c])
+        var = [m / (n - 1) if n > 1 else 0.0 for m in m2]
+
+        bias = list(mean)
+        bias[gravity_axis] -= 1 / self._acc_g
+        acc_k = _ACC_OFFS_LSB_PER_G * self._acc_g   # offset LSB per output LSB
+        gyr_k = _GYR_OFFS_LSB_PER_DPS * self._gyr_dps
+        offsets = self.read_offsets()
+        for i in range(3):
+            # Accel offsets start from the factory trim; bit 0 must be preserved
+            v = offsets[i] - int(round(bias[i] * acc_k))
+            offsets[i] = (v & ~1) | (offsets[i] & 1)
+            offsets[i + 3] -= int(round(bias[i + 3] * gyr_k))
+
+        gyro_std = [sqrt(v) * self._gyr_dps for v in var[3:]]
+        report = {"samples": n,
+                  "accel_bias": [b * self._acc_g for b in bias[:3]],
+                  "gyro_bias": [b * self._gyr_dps for b in bias[3:]],
+                  "accel_std": [sqrt(v) * self._acc_g for v in var[:3]],
+                  "gyro_std": gyro_std,
+                  "stationary": max(gyro_std) < _CAL_STILL_DPS,
+                  "offsets": offsets}
+        if report["stationary"]:
+            self.write_offsets(offsets)
+        return report
+
+    # Saves a calibrate() report (offsets and quality figures) to a JSON file in flash.
+    def save_calibration(self, report, path=_CAL_FILE):
+        with open(path, "w") as f:
+            ujson.dump({"addr": self.addr, "report": report}, f)
+
+    # Writes the offsets saved by save_calibration() back to the chip, which takes a
+    # file read and two I2C writes instead of a new calibration.
+    # Returns the saved report, or None if there is no usable file for this address.
+    def load_calibration(self, path=_CAL_FILE):
+        try:
+            with open(path) as f:
+                saved = ujson.load(f)
+            report = saved["report"]
+            if saved["addr"] != self.addr or len(report["offsets"]) != 6:
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self.write_offsets(report["offsets"])
+        return report
+
+    # Boot helper: loads the saved calibration, or calibrates and saves it if there is
+    # none (the sensor must lie still with gravity_axis up). Returns the report, or
+    # None if the sensor could not be read.
+    def load_or_calibrate(self, path=_CAL_FILE, samples=_CAL_SAMPLES, gravity_axis=2):
+        report = self.load_calibration(path)
+        if report is not None:
+            return report
+        report = self.calibrate(samples, gravity_axis)
+        if report is not None and report["stationary"]:
+            self.save_calibration(report, path)
+        return report
 
     # Reads the temperature from the onboard temperature sensor of the MPU-6050.
     # Returns the temperature [degC].
     def read_temperature(self):
-        try:
-            rawData = self.i2c.readfrom_mem(self.addr, _TEMP_OUT0, 2)
-            raw_temp = signedIntFromBytes(rawData, "big")
-        except OSError as e:
-            if hasattr(e, "errno") and e.errno == 19:
-                print(i2c_err_str.format(self.addr))
-                return float("NaN")
-            else:
-                raise e
-        except:
-            print(i2c_err_str.format(self.addr))
-            return float("NaN")
+        rawData = self._buf2
+        if not self._read_into(_TEMP_OUT0, rawData):
+            return _NaN
+        raw_temp = _s16(rawData, 0)
         actual_temp = (raw_temp / 340) + 36.53
         return actual_temp
 
+    # Sets the digital low-pass filter. Using a pre-defined _DLPF_BW_* value is advised.
+    # Note: the gyro output rate the sample rate is divided from is 8 kHz with the
+    # filter off (_DLPF_BW_260) and 1 kHz otherwise, so call set_sample_rate() after this.
+    def set_dlpf(self, dlpf):
+        raw_data = self.i2c.readfrom_mem(self.addr, _CONFIG, 1)
+        self.i2c.writeto_mem(self.addr, _CONFIG, bytes([(raw_data[0] & 0xF8) | (dlpf & 0x07)]))
+
+    # Gets the digital low-pass filter setting.
+    # raw=True: return DLPF_CFG value
+    # raw=False: return accelerometer bandwidth in Hz (-1 for the reserved setting)
+    def get_dlpf(self, raw = False):
+        dlpf = self.i2c.readfrom_mem(self.addr, _CONFIG, 1)[0] & 0x07
+        if raw is True:
+            return dlpf
+        if dlpf < len(_DLPF_BANDWIDTH):
+            return _DLPF_BANDWIDTH[dlpf]
+        return -1
+
+    # Rate [Hz] SMPLRT_DIV divides: 8 kHz with the DLPF off, 1 kHz with it on.
+    def _gyro_output_rate(self):
+        dlpf = self.get_dlpf(True)
+        return 8000 if dlpf == 0 or dlpf == 7 else 1000
+
+    # Sets the output data rate (data-ready, FIFO and output registers) as close to
+    # `hz` as SMPLRT_DIV allows. Returns the effective rate in Hz.
+    def set_sample_rate(self, hz):
+        base = self._gyro_output_rate()
+        div = int(base / hz + 0.5) - 1
+        if div < 0:
+            div = 0
+        elif div > 255:
+            div = 255
+        self.i2c.writeto_mem(self.addr, _SMPLRT_DIV, bytes([div]))
+        return base / (1 + div)
+
+    # Gets the effective output data rate in Hz.
+    def get_sample_rate(self):
+        div = self.i2c.readfrom_mem(self.addr, _SMPLRT_DIV, 1)[0]
+        return self._gyro_output_rate() / (1 + div)
+
+    # Matches the sensor to a control loop running every period_ms:
+    # the DLPF gets the widest bandwidth not above half the loop rate (anti-aliasing,
+    # so the hardware does the smoothing), and the output rate gives about
+    # samples_per_period fresh samples per loop tick.
+    # Returns (bandwidth Hz, effective sample rate Hz).
+    def configure_for_loop(self, period_ms, samples_per_period=5):
+        nyquist = 500 / period_ms
+        dlpf = _DLPF_BW_5
+        for cfg in range(_DLPF_BW_184, _DLPF_BW_5 + 1):
+            if _DLPF_BANDWIDTH[cfg] <= nyquist:
+                dlpf = cfg
+                break
+        self.set_dlpf(dlpf)
+        rate = self.set_sample_rate(samples_per_period * 1000 / period_ms)
+        return _DLPF_BANDWIDTH[dlpf], rate
+
     # Sets the range of the accelerometer
     # accel_range : the range to set the accelerometer to. Using a pre-defined range is advised.
     def set_accel_range(self, accel_range):
         self.i2c.writeto_mem(self.addr, _ACCEL_CONFIG, bytes([accel_range]))
         self._accel_range = accel_range
+        self._update_scales()
 
     # Gets the range the accelerometer is set to.
     # raw=True: Returns raw value from the ACCEL_CONFIG register
@@ -177,31 +891,12 @@ class MPU6050(object):
     # Returns dictionary data in g or m/s^2 (g=False)
     def read_accel_data(self, g = False):         
         accel_data = self._readData(_ACCEL_XOUT0)
-        accel_range = self._accel_range
-        scaler = None
-        if accel_range == _ACC_RNG_2G:
-            scaler = _ACC_SCLR_2G
-        elif accel_range == _ACC_RNG_4G:
-            scaler = _ACC_SCLR_4G
-        elif accel_range == _ACC_RNG_8G:
-            scaler = _ACC_SCLR_8G
-        elif accel_range == _ACC_RNG_16G:
-            scaler = _ACC_SCLR_16G
-        else:
-            print("Unkown range - scaler set to _ACC_SCLR_2G")
-            scaler = _ACC_SCLR_2G
-
-        x = accel_data["x"] / scaler
-        y = accel_data["y"] / scaler
-        z = accel_data["z"] / scaler
+        if accel_data is STALE:
+            return STALE
+        # Scale factor cached per range by _update_scales()
+        k = self._acc_g if g is True else self._acc_ms2
 
-        if g is True:
-            return {"x": x, "y": y, "z": z}
-        elif g is False:
-            x = x * _GRAVITIY_MS2
-            y = y * _GRAVITIY_MS2
-            z = z * _GRAVITIY_MS2
-            return {"x": x, "y": y, "z": z}
+        return {"x": accel_data["x"] * k, "y": accel_data["y"] * k, "z": accel_data["z"] * k}
 
     def read_accel_abs(self, g=False):
         d = self.read_accel_data(g)
@@ -210,6 +905,7 @@ class MPU6050(object):
     def set_gyro_range(self, gyro_range):
         self.i2c.writeto_mem(self.addr, _GYRO_CONFIG, bytes([gyro_range]))
         self._gyro_range = gyro_range
+        self._update_scales()
 
     # Gets the range the gyroscope is set to.
     # raw=True: return raw value from GYRO_CONFIG register
@@ -236,25 +932,11 @@ class MPU6050(object):
     # Returns the read values in a dictionary.
     def read_gyro_data(self):
         gyro_data = self._readData(_GYRO_XOUT0)
-        gyro_range = self._gyro_range
-        scaler = None
-        if gyro_range == _GYR_RNG_250DEG:
-            scaler = _GYR_SCLR_250DEG
-        elif gyro_range == _GYR_RNG_500DEG:
-            scaler = _GYR_SCLR_500DEG
-        elif gyro_range == _GYR_RNG_1000DEG:
-            scaler = _GYR_SCLR_1000DEG
-        elif gyro_range == _GYR_RNG_2000DEG:
-            scaler = _GYR_SCLR_2000DEG
-        else:
-            print("Unkown range - scaler set to _GYR_SCLR_250DEG")
-            scaler = _GYR_SCLR_250DEG
-
-        x = gyro_data["x"] / scaler
-        y = gyro_data["y"] / scaler
-        z = gyro_data["z"] / scaler
+        if gyro_data is STALE:
+            return STALE
+        k = self._gyr_dps
 
-        return {"x": x, "y": y, "z": z}
+        return {"x": gyro_data["x"] * k, "y": gyro_data["y"] * k, "z": gyro_data["z"] * k}
 
     def read_angle(self):  # returns radians. orientation matches silkscreen
         a = self.read_accel_data()
@@ -0,0 +1,95 @@
+# Fixed-rate loop pacing with deadline accounting.
+#
+# A plain sleep(period) after the loop body makes the real period body + period, so it
+# drifts with melody length, I2C retries and prints. FixedRate keeps absolute deadlines
+# (ticks_add/ticks_diff) instead: the loop body runs once per period, whatever it took.
+#
+#     rate = FixedRate(50)               # ms
+#     while True:
+#         await rate.tick()              # or rate.tick_sync() in a blocking loop
+#         sense(); decide(); actuate()
+#
+# tick() measures the execution time of the previous body, sleeps until the next
+# deadline and records how late it woke up. A body that runs past its deadline is an
+# overrun: with skip_missed=True (default) the missed slots are skipped so the loop
+# stays in phase; with skip_missed=False the next body starts at once and the schedule
+# restarts from there. stats() returns the counters at runtime.
+
+import uasyncio as asyncio
+from time import ticks_us, ticks_add, ticks_diff, sleep_us
+
+
+class FixedRate(object):
+    def __init__(self, period_ms, skip_missed=True):
+        self.period_us = int(period_ms * 1000)
+        self.skip_missed = skip_missed
+        self._deadline = None    # ticks_us the current body was due to start
+        self._start = None       # ticks_us the current body actually started
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0        # bodies that ran past the next deadline
+        self.skipped = 0         # whole periods skipped after overruns
+        self.exec_us = 0         # execution time of the latest body
+        self.wcet_us = 0         # worst-case execution time
+        self.jitter_us = 0       # latest wake-up lateness
+        self.max_jitter_us = 0
+        self._jitter_sum = 0
+
+    # Closes the running body and returns how long to wait [us] for the next deadline.
+    def _next(self):
+        now = ticks_us()
+        if self._deadline is None:
+            self._deadline = now
+            return 0
+        elapsed = ticks_diff(now, self._start)
+        self.exec_us = elapsed
+        if elapsed > self.wcet_us:
+            self.wcet_us = elapsed
+        self._deadline = ticks_add(self._deadline, self.period_us)
+        wait = ticks_diff(self._deadline, now)
+        if wait < 0:
+            self.overruns += 1
+            if self.skip_missed:
+                missed = (-wait) // self.period_us + 1
+                self.skipped += missed
+                self._deadline = ticks_add(self._deadline, missed * self.period_us)
+                wait = ticks_diff(self._deadline, now)
+            else:
+                self._deadline = now
+                wait = 0
+        return wait
+
+    # Records the start of a body.
+    def _woke(self):
+        now = ticks_us()
+        self._start = now
+        late = ticks_diff(now, self._deadline)
+        if late < 0:
+            late = 0
+        self.jitter_us = late
+        if late > self.max_jitter_us:
+            self.max_jitter_us = late
+        self._jitter_sum += late
+        self.ticks += 1
+
+    # Waits (asynchronously) for the next deadline.
+    async def tick(self):
+        wait = self._next()
+        if wait > 0:
+            await asyncio.sleep(wait / 1000000)
+        self._woke()
+
+    # Waits (blocking) for the next deadline, for loops without uasyncio.
+    def tick_sync(self):
+        wait = self._next()
+        if wait > 0:
+            sleep_us(wait)
+        self._woke()
+
+    def stats(self):
+        return {"period_ms": self.period_us / 1000, "ticks": self.ticks, "overruns": self.overruns,
+                "skipped": self.skipped, "exec_us": self.exec_us, "wcet_us": self.wcet_us,
+                "jitter_us": self.jitter_us, "max_jitter_us": self.max_jitter_us,
+                "mean_jitter_us": self._jitter_sum // self.ticks if self.ticks else 0}
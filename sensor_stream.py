@@ -0,0 +1,123 @@
+# Fixed-rate asynchronous sensor producer.
+#
+# run() calls a synchronous read function every 1/rate_hz seconds on absolute deadlines
+# and stores each result with its ticks_ms timestamp in a small ring buffer, so
+# consumers never wait on the sensor themselves:
+#
+#     stream = SensorStream(GY25_data.sample, rate_hz=50)
+#     asyncio.create_task(stream.run())
+#     t, pitch, roll, yaw = stream.latest()      # freshest sample, never blocks
+#     async for t, pitch, roll, yaw in stream.stream():
+#         ...                                    # every sample, in order
+#
+# read() must return a tuple of `width` numbers. A read that raises OSError or returns
+# NaN (a STALE sample) is counted and skipped, so the age of latest() tells consumers
+# how long the sensor has been unavailable.
+
+import uasyncio as asyncio
+from array import array
+from time import ticks_ms, ticks_diff, ticks_add
+
+
+class SensorStream(object):
+    def __init__(self, read, rate_hz=50, capacity=16, width=3):
+        self.read = read
+        self.rate_hz = rate_hz
+        self.capacity = capacity
+        self.width = width
+        self._data = array("f", [0.0] * (capacity * width))
+        self._stamps = array("i", [0] * capacity)
+        self.seq = 0                 # number of samples produced so far
+        self.errors = 0              # reads that raised OSError or returned NaN
+        self.overruns = 0            # periods where read() took longer than the period
+        self.running = False
+        self._event = asyncio.Event()
+
+    def _push(self, stamp, values):
+        slot = self.seq % self.capacity
+        self._stamps[slot] = stamp
+        base = slot * self.width
+        for i in range(self.width):
+            self._data[base + i] = values[i]
+        self.seq += 1
+        # Wake every waiting stream(); they check seq themselves
+        self._event.set()
+        self._event.clear()
+
+    # Reads once and stores the result. Returns True if a sample was stored.
+    def sample(self):
+        try:
+            values = self.read()
+        except OSError:
+            self.errors += 1
+            return False
+        for v in values:
+            if v != v:
+                self.errors += 1
+                return False
+        self._push(ticks_ms(), values)
+        return True
+
+    # Producer task: one read every 1/rate_hz seconds on absolute deadlines.
+    async def run(self):
+        self.running = True
+        period = max(1, 1000 // self.rate_hz)
+        deadline = ticks_ms()
+        try:
+            while True:
+                self.sample()
+                deadline = ticks_add(deadline, period)
+                wait = ticks_diff(deadline, ticks_ms())
+                if wait < 0:
+                    # Overran: restart the schedule instead of bursting to catch up
+                    self.overruns += 1
+                    deadline = ticks_ms()
+                    wait = 0
+                await asyncio.sleep(wait / 1000)
+        finally:
+            self.running = False
+
+    # Sample number `seq` as (ticks_ms, value, ...), if it is still in the ring.
+    def get(self, seq):
+        if seq >= self.seq or seq < self.seq - self.capacity or seq < 0:
+            return None
+        slot = seq % self.capacity
+        base = slot * self.width
+        return (self._stamps[slot],) + tuple(self._data[base:base + self.width])
+
+    # Freshest sample as (ticks_ms, value, ...), or None before the first one.
+    def latest(self):
+        return self.get(self.seq - 1)
+
+    # Age of the freshest sample [ms], None before the first one.
+    def age_ms(self):
+        if self.seq == 0:
+            return None
+        return ticks_diff(ticks_ms(), self._stamps[(self.seq - 1) % self.capacity])
+
+    # Async iterator over the samples produced from now on, in order. A consumer that
+    # falls more than `capacity` samples behind skips ahead to the oldest one kept.
+    def stream(self):
+        return _Stream(self)
+
+
+class _Stream(object):
+    def __init__(self, source):
+        self.source = source
+        self.next = source.seq
+        self.skipped = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        source = self.source
+        while self.next >= source.seq:
+            await source._event.wait()
+        oldest = source.seq - source.capacity
+        if self.next < oldest:
+            self.skipped += oldest - self.next
+            self.next = oldest
+        sample = source.get(self.next)
+        self.next += 1
+        return sample
@@ -0,0 +1,111 @@
+# Oversampled, cached potentiometer reading for the speed knob.
+#
+# The RP2040 ADC is noisy (several LSB of noise plus missing codes), and every motion
+# function used to call read_u16() itself, so the duty jittered from tick to tick and
+# the motors were rewritten each time. SpeedInput samples the ADC in the background at
+# sample_hz, averages every `oversample` samples into one value (decimation), and only
+# publishes it when it moved more than `hysteresis` counts away from the published
+# value. Within `hysteresis` of either end it snaps to 0 or 65535, so the knob still
+# reaches a full stop and full speed. read() returns the cached value without
+# touching the ADC:
+#
+#     speed = SpeedInput(26, sample_hz=100, oversample=8)
+#     asyncio.create_task(speed.run())     # or speed.poll() once per tick in a blocking loop
+#     duty = speed.read()                  # 0..65535
+#
+# With the defaults a new value is available every 80 ms, fast enough for a hand on a
+# knob, and the ADC is read 100 times a second instead of once per motion call.
+
+import uasyncio as asyncio
+from machine import ADC, Pin
+from time import ticks_ms, ticks_diff, ticks_add
+
+_FULL = 65535
+
+
+class SpeedInput(object):
+    def __init__(self, pin, sample_hz=100, oversample=8, hysteresis=512):
+        self.adc = ADC(Pin(pin))
+        self.period_ms = max(1, 1000 // sample_hz)
+        self.oversample = oversample
+        self.hysteresis = hysteresis
+        self._acc = 0
+        self._n = 0
+        self._due = ticks_ms()
+        self.samples = 0         # ADC reads
+        self.updates = 0         # published value changes
+        self.held = 0            # averages within the hysteresis band (value kept)
+        self.running = False
+        # Valid value before the first period: one full burst
+        for _ in range(oversample):
+            self._acc += self.adc.read_u16()
+        self.value = self._snap(self._acc // oversample)
+        self._acc = 0
+        self.stamp = ticks_ms()  # ticks_ms of the last published change
+
+    def _snap(self, mean):
+        if mean <= self.hysteresis:
+            return 0
+        if mean >= _FULL - self.hysteresis:
+            return _FULL
+        return mean
+
+    # Takes one ADC sample; returns True when it completed an average.
+    def sample(self):
+        self._acc += self.adc.read_u16()
+        self._n += 1
+        self.samples += 1
+        if self._n < self.oversample:
+            return False
+        mean = self._snap(self._acc // self._n)
+        self._acc = 0
+        self._n = 0
+        diff = mean - self.value
+        if diff == 0:
+            return True
+        if mean == 0 or mean == _FULL or diff > self.hysteresis or diff < -self.hysteresis:
+            self.value = mean
+            self.updates += 1
+            self.stamp = ticks_ms()
+        else:
+            self.held += 1
+        return True
+
+    # For blocking loops: takes the samples that fell due since the last call, at most
+    # one average's worth, and never waits.
+    def poll(self):
+        now = ticks_ms()
+        late = ticks_diff(now, self._due)
+        if late < 0:
+            return
+        n = late // self.period_ms + 1
+        if n > self.oversample:
+            n = self.oversample
+        for _ in range(n):
+            self.sample()
+        self._due = ticks_add(now, self.period_ms)
+
+    # Sampling task: one sample every period_ms on absolute deadlines.
+    async def run(self):
+        self.running = True
+        self._due = ticks_ms()
+        try:
+            while True:
+                self._due = ticks_add(self._due, self.period_ms)
+                wait = ticks_diff(self._due, ticks_ms())
+                if wait > 0:
+                    await asyncio.sleep(wait / 1000)
+                else:
+                    self._due = ticks_ms()
+                    await asyncio.sleep(0)
+                self.sample()
+        finally:
+            self.running = False
+
+    # Cached speed 0..65535.
+    def read(self):
+        return self.value
+
+    def stats(self):
+        return {"value": self.value, "samples": self.samples, "updates": self.updates,
+                "held": self.held, "age_ms": ticks_diff(ticks_ms(), self.stamp)}
@@ -0,0 +1,30 @@
+# Heap allocation measurement shared by the bench scripts.
+
+# Heap bytes allocated per call of func(*args), averaged over n calls.
+# On MicroPython this is gc.mem_alloc() growth with the collector paused, i.e. every
+# allocation the call makes. CPython (host stand-in) frees temporaries immediately, so
+# there the return values are kept alive and the tracemalloc growth is reported instead:
+# it counts what each call leaves behind for the collector, not short-lived temporaries.
+def mem_alloc_per_call(func, *args, n=100):
+    import gc
+    func(*args)  # warm-up
+    if hasattr(gc, "mem_alloc"):
+        gc.collect()
+        gc.disable()
+        try:
+            start = gc.mem_alloc()
+            for _ in range(n):
+                func(*args)
+            return (gc.mem_alloc() - start) / n
+        finally:
+            gc.enable()
+    import tracemalloc
+    keep = [None] * n
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for i in range(n):
+            keep[i] = func(*args)
+        return (tracemalloc.get_traced_memory()[0] - start) / n
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,61 @@
+# Throughput of the NumPy batch angle functions in angles.py against the scalar
+# calculate_angles()/calculate_gforce() called once per sample, and a check that both
+# give the same numbers.
+# Usage: python tools/bench_angles_batch.py [samples]   (default 10,000,000; needs numpy)
+
+import math
+import sys
+import time
+
+import numpy as np
+
+import sim
+
+sim.install()
+
+from angles import calculate_angles, calculate_gforce, calculate_batch  # noqa: E402
+
+SCALAR_SAMPLES = 200000  # the per-sample loop is timed on a slice and extrapolated
+
+
+def logged_accel(n, seed=1):
+    """Synthetic accelerometer log in g: gravity in random directions plus noise."""
+    rng = np.random.default_rng(seed)
+    accel = rng.normal(0.0, 1.0, (n, 3))
+    accel /= np.linalg.norm(accel, axis=1)[:, None]
+    accel += rng.normal(0.0, 0.05, (n, 3))
+    return accel
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    accel = logged_accel(n)
+
+    t0 = time.perf_counter()
+    pitch, roll, yaw, gforce = calculate_batch(accel)
+    batch_s = time.perf_counter() - t0
+    print("batch:  {:>11,} samples in {:7.3f} s  {:>12,.0f} samples/s".format(n, batch_s, n / batch_s))
+
+    m = min(n, SCALAR_SAMPLES)
+    rows = [{"x": float(x), "y": float(y), "z": float(z)} for x, y, z in accel[:m]]
+    t0 = time.perf_counter()
+    scalar = [calculate_angles(d) + (calculate_gforce(d),) for d in rows]
+    scalar_s = time.perf_counter() - t0
+    print("scalar: {:>11,} samples in {:7.3f} s  {:>12,.0f} samples/s  (~{:.0f} s for {:,})".format(
+        m, scalar_s, m / scalar_s, scalar_s / m * n, n))
+    print("speed-up: {:.0f}x".format((scalar_s / m) / (batch_s / n)))
+
+    worst = 0.0
+    exact = 0
+    for i, values in enumerate(scalar):
+        batch = (pitch[i], roll[i], yaw[i], gforce[i])
+        diffs = [abs(a - b) for a, b in zip(values, batch)]
+        worst = max(worst, max(diffs))
+        exact += all(d == 0 for d in diffs)
+    print("scalar vs batch on {:,} samples: {:.1%} bit-identical, max difference {:.3g}".format(
+        m, exact / m, worst))
+    assert worst < 1e-9 and not math.isnan(worst)
+
+
+if __name__ == "__main__":
+    main()
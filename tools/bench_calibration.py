@@ -0,0 +1,93 @@
+# Checks MPU6050 bias calibration against a biased, noisy simulated chip (sim.py):
+# residual bias after calibrate(), the reported quality, a rejected calibration while
+# moving, and how long restoring the saved offsets takes after a power cycle.
+# Usage: python tools/bench_calibration.py [samples]
+
+import os
+import sys
+import tempfile
+import time
+
+import sim
+
+sim.install()
+
+from mpu6050 import MPU6050  # noqa: E402
+
+ACCEL_BIAS = (0.045, -0.031, 0.082)   # g
+GYRO_BIAS = (2.7, -1.4, 0.9)          # deg/s
+NOISE = 6                             # counts
+
+
+def biased_chip():
+    imu = sim.FakeMPU6050(sim.bus)
+    imu.accel_bias = ACCEL_BIAS
+    imu.gyro_bias = GYRO_BIAS
+    imu.noise = NOISE
+    return imu
+
+
+def mean_reading(mpu, n=200):
+    ax = ay = az = gx = gy = gz = 0.0
+    for _ in range(n):
+        accel, temp, gyro = mpu.read_all(g=True)
+        ax += accel["x"]
+        ay += accel["y"]
+        az += accel["z"]
+        gx += gyro["x"]
+        gy += gyro["y"]
+        gz += gyro["z"]
+        time.sleep(0.001)
+    return (ax / n, ay / n, az / n - 1), (gx / n, gy / n, gz / n)
+
+
+def show(label, bias):
+    accel, gyro = bias
+    print("{:<18} accel bias [g]: {:+.4f} {:+.4f} {:+.4f}   gyro bias [deg/s]: {:+.3f} {:+.3f} {:+.3f}".format(
+        label, accel[0], accel[1], accel[2], gyro[0], gyro[1], gyro[2]))
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    path = os.path.join(tempfile.mkdtemp(), "mpu6050_cal.json")
+
+    biased_chip()
+    mpu = MPU6050()
+    mpu.set_sample_rate(1000)
+    show("uncalibrated", mean_reading(mpu))
+
+    t0 = time.perf_counter()
+    report = mpu.calibrate(samples)
+    print("calibrate({}) took {:.0f} ms, stationary={}".format(
+        samples, (time.perf_counter() - t0) * 1000, report["stationary"]))
+    print("  measured accel bias [g]:     " + " ".join("{:+.4f}".format(v) for v in report["accel_bias"]))
+    print("  measured gyro bias [deg/s]:  " + " ".join("{:+.3f}".format(v) for v in report["gyro_bias"]))
+    print("  accel std [g]:               " + " ".join("{:.4f}".format(v) for v in report["accel_std"]))
+    print("  gyro std [deg/s]:            " + " ".join("{:.3f}".format(v) for v in report["gyro_std"]))
+    show("calibrated", mean_reading(mpu))
+    mpu.save_calibration(report, path)
+
+    # Power cycle: the offset registers are lost, the flash file is not
+    sim.bus.devices.clear()
+    biased_chip()
+    mpu = MPU6050()
+    mpu.set_sample_rate(1000)
+    t0 = time.perf_counter()
+    loaded = mpu.load_calibration(path)
+    print("load_calibration took {:.2f} ms, loaded={}".format((time.perf_counter() - t0) * 1000, loaded is not None))
+    show("after reboot", mean_reading(mpu))
+
+    # Moving sensor: high gyro variance, nothing is written
+    sim.bus.devices.clear()
+    imu = biased_chip()
+    imu.source = lambda i: ((0, 0, 16384), 0, ((i % 40) * 400 - 8000, 0, 0))
+    mpu = MPU6050()
+    mpu.set_sample_rate(1000)
+    before = mpu.read_offsets()
+    report = mpu.calibrate(samples)
+    print("moving: stationary={}, gyro std [deg/s] {:.1f}, offsets unchanged={}".format(
+        report["stationary"], max(report["gyro_std"]), mpu.read_offsets() == before))
+
+
+if __name__ == "__main__":
+    main()
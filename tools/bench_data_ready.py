@@ -0,0 +1,48 @@
+# Compares the fixed 10 ms sleep in MPU6050 reads with data-ready driven reads
+# (INT_STATUS polling and INT pin IRQ) against the simulated chip in sim.py.
+# Usage: python tools/bench_data_ready.py [samples]
+
+import sys
+import time
+
+import sim
+
+sim.install()
+imu = sim.FakeMPU6050(sim.bus)
+
+from mpu6050 import MPU6050  # noqa: E402
+
+
+def run(label, mpu, n):
+    mpu.reset_data_ready_stats()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        mpu.read_accel_data()
+    elapsed = time.perf_counter() - t0
+    stats = mpu.data_ready_stats()
+    print("{:<22} {:>7.1f} samples/s  latency from ready: avg {:>6.0f} us  max {:>6} us  timeouts {}".format(
+        label, n / elapsed, stats["avg_us"], stats["max_us"], stats["timeouts"]))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    mpu = MPU6050()
+    # 100 Hz output data rate: DLPF_CFG=1 (1 kHz gyro rate), SMPLRT_DIV=9
+    mpu.i2c.writeto_mem(mpu.addr, 0x1A, bytes([1]))
+    mpu.i2c.writeto_mem(mpu.addr, 0x19, bytes([9]))
+    print("sensor output data rate: {:.0f} Hz".format(imu.sample_rate()))
+
+    run("fixed sleep_ms(10)", mpu, n)
+
+    mpu.enable_data_ready()
+    run("INT_STATUS polling", mpu, n)
+
+    pin = sim.Pin(22, sim.Pin.IN)
+    stop = imu.drive_int_pin(pin)
+    mpu.enable_data_ready(pin)
+    run("INT pin IRQ", mpu, n)
+    stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Measures how long MPU6050 reads block when the sensor drops off the bus, using the
+# simulated chip in sim.py: retry budget, circuit breaker, and recovery once the
+# device answers again.
+# Usage: python tools/bench_errors.py
+
+import time
+
+import sim
+
+sim.install()
+imu = sim.FakeMPU6050(sim.bus)
+
+from mpu6050 import MPU6050, STALE  # noqa: E402
+
+
+def timed_read(mpu):
+    t0 = time.perf_counter()
+    data = mpu.read_accel_data()
+    return data, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    mpu = MPU6050()
+    mpu.enable_data_ready()
+
+    data, ms = timed_read(mpu)
+    print("sensor online:   {:6.2f} ms  stale={}".format(ms, data is STALE))
+
+    del sim.bus.devices[0x68]  # loose wire
+    worst = 0
+    for i in range(6):
+        data, ms = timed_read(mpu)
+        worst = max(worst, ms)
+        print("sensor missing:  {:6.2f} ms  stale={}  breaker={}".format(
+            ms, data is STALE, mpu.error_stats()["breaker"]))
+    print("worst-case read while missing: {:.2f} ms (retry budget {} ms)".format(worst, mpu.retry_budget_ms))
+
+    sim.bus.attach(0x68, imu)  # wire reconnected
+    time.sleep(mpu.breaker.cooldown_ms / 1000)
+    data, ms = timed_read(mpu)
+    print("after cooldown:  {:6.2f} ms  stale={}".format(ms, data is STALE))
+    print(mpu.error_stats())
+
+    t0 = time.perf_counter()
+    missing = MPU6050(addr=0x69)
+    print("boot with sensor missing took {:.0f} ms, read -> stale={}".format(
+        (time.perf_counter() - t0) * 1000, missing.read_accel_data() is STALE))
+
+
+if __name__ == "__main__":
+    main()
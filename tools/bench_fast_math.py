@@ -0,0 +1,99 @@
+# Accuracy, speed and heap cost of the FAST_MATH path in angles.py
+# (calculate_angles_fast) against the exact calculate_angles().
+# Runs on the host, or copied to the board next to angles.py together with alloc.py
+# (no sim needed there): timings on CPython do not predict MicroPython, where every
+# float operation the fast path saves is also a heap allocation saved.
+# Usage: python tools/bench_fast_math.py [samples]
+
+import math
+import random
+import sys
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:
+    import sim
+    sim.install()
+    from time import ticks_us, ticks_diff
+
+import angles  # noqa: E402
+from angles import calculate_angles_exact, calculate_angles_fast  # noqa: E402
+from alloc import mem_alloc_per_call  # noqa: E402
+
+
+def wrap(d):
+    # |d| folded into [0, 180]; no offset arithmetic, which would round away ulp-size errors
+    d = abs(d) % 360
+    return 360 - d if d > 180 else d
+
+
+def sphere(steps):
+    """Accelerometer vectors over the whole input range: directions on a grid over the
+    sphere (poles, axes and every octant included) at magnitudes from 1e-3 to 1e4 g,
+    plus the zero vector."""
+    rows = [{"x": 0.0, "y": 0.0, "z": 0.0}]
+    for r in (1e-3, 0.5, 1.0, 9.81, 1e4):
+        for i in range(steps + 1):
+            theta = math.pi * i / steps
+            for j in range(2 * steps):
+                phi = math.pi * j / steps
+                rows.append({"x": r * math.sin(theta) * math.cos(phi),
+                             "y": r * math.sin(theta) * math.sin(phi),
+                             "z": r * math.cos(theta)})
+    return rows
+
+
+def random_accel(n, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        x = rng.uniform(-1, 1)
+        y = rng.uniform(-1, 1)
+        z = rng.uniform(-1, 1)
+        rows.append({"x": x, "y": y, "z": z})
+    return rows
+
+
+def angle_errors(rows):
+    worst = [0.0, 0.0, 0.0]
+    total = [0.0, 0.0, 0.0]
+    for d in rows:
+        exact = calculate_angles_exact(d)
+        fast = calculate_angles_fast(d)
+        for i in range(3):
+            e = wrap(fast[i] - exact[i])
+            worst[i] = max(worst[i], e)
+            total[i] += e
+    return worst, [t / len(rows) for t in total]
+
+
+def timed(func, rows):
+    t0 = ticks_us()
+    for d in rows:
+        func(d)
+    return ticks_diff(ticks_us(), t0) / len(rows)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print("angles.FAST_MATH = {} (calculate_angles is the {} version)".format(
+        angles.FAST_MATH, "fast" if angles.calculate_angles is calculate_angles_fast else "exact"))
+
+    rows = sphere(90)
+    worst, mean = angle_errors(rows)
+    print("fast vs exact over {} vectors, 1e-3..1e4 g in every direction:".format(len(rows)))
+    for i, name in enumerate(("pitch", "roll", "yaw")):
+        print("  {:<5} max error {:.2e} deg, mean {:.2e} deg".format(name, worst[i], mean[i]))
+
+    rows = random_accel(n)
+    exact_us = min(timed(calculate_angles_exact, rows) for _ in range(3))
+    fast_us = min(timed(calculate_angles_fast, rows) for _ in range(3))
+    print("calculate_angles exact: {:.2f} us/sample, fast: {:.2f} us/sample ({:.2f}x)".format(
+        exact_us, fast_us, exact_us / fast_us))
+    d = rows[0]
+    print("heap per call: exact {:.0f} B, fast {:.0f} B".format(
+        mem_alloc_per_call(calculate_angles_exact, d), mem_alloc_per_call(calculate_angles_fast, d)))
+
+
+if __name__ == "__main__":
+    main()
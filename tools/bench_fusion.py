@@ -0,0 +1,107 @@
+# Compares the attitude filters in fusion.py with the accelerometer-only angles plus the
+# SMOOTHING_ALPHA low-pass main.py used before, on a synthetic tilt motion with motor
+# vibration on the accelerometer and noise + bias on the gyroscope (no hardware needed).
+# Reports the RMS pitch error, the lag behind the true angle (phase delay at the motion
+# frequency) and the cost per update.
+# Usage: python tools/bench_fusion.py [seconds]
+
+import math
+import random
+import sys
+import time
+
+import sim
+
+sim.install()
+
+from fusion import AttitudeFilter  # noqa: E402
+
+RATE_HZ = 100
+VIBRATION_G = 0.3
+GYRO_NOISE_DPS = 0.5
+GYRO_BIAS_DPS = 0.3
+MOTION_HZ = 0.4          # frequency of the true tilt motion
+
+
+def motion(t):
+    """True pitch [deg] and its rate [deg/s]: slow tilts of +-20 deg."""
+    w = 2 * math.pi * MOTION_HZ
+    return 20 * math.sin(w * t), 20 * w * math.cos(w * t)
+
+
+def samples(seconds, rng):
+    for i in range(int(seconds * RATE_HZ)):
+        t = i / RATE_HZ
+        angle, rate = motion(t)
+        a = math.radians(angle)
+        accel = {"x": rng.gauss(0, VIBRATION_G),
+                 "y": math.sin(a) + rng.gauss(0, VIBRATION_G),
+                 "z": math.cos(a) + rng.gauss(0, VIBRATION_G)}
+        gyro = {"x": rate + GYRO_BIAS_DPS + rng.gauss(0, GYRO_NOISE_DPS),
+                "y": GYRO_BIAS_DPS + rng.gauss(0, GYRO_NOISE_DPS),
+                "z": GYRO_BIAS_DPS + rng.gauss(0, GYRO_NOISE_DPS)}
+        yield angle, accel, gyro
+
+
+def _phase(series):
+    """Phase [rad] of the MOTION_HZ component of `series`, over whole periods."""
+    w = 2 * math.pi * MOTION_HZ / RATE_HZ
+    n = len(series) - len(series) % round(RATE_HZ / MOTION_HZ)
+    s = sum(series[i] * math.sin(w * i) for i in range(n))
+    c = sum(series[i] * math.cos(w * i) for i in range(n))
+    return math.atan2(c, s)
+
+
+def lag_ms(truth, estimate):
+    """Delay of `estimate` behind `truth` [ms] from the phase difference at the motion
+    frequency. It is not limited to whole samples, and summing over whole periods
+    averages the vibration noise and a constant offset (gyro bias) out; a best-fit
+    shift of the noisy series does neither."""
+    d = _phase(truth) - _phase(estimate)
+    d = (d + math.pi) % (2 * math.pi) - math.pi
+    return d / (2 * math.pi * MOTION_HZ) * 1000
+
+
+def run(label, estimator, seconds):
+    rng = random.Random(1)
+    truth, estimate = [], []
+    elapsed = 0.0
+    for angle, accel, gyro in samples(seconds, rng):
+        t0 = time.perf_counter()
+        pitch = estimator(accel, gyro)
+        elapsed += time.perf_counter() - t0
+        truth.append(angle)
+        estimate.append(pitch)
+    skip = RATE_HZ  # let every filter settle for one second
+    rms = math.sqrt(sum((a - b) ** 2 for a, b in zip(truth[skip:], estimate[skip:])) / (len(truth) - skip))
+    print("{:<34} rms error {:5.2f} deg   lag {:5.1f} ms   {:6.1f} us/update".format(
+        label, rms, lag_ms(truth[skip:], estimate[skip:]), elapsed / len(truth) * 1e6))
+
+
+def accel_lowpass(alpha):
+    state = [None]
+
+    def estimate(accel, gyro):
+        # Pitch as GY25_data.calculate_angles() computes it
+        pitch = math.degrees(math.atan2(accel["y"], math.sqrt(accel["x"] ** 2 + accel["z"] ** 2)))
+        state[0] = pitch if state[0] is None else alpha * pitch + (1 - alpha) * state[0]
+        return state[0]
+    return estimate
+
+
+def fused(mode):
+    f = AttitudeFilter(mode)
+    return lambda accel, gyro: f.update(accel, gyro, 1 / RATE_HZ)[0]
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    run("accel only", accel_lowpass(1.0), seconds)
+    run("accel + low-pass alpha=0.4", accel_lowpass(0.4), seconds)
+    run("accel + low-pass alpha=0.8", accel_lowpass(0.8), seconds)
+    run("complementary (quaternion)", fused("complementary"), seconds)
+    run("madgwick (quaternion)", fused("madgwick"), seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Exercises the GY-25 UART driver (gy25.py) against the simulated module in sim.py:
+# decoding cost per frame, heap use per poll, and resynchronisation after line noise
+# and a lost byte.
+# Usage: python tools/bench_gy25.py [frames]
+
+import sys
+import time
+
+import sim
+
+sim.install()
+
+from gy25 import GY25  # noqa: E402
+from alloc import mem_alloc_per_call  # noqa: E402
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    uart = sim.FakeUART(rxbuf=frames * 8 + 64)
+    module = sim.FakeGY25(uart, rate_hz=100)
+    module.source = lambda i: ((i % 36000) / 100 - 180, (i % 900) / 10 - 45, -((i % 600) / 10 - 30))
+    gy = GY25(uart, continuous=False)  # frames are queued by hand below
+
+    # Decoding: queue `frames` frames, then time one poll() that parses them all
+    for i in range(frames):
+        uart.receive(module.frame(i))
+    t0 = time.perf_counter()
+    n = gy.poll()
+    elapsed = time.perf_counter() - t0
+    print("decoded {} frames: {:.2f} us/frame".format(n, elapsed / n * 1e6))
+    expect = module.source(frames - 1)
+    print("last frame (pitch, roll, yaw) = ({:.2f}, {:.2f}, {:.2f}), expected ({:.2f}, {:.2f}, {:.2f})".format(
+        gy.raw[1] / 100, gy.raw[2] / 100, gy.raw[0] / 100, expect[1], expect[2], expect[0]))
+
+    def poll_two_frames():
+        uart.receive(module.frame(1))
+        uart.receive(module.frame(2))
+        return gy.poll()
+    print("heap per poll of 2 frames: {:.1f} B".format(mem_alloc_per_call(poll_two_frames, n=200)))
+
+    # Resync: noise with a fake header, then a frame with a byte lost
+    good = gy.frames
+    resyncs = gy.resyncs
+    uart.receive(bytes([0x12, 0xAA, 0x34, 0x55, 0xAA]))
+    broken = module.frame(7)
+    del broken[3]
+    uart.receive(broken)
+    for i in range(3):
+        uart.receive(module.frame(100 + i))
+    gy.poll()
+    print("after noise + lost byte: {} good frames, {} bytes skipped, last pitch {:.2f} (expected {:.2f})".format(
+        gy.frames - good, gy.resyncs - resyncs, gy.raw[1] / 100, module.source(102)[1]))
+
+    # Continuous mode on the module's own timeline, read at 50 Hz
+    uart = sim.FakeUART()
+    module = sim.FakeGY25(uart, rate_hz=100)
+    module.angles = (12.5, -3.25, 7.0)
+    gy = GY25(uart)
+    time.sleep(0.1)
+    print("continuous mode: read_angles() = {}, {}".format(gy.read_angles(), gy.stats()))
+
+
+if __name__ == "__main__":
+    main()
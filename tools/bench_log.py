@@ -0,0 +1,101 @@
+# Compares the old per-tick print() calls with log.Log: cost per call for a debug line
+# kept in the ring, a repeated warning folded into its entry, and the print() of the
+# same line and of a sensor dict repr; then checks folding, echo rate limiting and the
+# ring wrap-around.
+# Usage: python tools/bench_log.py
+
+import io
+import sys
+import time
+
+import sim
+
+sim.install()
+
+import log  # noqa: E402
+
+N = 20000
+SENSOR = {"posX": 12.5, "posY": -3.25, "posZ": 0.0, "gyroX": 0.12, "gyroY": -0.5, "gyroZ": 1.5}
+
+
+def per_call_us(fn):
+    t0 = time.perf_counter()
+    for i in range(N):
+        fn(i)
+    return (time.perf_counter() - t0) / N * 1e6
+
+
+def check():
+    out = io.StringIO()
+    real, sys.stdout = sys.stdout, out
+    try:
+        lg = log.Log(size=8, repeat_ms=1000)
+        for i in range(50):
+            lg.warning("main", "Sonar stale: %s", {"pings": i})
+        assert lg.stats()["buffered"] == 1 and lg.folded == 49, lg.stats()
+        assert out.getvalue().count("Sonar stale") == 1, "repeats within repeat_ms must not echo"
+        assert "(x50)" in list(lg.lines())[0] and "'pings': 49" in list(lg.lines())[0]
+        # Different info arguments from one call site are separate entries
+        lg.info("motion", "Action: %s", "forward")
+        lg.info("motion", "Action: %s", "stop")
+        lg.info("motion", "Action: %s", "stop")
+        lines = list(lg.lines())
+        assert len(lines) == 3 and lines[-1].endswith("Action: stop (x2)"), lines
+        # Debug is stored but not echoed; below `level` it is not stored at all
+        echoed = lg.echoed
+        lg.debug("main", "Action: Moving forward")
+        assert lg.echoed == echoed and lg.stats()["buffered"] == 4
+        lg.level = log.INFO
+        lg.debug("main", "Action: Moving backward")
+        assert lg.stats()["buffered"] == 4
+        # Wrap-around keeps the newest entries, oldest first
+        for i in range(20):
+            lg.error("imu", "error %d", i) if i % 2 else lg.info("imu", "info %d", i)
+        lines = list(lg.lines())
+        assert len(lines) == 8 and lines[0].endswith("info 12") and lines[-1].endswith("error 19"), lines
+        assert lg.dropped == 16, lg.stats()
+        # The module switch turns every log.debug() call site on and off
+        logged = log.default.logged
+        log.set_debug(False)
+        log.debug("main", "Action: Moving forward")
+        assert log.default.logged == logged
+        log.set_debug(True)
+        log.debug("main", "Action: Moving forward")
+        assert log.default.logged == logged + 1
+    finally:
+        sys.stdout = real
+
+
+def main():
+    check()
+    sink = io.StringIO()
+    real, sys.stdout = sys.stdout, sink
+    try:
+        lg = log.Log()
+        debug_us = per_call_us(lambda i: lg.debug("main", "Action: Moving forward"))
+        fresh = log.Log()
+        new_us = per_call_us(lambda i: fresh.debug("server", "Sensor data received: %s", SENSOR) or fresh.debug("main", "x"))
+        warn_us = per_call_us(lambda i: lg.warning("main", "Obstacle detected! Distance: %.1f cm", 12.0 + i % 5))
+        off = log.Log(level=log.INFO)
+        off_us = per_call_us(lambda i: off.debug("main", "Action: Moving forward"))
+        log.set_debug(False)
+        switch_us = per_call_us(lambda i: log.debug("main", "Action: Moving forward"))
+        log.set_debug(True)
+        print_us = per_call_us(lambda i: print("Action: Moving forward"))
+        dict_us = per_call_us(lambda i: print("Sensor data received:", SENSOR))
+    finally:
+        sys.stdout = real
+    print("per call, host CPython ({} calls, print() into a StringIO; a UART costs far more):".format(N))
+    print("  log.debug, repeat folded             {:6.2f} us".format(debug_us))
+    print("  log.debug x2, new ring entries       {:6.2f} us".format(new_us))
+    print("  log.warning, folded, echo 1/s        {:6.2f} us".format(warn_us))
+    print("  log.debug below level                {:6.2f} us".format(off_us))
+    print("  log.debug, set_debug(False) / -O     {:6.2f} us".format(switch_us))
+    print("  print('Action: ...')                 {:6.2f} us".format(print_us))
+    print("  print('Sensor data received:', dict) {:6.2f} us".format(dict_us))
+    print("log stats:", lg.stats())
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
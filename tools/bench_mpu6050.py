@@ -0,0 +1,44 @@
+# Benchmarks MPU6050 sample paths on the host against the simulated chip in sim.py.
+# Usage: python tools/bench_mpu6050.py [samples]
+
+import sys
+import time
+from array import array
+
+import sim
+
+sim.install()
+imu = sim.FakeMPU6050(sim.bus)
+imu.set_sample(accel=(1200, -800, 16000), temp=-2000, gyro=(131, -262, 50))
+
+from mpu6050 import MPU6050  # noqa: E402
+from alloc import mem_alloc_per_call  # noqa: E402
+
+
+def bench(label, func, n, *args):
+    bus = sim.bus
+    tx0 = bus.transactions
+    t0 = time.perf_counter()
+    for _ in range(n):
+        func(*args)
+    elapsed = time.perf_counter() - t0
+    tx = (bus.transactions - tx0) / n
+    alloc = mem_alloc_per_call(func, *args, n=n)
+    print("{:<36} {:>10.1f} us/sample  {:>4.1f} I2C transactions/sample  {:>7.1f} B/sample".format(
+        label, elapsed / n * 1e6, tx, alloc))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    mpu = MPU6050()
+
+    def two_calls():
+        return mpu.read_accel_data(), mpu.read_gyro_data()
+
+    bench("read_accel_data + read_gyro_data", two_calls, n)
+    bench("read_all (14-byte burst)", mpu.read_all, n)
+    bench("read_raw_into (allocation-free)", mpu.read_raw_into, n, array("h", [0] * 7))
+
+
+if __name__ == "__main__":
+    main()
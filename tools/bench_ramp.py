@@ -0,0 +1,78 @@
+# Traces the motor outputs of Motors with and without the slew-rate ramp on the
+# simulated pins (sim.py) for a start, a reversal and a stop: largest duty jump per
+# 10 ms (a proxy for the inrush current), time to reach the target, how long the
+# direction pins sit at zero during the reversal, and what apply() costs the caller.
+# Usage: python tools/bench_ramp.py
+
+import asyncio
+import time
+
+import sim
+
+sim.install()
+
+from motors import Motors  # noqa: E402
+
+SLEW = 262140          # duty units per second: 0 -> full in 250 ms
+FULL = 65535
+
+
+def signed(motors):
+    # Left motor as seen on the outputs: duty with the sign of the direction pins
+    fwd, back = sim.pins[4].value(), sim.pins[5].value()
+    duty = sim.pwms[8].duty_u16()
+    return duty if fwd else -duty if back else 0
+
+
+async def trace(motors, commands, sample_ms=2):
+    # commands: list of (at_ms, action); returns [(ms, signed left duty)]
+    start = time.perf_counter()
+    samples = []
+    pending = list(commands)
+    end_ms = commands[-1][0] + 400
+    while True:
+        now = (time.perf_counter() - start) * 1000
+        while pending and pending[0][0] <= now:
+            motors.apply(pending[0][1], FULL, FULL)
+            pending.pop(0)
+        samples.append((now, signed(motors)))
+        if now > end_ms:
+            return samples
+        await asyncio.sleep(sample_ms / 1000)
+
+
+def analyse(label, samples, commands):
+    worst = 0
+    for i, (t, d) in enumerate(samples):
+        j = i
+        while j + 1 < len(samples) and samples[j + 1][0] - t <= 10:
+            j += 1
+        worst = max(worst, abs(samples[j][1] - d))
+    reverse_at = commands[1][0]
+    settle = next((t - reverse_at for t, d in samples if t >= reverse_at and d == -FULL), None)
+    zero = [t for t, d in samples if t >= reverse_at and d == 0 and t < reverse_at + (settle or 0)]
+    print("{:<10} max duty jump per 10 ms {:6d} | reversal: full reverse after {:6.1f} ms, "
+          "{:4.1f} ms at zero".format(label, worst, settle or -1, (zero[-1] - zero[0]) if zero else 0.0))
+
+
+async def main():
+    commands = [(0, "forward"), (400, "backward"), (800, "stop")]
+    for label, slew in (("no ramp", None), ("ramp", SLEW)):
+        sim.pins.clear()
+        motors = Motors(4, 5, 6, 7, 8, 9, slew=slew)
+        task = asyncio.create_task(motors.run())
+        samples = await trace(motors, commands)
+        stop_ms = next((t - commands[2][0] for t, d in samples if t >= commands[2][0] and d == 0), None)
+        analyse(label, samples, commands)
+        t0 = time.perf_counter()
+        for i in range(10000):
+            motors.apply("forward" if i & 1 else "backward", FULL, FULL)
+        apply_us = (time.perf_counter() - t0) / 10000 * 1e6
+        print("{:<10} stop reached after {:.1f} ms, apply() {:.1f} us per call, telemetry {}".format(
+            "", stop_ms, apply_us, motors.duties()))
+        task.cancel()
+        await asyncio.sleep(0.02)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+# Micro-benchmark of the per-sample unit conversion in mpu6050.py (no I2C involved):
+# the original range lookup + divisions, the cached float factors and the
+# fixed-point integer path.
+# Usage: python tools/bench_scaling.py [samples]
+
+import sys
+import time
+from array import array
+
+import sim
+
+sim.install()
+sim.FakeMPU6050(sim.bus)
+
+import mpu6050  # noqa: E402
+from mpu6050 import MPU6050  # noqa: E402
+
+
+def convert_original(mpu, raw, g=False):
+    # Conversion as read_accel_data() did it before scale caching
+    accel_range = mpu._accel_range
+    if accel_range == mpu6050._ACC_RNG_2G:
+        scaler = mpu6050._ACC_SCLR_2G
+    elif accel_range == mpu6050._ACC_RNG_4G:
+        scaler = mpu6050._ACC_SCLR_4G
+    elif accel_range == mpu6050._ACC_RNG_8G:
+        scaler = mpu6050._ACC_SCLR_8G
+    else:
+        scaler = mpu6050._ACC_SCLR_16G
+    x = raw["x"] / scaler
+    y = raw["y"] / scaler
+    z = raw["z"] / scaler
+    if g is False:
+        x = x * mpu6050._GRAVITIY_MS2
+        y = y * mpu6050._GRAVITIY_MS2
+        z = z * mpu6050._GRAVITIY_MS2
+    return {"x": x, "y": y, "z": z}
+
+
+def convert_cached(mpu, raw, g=False):
+    k = mpu._acc_g if g is True else mpu._acc_ms2
+    return {"x": raw["x"] * k, "y": raw["y"] * k, "z": raw["z"] * k}
+
+
+def convert_fixed(mpu, out):
+    shift = mpu._acc_shift
+    out[0] = (out[0] * 1000) >> shift
+    out[1] = (out[1] * 1000) >> shift
+    out[2] = (out[2] * 1000) >> shift
+
+
+def bench(label, func, n, *args):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        func(*args)
+    print("{:<28} {:>8.3f} us/sample".format(label, (time.perf_counter() - t0) / n * 1e6))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    mpu = MPU6050()
+    mpu.set_accel_range(mpu6050._ACC_RNG_8G)
+    raw = {"x": 1200, "y": -800, "z": 4000}
+    out = array("i", [1200, -800, 4000, 0, 0, 0, 0])
+
+    bench("range lookup + division", convert_original, n, mpu, raw)
+    bench("cached factor", convert_cached, n, mpu, raw)
+    bench("fixed point (milli-g)", convert_fixed, n, mpu, out)
+
+
+if __name__ == "__main__":
+    main()
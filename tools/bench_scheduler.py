@@ -0,0 +1,67 @@
+# Compares the old loop pacing (work, then sleep(0.05)) with scheduler.FixedRate under
+# a variable workload like the control loop's (prints, I2C retries, an occasional long
+# melody or manoeuvre): achieved period, drift over the run, and the FixedRate counters.
+# Usage: python tools/bench_scheduler.py [iterations]
+
+import asyncio
+import random
+import sys
+import time
+
+import sim
+
+sim.install()
+
+from scheduler import FixedRate  # noqa: E402
+
+PERIOD_MS = 50
+
+
+def workload(rng):
+    # 2..20 ms of blocking work, 1 in 25 iterations a 70 ms spike (overrun)
+    if rng.random() < 0.04:
+        return 70
+    return rng.uniform(2, 20)
+
+
+async def sleep_after(n, seed):
+    rng = random.Random(seed)
+    starts = []
+    for _ in range(n):
+        starts.append(time.perf_counter())
+        time.sleep(workload(rng) / 1000)
+        await asyncio.sleep(PERIOD_MS / 1000)
+    return starts, None
+
+
+async def fixed_rate(n, seed, skip_missed):
+    rng = random.Random(seed)
+    rate = FixedRate(PERIOD_MS, skip_missed=skip_missed)
+    starts = []
+    for _ in range(n):
+        await rate.tick()
+        starts.append(time.perf_counter())
+        time.sleep(workload(rng) / 1000)
+    return starts, rate.stats()
+
+
+def report(label, starts, stats):
+    periods = [(b - a) * 1000 for a, b in zip(starts, starts[1:])]
+    mean = sum(periods) / len(periods)
+    drift = (starts[-1] - starts[0]) * 1000 - PERIOD_MS * (len(starts) - 1)
+    print("{:<28} mean period {:6.1f} ms, min {:5.1f}, max {:6.1f}, drift after {} ticks {:+8.0f} ms".format(
+        label, mean, min(periods), max(periods), len(starts), drift))
+    if stats:
+        print("{:<28} overruns {overruns}, skipped {skipped}, wcet {wcet_us} us, "
+              "jitter max {max_jitter_us} us mean {mean_jitter_us} us".format("", **stats))
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    report("sleep(0.05) after work", *(await sleep_after(n, 1)))
+    report("FixedRate skip_missed=True", *(await fixed_rate(n, 1, True)))
+    report("FixedRate skip_missed=False", *(await fixed_rate(n, 1, False)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+# Compares reading the speed potentiometer with one read_u16() per motion call against
+# speed_input.SpeedInput on a simulated noisy ADC (sim.py): spread of the duty with the
+# knob held still, how many distinct duties reach the motors, step response when the
+# knob is turned, and the cost of one read.
+# Usage: python tools/bench_speed_input.py
+
+import asyncio
+import random
+import statistics
+import time
+
+import sim
+
+sim.install()
+
+from speed_input import SpeedInput  # noqa: E402
+
+POT_PIN = 26
+TICK_MS = 50
+NOISE = 80               # counts (u16) rms, about 1.3 LSB of the 12-bit converter
+SPIKE = 1024             # occasional code error
+
+
+class NoisyKnob:
+    # Replaces read_u16() of every simulated ADC, including ones created later
+    def __init__(self, seed=1):
+        self.level = 30000
+        self.rng = random.Random(seed)
+        knob = self
+        sim.ADC.read_u16 = lambda adc: knob.read_u16()
+
+    def read_u16(self):
+        v = self.level + self.rng.gauss(0, NOISE)
+        if self.rng.random() < 0.01:
+            v += SPIKE if self.rng.random() < 0.5 else -SPIKE
+        return max(0, min(65535, int(v)))
+
+
+def report(label, duties, step_at, target):
+    still = duties[:step_at]
+    settle = next((i for i, d in enumerate(duties[step_at:]) if abs(d - target) <= 600), None)
+    print("{:<22} knob still: stdev {:6.1f}, range {:5d}, {:3d} distinct duties | step: within 600 after {}".format(
+        label, statistics.pstdev(still), max(still) - min(still), len(set(duties)),
+        "{} ms".format(settle * TICK_MS) if settle is not None else "never"))
+
+
+async def control_loop(read, knob, ticks=80, step_at=40):
+    duties = []
+    for i in range(ticks):
+        if i == step_at:
+            knob.level = 50000
+        duties.append(read())
+        await asyncio.sleep(TICK_MS / 1000)
+    return duties
+
+
+async def main():
+    knob = NoisyKnob()
+    report("read_u16() per call", await control_loop(knob.read_u16, knob), 40, 50000)
+
+    knob = NoisyKnob()
+    speed = SpeedInput(POT_PIN)
+    task = asyncio.create_task(speed.run())
+    duties = await control_loop(speed.read, knob)
+    task.cancel()
+    report("SpeedInput.run()", duties, 40, 50000)
+    print("{:<22} {}".format("", speed.stats()))
+
+    knob = NoisyKnob()
+    speed = SpeedInput(POT_PIN)
+
+    def polled():
+        speed.poll()
+        return speed.read()
+    report("SpeedInput.poll()", await control_loop(polled, knob), 40, 50000)
+    print("{:<22} {}".format("", speed.stats()))
+
+    n = 100000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        speed.read()
+    print("read(): {:.2f} us per call, no ADC access".format((time.perf_counter() - t0) / n * 1e6))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
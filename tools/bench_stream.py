@@ -0,0 +1,75 @@
+# Measures how long the asyncio event loop is blocked by sensor reading, on the
+# simulated chip in sim.py: a 5 ms ticker task runs next to either the blocking
+# GY25_data.main() loop that main.py used, or the SensorStream producer of
+# GY25_data.start_stream() with a consumer polling latest().
+# Usage: python tools/bench_stream.py [seconds]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import sim
+
+sim.install()
+sim.FakeMPU6050(sim.bus)
+os.chdir(tempfile.mkdtemp())  # GY25_data saves its calibration file in the working directory
+
+import GY25_data  # noqa: E402
+
+TICK_MS = 5
+
+
+async def ticker(stats, seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK_MS / 1000)
+        late = (time.perf_counter() - t0) * 1000 - TICK_MS
+        stats["worst"] = max(stats["worst"], late)
+        stats["ticks"] += 1
+
+
+async def idle(stats, seconds):
+    await asyncio.sleep(seconds)
+
+
+async def blocking_consumer(stats, seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        GY25_data.main()
+        stats["samples"] += 1
+        await asyncio.sleep(0.05)
+
+
+async def stream_consumer(stats, seconds):
+    stream = GY25_data.start_stream()
+    end = time.perf_counter() + seconds
+    worst_age = 0
+    while time.perf_counter() < end:
+        if stream.latest() is not None:
+            worst_age = max(worst_age, stream.age_ms())
+        await asyncio.sleep(0.05)
+    stats["samples"] = stream.seq
+    stats["age"] = worst_age
+    stream.errors and print("  read errors:", stream.errors)
+
+
+async def run(label, consumer, seconds):
+    stats = {"worst": 0.0, "ticks": 0, "samples": 0}
+    await asyncio.gather(ticker(stats, seconds), consumer(stats, seconds))
+    extra = "  worst sample age {} ms".format(stats["age"]) if "age" in stats else ""
+    print("{:<28} ticker worst lateness {:6.1f} ms  {:3d} samples{}".format(
+        label, stats["worst"], stats["samples"], extra))
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    asyncio.run(run("no sensor (host baseline)", idle, seconds))
+    asyncio.run(run("blocking GY25_data.main()", blocking_consumer, seconds))
+    asyncio.run(run("SensorStream producer", stream_consumer, seconds))
+
+
+if __name__ == "__main__":
+    main()
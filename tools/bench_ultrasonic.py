@@ -0,0 +1,140 @@
+# Compares the blocking time_pulse_us() ranging with the IRQ-driven Ultrasonic task on
+# the simulated HC-SR04 (sim.py): how long each blocks the asyncio loop, the distance
+# error, and the timeout path when nothing is in range. Then checks the median filter
+# against a spurious and a missed echo, and the ping rate at different motor speeds.
+# Usage: python tools/bench_ultrasonic.py
+
+import asyncio
+import time
+
+import sim
+
+sim.install()
+
+import machine  # noqa: E402
+from ultrasonic import Ultrasonic  # noqa: E402
+
+TRIG = 28
+ECHO = 27
+
+
+def blocking_distance(trig, echo):
+    # The old get_distance() from main.py
+    trig.value(0)
+    time.sleep_us(2)
+    trig.value(1)
+    time.sleep_us(10)
+    trig.value(0)
+    duration = machine.time_pulse_us(echo, 1, 30000)
+    if duration < 0:
+        return None
+    return duration / 58.0
+
+
+async def lateness(duration_s, period_s=0.005):
+    # Worst delay of a 5 ms ticker: how long other code held the event loop
+    worst = 0.0
+    end = time.perf_counter() + duration_s
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        await asyncio.sleep(period_s)
+        worst = max(worst, time.perf_counter() - t0 - period_s)
+    return worst * 1000
+
+
+async def blocking_loop(trig, echo, out):
+    while True:
+        out.append(blocking_distance(trig, echo))
+        await asyncio.sleep(0.05)
+
+
+async def measure(label, cm):
+    if cm is None:
+        sim.echo_us.pop(ECHO, None)
+    else:
+        sim.echo_us[ECHO] = int(cm * 58)
+
+    trig = machine.Pin(TRIG, machine.Pin.OUT)
+    echo = machine.Pin(ECHO, machine.Pin.IN)
+    readings = []
+    task = asyncio.create_task(blocking_loop(trig, echo, readings))
+    late_blocking = await lateness(1.0)
+    task.cancel()
+
+    sonar = Ultrasonic(TRIG, ECHO)
+    sim.FakeHCSR04(TRIG, ECHO)
+    task = asyncio.create_task(sonar.run())
+    late_irq = await lateness(1.0)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        d = sonar.read()
+    read_us = (time.perf_counter() - t0) * 1000
+    task.cancel()
+    await asyncio.sleep(0.05)
+
+    if cm is None:
+        error = "reads None: blocking {}, irq {} (timeouts {}/{})".format(
+            readings[-1] is None, d is None, sonar.timeouts, sonar.pings)
+    else:
+        error = "error: blocking {:+.2f} cm, irq {:+.2f} cm".format(readings[-1] - cm, d - cm)
+    print("{:<14} loop held: blocking {:5.1f} ms, irq {:4.1f} ms | read() {:.2f} us | {}".format(
+        label, late_blocking, late_irq, read_us, error))
+
+
+async def scripted(sonar, values):
+    # One ping per value (cm, None: no echo); returns (raw, filtered, confidence) per ping
+    rows = []
+    for cm in values:
+        if cm is None:
+            sim.echo_us.pop(ECHO, None)
+        else:
+            sim.echo_us[ECHO] = int(cm * 58)
+        raw = await sonar.ping()
+        rows.append((raw, sonar.distance, sonar.confidence))
+        await asyncio.sleep(0.045)     # let a 38 ms no-echo pulse end before the next trigger
+    return rows
+
+
+def fmt(v):
+    return "  -- " if v is None else "{:4.0f}".format(v)
+
+
+async def filters():
+    sonar = Ultrasonic(TRIG, ECHO)
+    sim.FakeHCSR04(TRIG, ECHO)
+    for label, values in (("spurious echo", [100, 100, 100, 12, 100, 100]),
+                          ("missed echo", [15, 15, 15, None, 15, 15]),
+                          ("obstacle", [100, 100, 100, 15, 15, 15])):
+        rows = await scripted(sonar, values)
+        print("{:<14} raw:{}  median:{}  confidence:{}".format(
+            label, "".join(fmt(r[0]) for r in rows), "".join(fmt(r[1]) for r in rows),
+            "".join(" {:.2f}".format(r[2]) for r in rows)))
+
+
+async def rates():
+    sim.echo_us[ECHO] = 5800
+    sonar = Ultrasonic(TRIG, ECHO)
+    sim.FakeHCSR04(TRIG, ECHO)
+    task = asyncio.create_task(sonar.run())
+    for speed in (0.0, 0.5, 1.0):
+        sonar.set_speed(speed)
+        await asyncio.sleep(0.3)
+        before = sonar.pings
+        await asyncio.sleep(2.0)
+        print("speed {:.1f}: period() {} ms, {:.1f} pings/s".format(
+            speed, sonar.period(), (sonar.pings - before) / 2.0))
+    task.cancel()
+    await asyncio.sleep(0.05)
+
+
+async def main():
+    print("idle loop (host scheduling jitter): {:.1f} ms".format(await lateness(1.0)))
+    await measure("obstacle 20cm", 20.0)
+    await measure("road 150cm", 150.0)
+    await measure("nothing", None)
+    await filters()
+    await rates()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
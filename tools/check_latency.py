@@ -0,0 +1,140 @@
+# Latency check for main.py on the simulated hardware in sim.py: tilts the car
+# forward, then to the right, and asserts that the direction change reaches the motor
+# pins and PWM outputs within one control-loop period of the sensor sample that
+# carries it, i.e. that melodies and other awaits no longer hold up the loop, and that
+# the motor outputs and movement sounds are only touched on action transitions.
+# Usage: python tools/check_latency.py
+
+import asyncio
+import os
+import tempfile
+
+import sim
+
+sim.install()
+sim.FakeMPU6050(sim.bus)
+os.chdir(tempfile.mkdtemp())  # GY25_data saves its calibration file in the working directory
+
+import GY25_data  # noqa: E402
+import main  # noqa: E402
+
+sim.echo_us[main.ECHO_PIN] = 5800  # free road: 100 cm echo
+sonar = sim.FakeHCSR04(main.TRIG_PIN, main.ECHO_PIN)
+
+# Scripted attitude instead of the simulated chip's (the fusion filter's response time
+# is not what is measured here); `published` is when a new attitude entered the stream.
+state = {"angles": (0.0, 0.0, 0.0), "published": None, "pending": False}
+
+
+def scripted_sample():
+    if state["pending"]:
+        state["pending"] = False
+        state["published"] = sim.ticks_us()
+    return state["angles"]
+
+
+GY25_data.sample = scripted_sample
+
+iterations = []
+_get_distance = main.get_distance
+
+
+def get_distance():
+    iterations.append(sim.ticks_us())
+    return _get_distance()
+
+
+main.get_distance = get_distance
+
+
+def tilt(pitch, roll):
+    state["angles"] = (pitch, roll, 0.0)
+    state["pending"] = True
+
+
+async def wait_for_pin(pin_id, level, timeout_s=2.0):
+    pin = sim.pins[pin_id]
+    end = sim.ticks_us() + timeout_s * 1e6
+    while pin.value() != level:
+        if sim.ticks_us() > end:
+            raise AssertionError("pin {} never went to {}".format(pin_id, level))
+        await asyncio.sleep(0.001)
+    return pin.changed_us
+
+
+async def shutdown(task):
+    # Cancels main() and the background tasks it started, one at a time. The tasks
+    # asyncio.wait_for() runs for Buzzer._rest() are left to their owner: when
+    # asyncio.run() cancels both at once, CPython 3.11's wait_for() can turn the
+    # cancellation into a TimeoutError and the buzzer task never exits.
+    task.cancel()
+    for other in asyncio.all_tasks():
+        if other is asyncio.current_task() or other.get_coro().__qualname__ == "Event.wait":
+            continue
+        other.cancel()
+        try:
+            await other
+        except asyncio.CancelledError:
+            pass
+
+
+async def check():
+    task = asyncio.create_task(main.main())
+    await asyncio.sleep(0.3)
+
+    first = len(iterations)                            # loop periods are measured while driving
+    tilt(20.0, 0.0)                                    # forward: IN1 and IN3 high
+    await wait_for_pin(main.IN3_PIN, 1)
+    # The ping rate follows the commanded speed from the first tick, not the ramped duty
+    start_speed = (main.sonar.speed, main.motors.speed(), main.motors.target_speed())
+    assert start_speed[0] == start_speed[2] > start_speed[1], start_speed
+    await asyncio.sleep(0.3)
+
+    tilt(0.0, 20.0)                                    # turn right: IN3 low, IN4 high
+    changed = await wait_for_pin(main.IN4_PIN, 1)
+    pwm = sim.pwms[main.ENB_PIN]
+    latency_ms = (max(changed, pwm.changed_us or 0) - state["published"]) / 1000
+    await asyncio.sleep(0.3)
+
+    last = len(iterations)
+    ping_ms = main.sonar.period()
+    sim.echo_us[main.ECHO_PIN] = 580                   # obstacle at 10 cm: motors stop
+    stop_ms = None
+    start = sim.ticks_us()
+    for _ in range(1000):
+        await asyncio.sleep(0.001)
+        if main.motors.action == "stop":
+            stop_ms = (sim.ticks_us() - start) / 1000
+            break
+    await shutdown(task)
+
+    driving = iterations[first:last]
+    periods = [(b - a) / 1000 for a, b in zip(driving, driving[1:])]
+    period_ms = max(periods)
+    print("loop period: mean {:.1f} ms, max {:.1f} ms ({} iterations)".format(
+        sum(periods) / len(periods), period_ms, len(driving)))
+    print("direction change -> motor outputs: {:.1f} ms".format(latency_ms))
+    print("buzzer: played {}, preempted {}, dropped {}".format(
+        main.buzzer.played, main.buzzer.preempted, main.buzzer.dropped))
+    print("sonar speed when forward starts: {:.2f} (applied duty {:.2f}, commanded {:.2f})".format(*start_speed))
+    print("obstacle -> stop: {} ms (ping period {} ms, {} pings, {} timeouts)".format(
+        None if stop_ms is None else round(stop_ms, 1), ping_ms, main.sonar.pings, main.sonar.timeouts))
+    print("scheduler: {ticks} ticks, {overruns} overruns, wcet {wcet_us} us, jitter max {max_jitter_us} us".format(
+        **main.control_rate.stats()))
+    stats = main.motors.stats()
+    print("motors: {} transitions, {} writes issued, {} suppressed".format(
+        stats["transitions"], stats["written"], stats["suppressed"]))
+    assert period_ms < 2 * main.LOOP_PERIOD * 1000, "loop blocked for {:.0f} ms".format(period_ms)
+    assert latency_ms <= period_ms, "direction change took {:.1f} ms, loop period {:.1f} ms".format(
+        latency_ms, period_ms)
+    # The median needs a majority of the window, pinged at the speed-dependent period
+    needed = main.sonar.window // 2 + 1
+    assert stop_ms is not None and stop_ms < (needed + 1) * ping_ms + 2 * period_ms, "obstacle stop took too long"
+    # stop -> forward -> right -> stop (obstacle)
+    assert stats["transitions"] == 4, "{} action transitions".format(stats["transitions"])
+    assert main.buzzer.played + main.buzzer.preempted <= stats["transitions"], "buzzer replayed a sound"
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(check())
@@ -0,0 +1,121 @@
+# Host checks for manoeuvre.Manoeuvres with Motors on the simulated pins (sim.py): step
+# timing from run(), preemption by a newer command, late poll() skipping to the final
+# step, and a 50 ms control loop that decides "backward" for a while and then
+# "forward", with the old sleep-based move_backward() and with the executor.
+# Usage: python tools/check_manoeuvre.py
+
+import asyncio
+import time
+
+import sim
+
+sim.install()
+
+from manoeuvre import Manoeuvres  # noqa: E402
+from motors import Motors  # noqa: E402
+from scheduler import FixedRate  # noqa: E402
+
+FULL = 65535
+PULSE_MS = 200
+
+
+def pulse(motors):
+    return ((motors.apply, ("backward", FULL, FULL), PULSE_MS), (motors.pause, (), PULSE_MS))
+
+
+def left_duty():
+    return sim.pwms[8].duty_u16()
+
+
+async def check_timing(motors, man):
+    t0 = time.perf_counter()
+    man.start("pulse_back", pulse(motors))
+    assert motors.action == "backward" and left_duty() == FULL, "first step applied at once"
+    edges = []
+    while man.active():
+        if left_duty() == 0 and not edges:
+            edges.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.001)
+    end = (time.perf_counter() - t0) * 1000
+    assert abs(edges[0] - PULSE_MS) < 15 and abs(end - 2 * PULSE_MS) < 15, (edges, end)
+    assert motors.action == "backward" and left_duty() == 0
+    return edges[0], end
+
+
+async def check_preempt(motors, man):
+    man.start("pulse_back", pulse(motors))
+    await asyncio.sleep(0.1)
+    assert man.cancel() and not man.active()
+    motors.apply("forward", FULL, FULL)
+    await asyncio.sleep(0.25)
+    assert motors.action == "forward" and left_duty() == FULL, "cancelled step must not run"
+    # start() replaces a running manoeuvre
+    man.start("pulse_back", pulse(motors))
+    man.start("spin", ((motors.apply, ("right", FULL, FULL), 50), (motors.stop, (), 0)))
+    await asyncio.sleep(0.1)
+    assert motors.action == "stop" and not man.active()
+
+
+def check_late_poll(motors):
+    man = Manoeuvres()
+    calls = []
+    steps = ((motors.apply, ("backward", FULL, FULL), PULSE_MS),
+             (lambda: calls.append("wait"), (), PULSE_MS),
+             (lambda: calls.append("pause") or motors.pause(), (), PULSE_MS))
+    man.start("pulse_back", steps)
+    time.sleep(0.65)
+    man.poll()
+    assert not man.active() and man.completed == 1 and left_duty() == 0
+    assert calls == ["pause"], "only the final step runs"
+    assert man.max_late_ms >= 440
+
+
+async def loop(motors, man, old, ticks=30, switch_ms=625):
+    # The tilt says "backward" until switch_ms, then "forward". Returns the loop periods
+    # while backing, the scheduler stats and the delay from the switch to the forward
+    # direction on the pins.
+    rate = FixedRate(50)
+    starts = []
+    t0 = time.perf_counter()
+    for i in range(ticks):
+        await rate.tick()
+        now = time.perf_counter()
+        starts.append(now)
+        if (now - t0) * 1000 < switch_ms:
+            if old:
+                motors.apply("backward", FULL, FULL)
+                await asyncio.sleep(0.2)
+                motors.pause()
+                await asyncio.sleep(0.2)
+            elif not man.active("pulse_back"):
+                man.start("pulse_back", pulse(motors))
+        else:
+            man.cancel()
+            motors.apply("forward", FULL, FULL)
+    assert sim.pins[4].value() == 1
+    reaction = sim.pins[4].changed_us / 1000 - t0 * 1000 - switch_ms   # sim ticks_us is perf_counter
+    backing = [b - a for a, b in zip(starts, starts[1:]) if (b - t0) * 1000 < switch_ms]
+    return [p * 1000 for p in backing], rate.stats(), reaction
+
+
+async def main():
+    motors = Motors(4, 5, 6, 7, 8, 9)
+    man = Manoeuvres()
+    task = asyncio.create_task(man.run())
+    off, end = await check_timing(motors, man)
+    await check_preempt(motors, man)
+    check_late_poll(motors)
+    print("pulse: pause after {:.1f} ms, done after {:.1f} ms (nominal {} / {})".format(off, end, PULSE_MS, 2 * PULSE_MS))
+    for label, old in (("sleep-based", True), ("Manoeuvres", False)):
+        motors.stop()
+        periods, stats, reaction = await loop(motors, man, old)
+        print("{:<12} loop period while backing: mean {:6.1f} ms, max {:6.1f} ms, overruns {:2d} | "
+              "tilt forward -> forward outputs {:6.1f} ms".format(
+                  label, sum(periods) / len(periods), max(periods), stats["overruns"], reaction))
+    print("manoeuvres:", man.stats())
+    task.cancel()
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
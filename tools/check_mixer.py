@@ -0,0 +1,133 @@
+# Host checks for mixer.Mixer and Motors.drive() on the simulated pins (sim.py): dead
+# zone, saturation, symmetry, monotonic curves, agreement with the nine discrete
+# actions of main.py, and the cost of one mix() call.
+# Usage: python tools/check_mixer.py
+
+import time
+
+import sim
+
+sim.install()
+
+from mixer import Mixer  # noqa: E402
+from motors import Motors, DIRECTIONS  # noqa: E402
+
+FULL = 65535
+
+
+def discrete(pitch, roll, dead_zone):
+    # The decision chain of main.py: action name and which motor is the faster one
+    p = 0 if abs(pitch) < dead_zone else pitch
+    r = 0 if abs(roll) < dead_zone else roll
+    if p == 0 and r == 0:
+        return "stop"
+    if p > 0 and r > 0:
+        return "northeast"
+    if p > 0 and r < 0:
+        return "northwest"
+    if p < 0 and r > 0:
+        return "southeast"
+    if p < 0 and r < 0:
+        return "southwest"
+    if p > 0:
+        return "forward"
+    if p < 0:
+        return "backward"
+    return "right" if r > 0 else "left"
+
+
+def float_mix(pitch, roll, max_duty, dead_zone=10, full_angle=45, throttle_expo=0.3, steer_expo=0.5):
+    # The same mixing computed in floats every call, for the timing comparison
+    def curve(angle, expo):
+        sign = 1 if angle >= 0 else -1
+        angle = abs(angle)
+        if angle < dead_zone:
+            return 0.0
+        x = min(1.0, (angle - dead_zone + 1) / (full_angle - dead_zone + 1))
+        return sign * ((1 - expo) * x + expo * x * x * x)
+    t = curve(pitch, throttle_expo)
+    s = curve(roll, steer_expo)
+    if t < 0:
+        s = -s
+    return int(max(-1.0, min(1.0, t + s)) * max_duty), int(max(-1.0, min(1.0, t - s)) * max_duty)
+
+
+def check_values(mixer):
+    assert mixer.mix(0, 0) == (0, 0)
+    assert mixer.mix(9.9, -9.9) == (0, 0), "dead zone"
+    assert mixer.mix(90, 0) == (FULL, FULL), "full throttle"
+    assert mixer.mix(-90, 0) == (-FULL, -FULL), "full reverse"
+    assert mixer.mix(0, 90) == (FULL, -FULL), "spin right"
+    for pitch in range(-90, 91, 3):
+        for roll in range(-90, 91, 3):
+            left, right = mixer.mix(pitch, roll)
+            assert -FULL <= left <= FULL and -FULL <= right <= FULL, "saturation"
+            # Mirror image: swapping roll swaps the wheels
+            assert mixer.mix(pitch, -roll) == (right, left), (pitch, roll)
+    last = 0
+    for pitch in range(0, 91):
+        left, right = mixer.mix(pitch, 0)
+        assert left == right and left >= last, "throttle curve not monotonic"
+        last = left
+    # Expo: half tilt gives less than half speed
+    assert mixer.mix(27.5, 0)[0] < FULL // 2
+
+
+def check_directions(mixer):
+    motors = Motors(4, 5, 6, 7, 8, 9)
+    pins = [sim.pins[p] for p in (4, 5, 6, 7)]
+    for pitch in (-40, -15, 0, 15, 40):
+        for roll in (-40, -15, 0, 15, 40):
+            expected = discrete(pitch, roll, 10)
+            left, right = mixer.mix(pitch, roll)
+            motors.drive(left, right)
+            levels = tuple(p.value() for p in pins)
+            if expected in ("northeast", "northwest", "southeast", "southwest"):
+                # Diagonals: the outer wheel runs in the throttle direction and faster; the
+                # inner one slows down (and reverses when steering outweighs throttle)
+                outer, inner = (left, right) if expected in ("northeast", "southeast") else (right, left)
+                assert abs(outer) > abs(inner), (pitch, roll, left, right)
+                assert (outer > 0) == (pitch > 0), (pitch, roll, left, right)
+                if abs(pitch) >= abs(roll):
+                    assert levels == DIRECTIONS[expected], (pitch, roll, levels)
+            else:
+                assert motors.action == expected, (pitch, roll, motors.action, expected)
+                assert levels == DIRECTIONS[expected], (pitch, roll, levels)
+    # One wheel turning: the diagonal is named after the side of the turning (outer) wheel,
+    # as in move_northeast()/move_southeast() where the left wheel runs faster
+    for left, right, expected in ((40000, 0, "northeast"), (0, 40000, "northwest"),
+                                  (-40000, 0, "southeast"), (0, -40000, "southwest")):
+        motors.drive(left, right)
+        assert motors.action == expected, (left, right, motors.action, expected)
+    return motors
+
+
+def main():
+    mixer = Mixer(dead_zone=10, full_angle=45)
+    check_values(mixer)
+    motors = check_directions(mixer)
+
+    n = 20000
+    t0 = time.perf_counter()
+    for i in range(n):
+        mixer.mix(i % 60 - 30, 17.3, 40000)
+    mix_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for i in range(n):
+        float_mix(i % 60 - 30, 17.3, 40000)
+    float_us = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for i in range(n):
+        discrete(i % 60 - 30, 17.3, 10)
+    chain_us = (time.perf_counter() - t0) / n * 1e6
+    print("mix(): {:.2f} us per call with tables ({} + {} entries), {:.2f} us in floats; discrete chain {:.2f} us".format(
+        mix_us, len(mixer.throttle), len(mixer.steer), float_us, chain_us))
+    print("pitch ->  left/right duty at roll 0 and roll 20:")
+    for pitch in (0, 10, 15, 20, 30, 45):
+        print("  {:3d} deg  {:6d} {:6d}   {:6d} {:6d}".format(pitch, *(mixer.mix(pitch, 0) + mixer.mix(pitch, 20))))
+    print("motors:", motors.stats())
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Board script: copy it next to mpu6050.py on the Pico and run it there. On a
+# workstation (python tools/i2c_bench.py) it runs against the simulated bus of sim.py.
+try:
+    import sim
+    sim.install()
+    sim.FakeMPU6050(sim.bus)
+except ImportError:
+    pass
+
+from machine import SoftI2C, I2C, Pin
+import time
+from mpu6050 import hw_i2c_id
+
+# سنجش توان عملیاتی باس I2C برای هر نوع پیاده‌سازی (بایت بر ثانیه و تراکنش بر ثانیه)
+# با خواندن پشت‌سرهم ۱۴ بایت داده MPU6050 (شتاب‌سنج + دما + ژیروسکوپ)
+
+SDA_PIN = 3
+SCL_PIN = 2
+ADDR = 0x68
+BURST = 14       # تعداد بایت هر تراکنش
+ROUNDS = 500     # تعداد تراکنش‌ها در هر آزمون
+
+def bench(name, i2c):
+    buf = bytearray(BURST)
+    try:
+        i2c.readfrom_mem_into(ADDR, 0x3B, buf)
+    except OSError as e:
+        print(f"{name}: no response from 0x{ADDR:02X} ({e})")
+        return
+    start = time.ticks_us()
+    for _ in range(ROUNDS):
+        i2c.readfrom_mem_into(ADDR, 0x3B, buf)
+    elapsed = time.ticks_diff(time.ticks_us(), start) / 1000000
+    print(f"{name:<24} {ROUNDS / elapsed:8.0f} transactions/s  {ROUNDS * BURST / elapsed:8.0f} bytes/s")
+
+backends = [
+    ("SoftI2C 100 kHz", lambda sda, scl: SoftI2C(scl=Pin(scl), sda=Pin(sda), freq=100000)),
+    ("SoftI2C 400 kHz", lambda sda, scl: SoftI2C(scl=Pin(scl), sda=Pin(sda), freq=400000)),
+]
+
+hw_id = hw_i2c_id(SDA_PIN, SCL_PIN)
+if hw_id is not None:
+    backends.append((f"I2C{hw_id} 100 kHz", lambda sda, scl: I2C(hw_id, sda=Pin(sda), scl=Pin(scl), freq=100000)))
+    backends.append((f"I2C{hw_id} 400 kHz", lambda sda, scl: I2C(hw_id, sda=Pin(sda), scl=Pin(scl), freq=400000)))
+else:
+    print(f"GPIO{SDA_PIN}/GPIO{SCL_PIN} is not a hardware I2C pin pair; only SoftI2C is measured.")
+
+for name, build in backends:
+    bench(name, build(SDA_PIN, SCL_PIN))
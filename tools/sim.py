@@ -0,0 +1,602 @@
+# Host-side (CPython) stand-ins for the MicroPython hardware used by this project.
+# They let the modules in the project root run on a workstation against simulated
+# devices, for benchmarks and timing checks:
+#
+#     import sim
+#     sim.install()                 # must run before importing mpu6050 / GY25_data
+#     imu = sim.FakeMPU6050(sim.bus)
+#     from mpu6050 import MPU6050
+#     mpu = MPU6050()               # talks to the simulated chip on sim.bus
+
+import os
+import random
+import sys
+import threading
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_ENODEV = 19
+
+
+# -------------------------------
+# MicroPython time extensions
+# -------------------------------
+def ticks_us():
+    return time.perf_counter_ns() // 1000
+
+
+def ticks_ms():
+    return time.perf_counter_ns() // 1000000
+
+
+def ticks_diff(a, b):
+    return a - b
+
+
+def ticks_add(a, delta):
+    return a + delta
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    time.sleep(us / 1000000)
+
+
+# -------------------------------
+# I2C
+# -------------------------------
+class FakeI2C:
+    """Register-level I2C bus. Devices are attached by address and must provide
+    read(reg, buf) and write(reg, data)."""
+
+    def __init__(self):
+        self.devices = {}
+        self.config = {}
+        self.transactions = 0
+        self.bytes_moved = 0
+        # Number of upcoming transactions that fail with ENODEV (loose-wire simulation)
+        self.fail_next = 0
+
+    def attach(self, addr, device):
+        self.devices[addr] = device
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def _device(self, addr):
+        self.transactions += 1
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise OSError(_ENODEV, "ENODEV")
+        dev = self.devices.get(addr)
+        if dev is None:
+            raise OSError(_ENODEV, "ENODEV")
+        return dev
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self._device(addr).read(reg, buf)
+        self.bytes_moved += len(buf)
+
+    def readfrom_mem(self, addr, reg, nbytes):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, reg, buf)
+        return bytes(buf)
+
+    def writeto_mem(self, addr, reg, data):
+        self._device(addr).write(reg, data)
+        self.bytes_moved += len(data)
+
+
+def _to_be16(value):
+    value &= 0xFFFF
+    return value >> 8, value & 0xFF
+
+
+def _s16(regs, reg):
+    value = (regs[reg] << 8) | regs[reg + 1]
+    return value - 0x10000 if value & 0x8000 else value
+
+
+class FakeMPU6050:
+    """Register map of an MPU6050 that produces samples on the chip's own timeline.
+
+    The sample period follows SMPLRT_DIV and CONFIG/DLPF like the real chip. Each new
+    sample sets DATA_RDY in INT_STATUS (cleared by reading INT_STATUS) and, if a
+    `source(index)` callable is set, loads the (accel, temp, gyro) raw tuple it returns.
+    Without a source the last set_sample() values are repeated.
+
+    The raw samples are the true values: the chip adds `accel_bias` (g) and `gyro_bias`
+    (deg/s) per axis, Gaussian `noise` (standard deviation in counts, redrawn every
+    sample) and whatever the offset registers (XA_OFFS_*, XG_OFFS_USR*) correct, like
+    an uncalibrated sensor. The accel offsets start at a per-chip factory trim.
+
+    The 1024-byte FIFO queues the sensors selected in FIFO_EN while USER_CTRL.FIFO_EN
+    is set; on overflow the oldest bytes are lost and FIFO_OFLOW is raised."""
+
+    FIFO_SIZE = 1024
+
+    def __init__(self, bus=None, addr=0x68):
+        self.regs = bytearray(128)
+        self.regs[0x6B] = 0x40  # PWR_MGMT_1: sleep bit set after power-on
+        self.regs[0x75] = 0x68  # WHO_AM_I
+        self.factory_accel_offsets = (-2138, 1454, 1200)
+        for i, v in enumerate(self.factory_accel_offsets):
+            self.regs[0x06 + 2 * i], self.regs[0x07 + 2 * i] = _to_be16(v)
+        self.accel_bias = (0.0, 0.0, 0.0)
+        self.gyro_bias = (0.0, 0.0, 0.0)
+        self.noise = 0.0
+        self._random = random.Random(addr)
+        self._true = ((0, 0, 16384), 0, (0, 0, 0))
+        self._compose()
+        self.addr = addr
+        self.source = None
+        self._t0 = ticks_us()
+        self._t0_index = 0
+        self._index = 0
+        self._status_index = 0
+        self._int_thread = None
+        self.fifo = bytearray()
+        self._lock = threading.Lock()
+        if bus is not None:
+            bus.attach(addr, self)
+
+    def sample_rate(self):
+        """Output data rate in Hz implied by SMPLRT_DIV and DLPF_CFG."""
+        dlpf = self.regs[0x1A] & 0x07
+        gyro_rate = 8000 if dlpf in (0, 7) else 1000
+        return gyro_rate / (1 + self.regs[0x19])
+
+    def _advance(self):
+        with self._lock:
+            elapsed = ticks_us() - self._t0
+            index = self._t0_index + int(elapsed * self.sample_rate() // 1000000)
+            while self._index < index:
+                self._index += 1
+                self._on_sample(self._index)
+
+    def _on_sample(self, index):
+        if self.source is not None:
+            accel, temp, gyro = self.source(index)
+            self.set_sample(accel, temp, gyro)
+        elif self.noise or self.accel_bias != (0.0, 0.0, 0.0) or self.gyro_bias != (0.0, 0.0, 0.0):
+            self._compose()
+        regs = self.regs
+        if regs[0x6A] & 0x40:
+            self._queue_fifo(regs[0x23])
+
+    def _queue_fifo(self, enabled):
+        regs = self.regs
+        fifo = self.fifo
+        if enabled & 0x08:
+            fifo += regs[0x3B:0x41]
+        if enabled & 0x80:
+            fifo += regs[0x41:0x43]
+        for bit, reg in ((0x40, 0x43), (0x20, 0x45), (0x10, 0x47)):
+            if enabled & bit:
+                fifo += regs[reg:reg + 2]
+        if len(fifo) > self.FIFO_SIZE:
+            del fifo[:len(fifo) - self.FIFO_SIZE]
+            regs[0x3A] |= 0x10  # FIFO_OFLOW
+
+    def read(self, reg, buf):
+        self._advance()
+        regs = self.regs
+        if reg == 0x74:  # FIFO_R_W does not auto-increment: stream queued bytes
+            with self._lock:
+                n = min(len(buf), len(self.fifo))
+                buf[:n] = self.fifo[:n]
+                del self.fifo[:n]
+            for i in range(n, len(buf)):
+                buf[i] = 0xFF
+            return
+        if reg == 0x3A:  # INT_STATUS, cleared on read
+            if self._index > self._status_index and regs[0x38] & 0x01:
+                regs[0x3A] |= 0x01
+            self._status_index = self._index
+        count = len(self.fifo)
+        regs[0x72], regs[0x73] = count >> 8, count & 0xFF
+        for i in range(len(buf)):
+            buf[i] = regs[(reg + i) & 0x7F]
+        if reg == 0x3A:
+            regs[0x3A] = 0
+
+    def write(self, reg, data):
+        self._advance()
+        for i in range(len(data)):
+            self.regs[(reg + i) & 0x7F] = data[i]
+        if self.regs[0x6A] & 0x04:  # USER_CTRL.FIFO_RESET, self-clearing
+            with self._lock:
+                self.fifo = bytearray()
+            self.regs[0x6A] &= ~0x04 & 0xFF
+        if reg <= 0x18 or 0x1B <= reg <= 0x1C:
+            self._compose()  # offsets or ranges changed
+        if reg <= 0x1A and reg + len(data) > 0x19:
+            # Rate changed: continue the sample timeline from here at the new rate
+            with self._lock:
+                self._t0 = ticks_us()
+                self._t0_index = self._index
+
+    def set_sample(self, accel=(0, 0, 16384), temp=0, gyro=(0, 0, 0)):
+        """Loads one raw sample (signed 16-bit counts, true values at the current
+        ranges) into the output registers."""
+        self._true = (tuple(accel), temp, tuple(gyro))
+        self._compose()
+
+    def _compose(self):
+        regs = self.regs
+        accel, temp, gyro = self._true
+        acc_lsb = 16384 >> ((regs[0x1C] >> 3) & 3)
+        gyr_lsb = 131 / (1 << ((regs[0x1B] >> 3) & 3))
+        gauss = self._random.gauss
+        values = []
+        for i in range(3):
+            offset = _s16(regs, 0x06 + 2 * i) - self.factory_accel_offsets[i]
+            v = accel[i] + (self.accel_bias[i] + offset / 2048) * acc_lsb
+            values.append(v + gauss(0, self.noise) if self.noise else v)
+        values.append(temp)
+        for i in range(3):
+            v = gyro[i] + (self.gyro_bias[i] + _s16(regs, 0x13 + 2 * i) / 32.8) * gyr_lsb
+            values.append(v + gauss(0, self.noise) if self.noise else v)
+        reg = 0x3B
+        for v in values:
+            regs[reg], regs[reg + 1] = _to_be16(max(-32768, min(32767, int(round(v)))))
+            reg += 2
+
+    def drive_int_pin(self, pin):
+        """Pulses `pin` (a sim.Pin) on every new sample while DATA_RDY is enabled,
+        from a background thread, like the INT output of the chip."""
+        stop = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                last = self._index
+                due = self._t0 + (last + 1 - self._t0_index) * 1000000 / self.sample_rate()
+                time.sleep(max(0, due - ticks_us()) / 1000000)
+                self._advance()
+                if self._index != last and self.regs[0x38] & 0x01:
+                    pin.pulse()
+
+        self._int_thread = threading.Thread(target=run, daemon=True)
+        self._int_thread.start()
+        return stop
+
+
+# -------------------------------
+# UART
+# -------------------------------
+class FakeUART:
+    """UART with a bounded receive ring like the MicroPython driver: bytes that arrive
+    while it is full are lost. A device attached with attach() produces the received
+    bytes and gets everything written."""
+
+    def __init__(self, id=0, baudrate=115200, rxbuf=256, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.rxbuf = rxbuf
+        self.config = dict(kwargs)
+        self.rx = bytearray()
+        self.device = None
+        self.written = bytearray()
+        self.overruns = 0
+
+    def attach(self, device):
+        self.device = device
+
+    def receive(self, data):
+        room = self.rxbuf - len(self.rx)
+        if len(data) > room:
+            self.overruns += len(data) - room
+            data = data[:room]
+        self.rx += data
+
+    def _advance(self):
+        if self.device is not None:
+            self.device.advance(self)
+
+    def any(self):
+        self._advance()
+        return len(self.rx)
+
+    def readinto(self, buf):
+        self._advance()
+        n = min(len(buf), len(self.rx))
+        if n == 0:
+            return None
+        buf[:n] = self.rx[:n]
+        del self.rx[:n]
+        return n
+
+    def read(self, nbytes=None):
+        self._advance()
+        n = len(self.rx) if nbytes is None else min(nbytes, len(self.rx))
+        if n == 0:
+            return None
+        data = bytes(self.rx[:n])
+        del self.rx[:n]
+        return data
+
+    def write(self, data):
+        self.written += data
+        if self.device is not None:
+            self.device.command(self, bytes(data))
+        return len(data)
+
+
+class FakeGY25:
+    """GY-25 module: sends 0xAA yaw pitch roll 0x55 frames (int16, 1/100 degree) at
+    `rate_hz` in binary continuous mode, or one frame per 0xA5 0x51 query. The angles
+    come from `source(index)` -> (yaw, pitch, roll) degrees if set, else `angles`.
+    inject(data) puts raw bytes (line noise) into the stream."""
+
+    def __init__(self, uart=None, rate_hz=100):
+        self.rate_hz = rate_hz
+        self.angles = (0.0, 0.0, 0.0)
+        self.source = None
+        self.continuous = False
+        self._t0 = ticks_us()
+        self._index = 0
+        self._pending = bytearray()
+        if uart is not None:
+            uart.attach(self)
+
+    def frame(self, index):
+        yaw, pitch, roll = self.source(index) if self.source is not None else self.angles
+        data = bytearray([0xAA])
+        for v in (yaw, pitch, roll):
+            data.extend(_to_be16(int(round(v * 100))))
+        data.append(0x55)
+        return data
+
+    def inject(self, data):
+        self._pending += data
+
+    def advance(self, uart):
+        index = int((ticks_us() - self._t0) * self.rate_hz // 1000000)
+        while self._index < index:
+            self._index += 1
+            if self.continuous:
+                uart.receive(self._pending + self.frame(self._index))
+                self._pending = bytearray()
+
+    def command(self, uart, data):
+        self.advance(uart)
+        for i in range(len(data) - 1):
+            if data[i] != 0xA5:
+                continue
+            cmd = data[i + 1]
+            if cmd == 0x52:
+                self.continuous = True
+            elif cmd == 0x51:
+                self.continuous = False
+                uart.receive(self._pending + self.frame(self._index))
+                self._pending = bytearray()
+
+
+# -------------------------------
+# Fake machine module
+# -------------------------------
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = 0 if value is None else value
+        self.writes = 0
+        self.changed_us = None   # ticks_us of the last write that changed the level
+        pins[id] = self
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        v = 1 if v else 0
+        changed = v != self._value
+        if changed:
+            self.changed_us = ticks_us()
+        self._value = v
+        self.writes += 1
+        if changed and self.id in watchers:
+            watchers[self.id](self, v)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger=IRQ_RISING, hard=False):
+        self._irq = handler
+        self._irq_trigger = trigger
+
+    def drive(self, level):
+        """Sets the level of an input pin from outside, firing the IRQ for the edge."""
+        if level == self._value:
+            return
+        self._value = level
+        self.changed_us = ticks_us()
+        handler = getattr(self, "_irq", None)
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if handler is not None and self._irq_trigger & edge:
+            handler(self)
+
+    def pulse(self):
+        """Drives a short high pulse on an input pin, firing a rising-edge IRQ."""
+        self.drive(1)
+        self._value = 0
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin
+        self._freq = 0
+        self._duty = 0
+        self.writes = 0
+        self.changed_us = None   # ticks_us of the last duty write that changed the duty
+        pwms[pin.id] = self
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+        self.writes += 1
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        if value != self._duty:
+            self.changed_us = ticks_us()
+        self._duty = value
+        self.writes += 1
+
+    def deinit(self):
+        self._duty = 0
+
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = 32768       # what read_u16() returns; set it from the test
+        self.reads = 0
+        adcs[getattr(pin, "id", pin)] = self
+
+    def read_u16(self):
+        self.reads += 1
+        return self.value
+
+
+class FakeHCSR04:
+    """Ultrasonic sensor: the falling edge of a trigger pulse on `trig` starts an echo
+    pulse on the `echo` input pin (both edges fire its IRQ) from a helper thread. The
+    pulse length comes from `echo_us[echo]` like time_pulse_us(); without an entry the
+    module holds the echo high for no_echo_us, as a real HC-SR04 does with nothing in
+    range. A trigger while the echo is still high is ignored."""
+
+    def __init__(self, trig, echo, delay_us=500, no_echo_us=38000):
+        self.trig = trig
+        self.echo = echo
+        self.delay_us = delay_us
+        self.no_echo_us = no_echo_us
+        self.triggers = 0
+        self.echoes = []         # (start ticks_us, length) of every echo sent
+        watchers[trig] = self._on_trigger
+
+    def _on_trigger(self, pin, level):
+        if level or self.echo not in pins or pins[self.echo].value():
+            return
+        self.triggers += 1
+        width = echo_us.get(self.echo)
+        if width is None:
+            width = self.no_echo_us
+        self.echoes.append((ticks_us() + self.delay_us, width))
+        threading.Thread(target=self._echo, args=(pins[self.echo], width), daemon=True).start()
+
+    def _echo(self, pin, width):
+        start = ticks_us() + self.delay_us
+        self._until(start)
+        pin.drive(1)
+        self._until(start + width)
+        pin.drive(0)
+
+    @staticmethod
+    def _until(t_us):
+        # Sleep to ~1 ms before the edge, then spin: time.sleep() alone overshoots
+        left = t_us - ticks_us()
+        if left > 1500:
+            time.sleep((left - 1000) / 1e6)
+        while ticks_us() < t_us:
+            pass
+
+
+def idle():
+    # machine.idle(): waits for the next interrupt; the 1 ms systick bounds it
+    time.sleep(0.0001)
+
+
+def time_pulse_us(pin, level, timeout_us=1000000):
+    """No echo device is simulated here: behaves like a timeout (-1) after
+    blocking for timeout_us unless `echo_us` maps the pin id to a pulse length."""
+    duration = echo_us.get(pin.id)
+    if duration is None:
+        sleep_us(timeout_us)
+        return -1
+    sleep_us(duration)
+    return duration
+
+
+# Every Pin/PWM/ADC created through the fake machine module, by pin id (latest wins)
+pins = {}
+pwms = {}
+adcs = {}
+# time_pulse_us() / FakeHCSR04 pulse lengths by pin id (None/missing: timeout)
+echo_us = {}
+# Callbacks run when an output pin changes level, by pin id (see FakeHCSR04)
+watchers = {}
+
+
+# Shared default bus returned by the fake SoftI2C/I2C constructors
+bus = FakeI2C()
+
+
+def _make_i2c(*args, **kwargs):
+    bus.config = dict(kwargs)
+    if args:
+        bus.config["id"] = args[0]
+    return bus
+
+
+# Fake UARTs by id, created on first use by machine.UART(id, ...)
+uarts = {}
+
+
+def _make_uart(id=0, baudrate=115200, **kwargs):
+    uart = uarts.get(id)
+    if uart is None:
+        uart = uarts[id] = FakeUART(id, baudrate, **kwargs)
+    return uart
+
+
+def install():
+    """Makes `machine`, `uasyncio`, `ujson` and the MicroPython `time` extensions
+    importable under CPython and puts the project root on sys.path."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    for name in ("ticks_us", "ticks_ms", "ticks_diff", "ticks_add", "sleep_ms", "sleep_us"):
+        if not hasattr(time, name):
+            setattr(time, name, globals()[name])
+
+    if "machine" not in sys.modules:
+        machine = types.ModuleType("machine")
+        machine.Pin = Pin
+        machine.SoftI2C = _make_i2c
+        machine.I2C = _make_i2c
+        machine.UART = _make_uart
+        machine.PWM = PWM
+        machine.ADC = ADC
+        machine.time_pulse_us = time_pulse_us
+        machine.idle = idle
+        sys.modules["machine"] = machine
+
+    if "uasyncio" not in sys.modules:
+        import asyncio
+        sys.modules["uasyncio"] = asyncio
+    if "ujson" not in sys.modules:
+        import json
+        sys.modules["ujson"] = json
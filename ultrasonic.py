@@ -0,0 +1,186 @@
+# Non-blocking HC-SR04 ranging.
+#
+# run() is an asyncio task that sends a 10 us trigger pulse every period_ms and lets a
+# pin IRQ timestamp both edges of the echo pulse, instead of busy-waiting in
+# machine.time_pulse_us() for up to 30 ms. The task only wakes every few milliseconds
+# to look at what the IRQ recorded, and publishes the distance with its ticks_ms
+# timestamp, so the control loop reads a cached value:
+#
+#     sonar = Ultrasonic(28, 27)
+#     asyncio.create_task(sonar.run())
+#     d, confidence = sonar.filtered(max_age_ms=400)
+#
+# An echo that does not end within timeout_us (nothing within ~5 m; the module then
+# holds the echo high for ~38 ms) counts as "nothing in range".
+#
+# The published distance is the median of the last `window` pings, a timeout counting
+# as infinitely far, so a single spurious echo does not stop the car and a single missed
+# echo does not clear an obstacle. confidence is the fraction of those pings that agree
+# with the median. The ping period follows set_speed(): period_ms at full speed, up to
+# idle_ms when the car stands still.
+
+import uasyncio as asyncio
+from array import array
+from machine import Pin
+from time import ticks_us, ticks_ms, ticks_diff, ticks_add, sleep_us
+
+_US_PER_CM = 58.0        # round trip at 343 m/s
+_TIMEOUT_US = 30000      # same limit as the old time_pulse_us() call (~5 m)
+_PERIOD_MS = 60          # HC-SR04 datasheet: at least 60 ms between pings
+_IDLE_MS = 250           # ping period when the car stands still
+_POLL_MS = 2             # how often run() checks for the falling edge
+_WINDOW = 3              # pings in the median
+_AGREE_CM = 5.0          # a ping within this distance of the median agrees with it
+_INF = float("inf")
+
+
+class Ultrasonic(object):
+    def __init__(self, trig, echo, timeout_us=_TIMEOUT_US, period_ms=_PERIOD_MS, idle_ms=_IDLE_MS,
+                 window=_WINDOW):
+        self.trig = Pin(trig, Pin.OUT)
+        self.trig.value(0)
+        self.echo = Pin(echo, Pin.IN)
+        self.timeout_us = timeout_us
+        self.period_ms = period_ms
+        self.idle_ms = idle_ms
+        self.speed = 0.0         # 0..1, see set_speed()
+        # Written by the IRQ handler
+        self._rise = 0
+        self._width = 0
+        self._rose = False
+        self._done = False
+        # Last `window` pings in cm (inf: no echo) and a scratch copy for the median
+        self.window = window
+        self._ring = array("f", [_INF] * window)
+        self._sorted = array("f", [_INF] * window)
+        self._count = 0
+        # Published result
+        self.raw = None          # latest single ping in cm, None: no echo within timeout_us
+        self.distance = None     # median of the window in cm, None: nothing in range
+        self.confidence = 0.0    # fraction of the window within _AGREE_CM of the median
+        self.stamp = None        # ticks_ms of the latest ping
+        self.pings = 0
+        self.timeouts = 0        # pings without an echo end within timeout_us
+        self.busy = 0            # pings skipped because the echo line was still high
+        self.running = False
+        self.echo.irq(handler=self._on_edge, trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING)
+
+    # IRQ handler: only timestamps the edges.
+    def _on_edge(self, pin):
+        now = ticks_us()
+        if pin.value():
+            self._rise = now
+            self._rose = True
+        elif self._rose:
+            self._width = ticks_diff(now, self._rise)
+            self._done = True
+
+    def _trigger(self):
+        self._rose = False
+        self._done = False
+        self.trig.value(1)
+        sleep_us(10)
+        self.trig.value(0)
+
+    # Adds one ping to the window and recomputes the median and its confidence.
+    def _publish(self, cm):
+        ring = self._ring
+        ring[self._count % self.window] = _INF if cm is None else cm
+        self._count += 1
+        n = min(self._count, self.window)
+        # Insertion sort of at most `window` values into the preallocated scratch array
+        out = self._sorted
+        for i in range(n):
+            v = ring[i]
+            j = i
+            while j > 0 and out[j - 1] > v:
+                out[j] = out[j - 1]
+                j -= 1
+            out[j] = v
+        median = out[n // 2]
+        agree = 0
+        for i in range(n):
+            v = out[i]
+            if v == median or abs(v - median) <= _AGREE_CM:
+                agree += 1
+        self.raw = cm
+        self.distance = None if median == _INF else median
+        self.confidence = agree / self.window
+        self.stamp = ticks_ms()
+
+    # One ping: triggers, waits (without blocking the loop) for the echo to end and
+    # publishes the result. Returns the single-ping distance in cm or None.
+    async def ping(self):
+        if self.echo.value():
+            # Still inside the previous (out-of-range) echo: the module ignores triggers
+            self.busy += 1
+            return None
+        self._trigger()
+        start = ticks_us()
+        limit = self.timeout_us + 1000     # the echo starts ~0.5 ms after the trigger
+        while not self._done:
+            if ticks_diff(ticks_us(), start) > limit:
+                break
+            await asyncio.sleep(_POLL_MS / 1000)
+        self.pings += 1
+        if self._done and self._width <= self.timeout_us:
+            cm = self._width / _US_PER_CM
+        else:
+            self.timeouts += 1
+            cm = None
+        self._publish(cm)
+        return cm
+
+    # Tells the ranging task how fast the car moves: 0 (standing) .. 1 (full duty).
+    def set_speed(self, speed):
+        self.speed = speed
+
+    # Ping period [ms] for the current speed.
+    def period(self):
+        speed = self.speed
+        if speed >= 1:
+            return self.period_ms
+        if speed <= 0:
+            return self.idle_ms
+        return int(self.idle_ms - (self.idle_ms - self.period_ms) * speed)
+
+    # Ranging task: pings on absolute deadlines whose spacing follows period(). A long
+    # idle wait is re-checked every period_ms, so speeding up takes effect at once.
+    async def run(self):
+        self.running = True
+        start = ticks_ms()
+        try:
+            while True:
+                await self.ping()
+                while True:
+                    wait = ticks_diff(ticks_add(start, self.period()), ticks_ms())
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(min(wait, self.period_ms) / 1000)
+                start = ticks_add(start, self.period())
+                if ticks_diff(ticks_ms(), start) > self.period_ms:
+                    start = ticks_ms()    # overran: restart the schedule instead of bursting
+        finally:
+            self.running = False
+
+    # Age of the latest result [ms], None before the first ping.
+    def age_ms(self):
+        if self.stamp is None:
+            return None
+        return ticks_diff(ticks_ms(), self.stamp)
+
+    # Filtered distance as (cm, confidence). cm is None when the median is "nothing in
+    # range"; (None, 0.0) means no ping newer than max_age_ms exists (task not running).
+    def filtered(self, max_age_ms=400):
+        age = self.age_ms()
+        if age is None or age > max_age_ms:
+            return None, 0.0
+        return self.distance, self.confidence
+
+    # Filtered distance in cm, or None if out of range or older than max_age_ms.
+    def read(self, max_age_ms=400):
+        return self.filtered(max_age_ms)[0]
+
+    def stats(self):
+        return {"pings": self.pings, "timeouts": self.timeouts, "busy": self.busy,
+                "period_ms": self.period(), "confidence": self.confidence, "age_ms": self.age_ms()}